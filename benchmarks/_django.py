@@ -0,0 +1,41 @@
+"""
+Helper dùng chung cho các script benchmark: cấu hình + khởi động Django
+trên một database riêng (không đụng tới db.sqlite3 của dự án).
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def setup_django(**env):
+    """
+    Khởi động Django với các biến môi trường `env` (DATABASE_ENGINE, SQLITE_PATH, ...)
+
+    Nếu không chỉ định database thì dùng một file SQLite tạm.
+    """
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+
+    if env.get('DATABASE_ENGINE', os.environ.get('DATABASE_ENGINE', 'sqlite')) == 'sqlite':
+        env.setdefault('SQLITE_PATH', os.path.join(tempfile.mkdtemp(prefix='mymusic-bench-'), 'bench.sqlite3'))
+    os.environ.update({key: str(value) for key, value in env.items()})
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mymusic.settings')
+
+    import django
+    django.setup()
+
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0, interactive=False)
+
+
+def percentile(values, pct):
+    """Percentile kiểu nearest-rank, đủ chính xác cho báo cáo benchmark."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
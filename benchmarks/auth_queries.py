@@ -0,0 +1,120 @@
+"""
+Đo số query mỗi request trên các trang cần đăng nhập (home, player, playlist_detail)
+
+So sánh:
+    db      session trong DB + ModelBackend (cấu hình mặc định của Django)
+    cached  session cached_db + CachedModelBackend (cấu hình khi có SHARED_CACHE)
+
+Số query được tách theo bảng: django_session, auth_user và phần còn lại
+(query của chính view). Request đầu tiên của mỗi trang chỉ làm nóng cache,
+không được tính.
+
+Usage:
+    python benchmarks/auth_queries.py
+    python benchmarks/auth_queries.py --requests 50 --output auth-queries.json
+"""
+
+import argparse
+import json
+import statistics
+import tempfile
+
+from _django import setup_django
+
+MODES = {
+    'db': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+        'AUTHENTICATION_BACKENDS': ['django.contrib.auth.backends.ModelBackend'],
+    },
+    'cached': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.cached_db',
+        'AUTHENTICATION_BACKENDS': ['music_app.auth_backends.CachedModelBackend'],
+    },
+}
+
+
+def classify(sql):
+    if 'django_session' in sql:
+        return 'session'
+    if 'FROM "auth_user"' in sql and 'JOIN' not in sql:
+        return 'user'
+    return 'view'
+
+
+def measure(pages, user, requests):
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext
+
+    # Client mới → middleware được load lại theo settings hiện tại
+    client = Client()
+    client.force_login(user)
+    results = {}
+    for name, path in pages.items():
+        client.get(path)
+        counts = {'session': [], 'user': [], 'view': []}
+        for _ in range(requests):
+            with CaptureQueriesContext(connection) as ctx:
+                response = client.get(path)
+            assert response.status_code == 200, (path, response.status_code)
+            per_kind = {'session': 0, 'user': 0, 'view': 0}
+            for query in ctx.captured_queries:
+                per_kind[classify(query['sql'])] += 1
+            for kind, count in per_kind.items():
+                counts[kind].append(count)
+        results[name] = {kind: statistics.mean(values) for kind, values in counts.items()}
+        results[name]['total'] = sum(results[name].values())
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--songs', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=20)
+    parser.add_argument('--output', help='Ghi kết quả ra file JSON')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='mymusic-bench-')
+    setup_django(SQLITE_PATH=f'{workdir}/bench.sqlite3', MAINTENANCE_INTERVAL=0)
+
+    from django.core.cache import cache
+    from django.core.management import call_command
+    from django.test.utils import override_settings
+    from catalog import generate_catalog
+
+    override_settings(
+        MEDIA_ROOT=f'{workdir}/media', STATIC_ROOT=f'{workdir}/static', DEBUG=False, ALLOWED_HOSTS=['*']
+    ).enable()
+    call_command('collectstatic', interactive=False, verbosity=0)
+
+    catalog = generate_catalog(
+        f'{workdir}/media', songs=args.songs, users=1, playlists_per_user=2, songs_per_playlist=20,
+        comments=500, audio_files=1, audio_size=1024,
+    )
+    user = catalog['users'][0]
+    pages = {
+        'home': '/',
+        'player': f"/player/{catalog['song_ids'][0]}/",
+        'playlist_detail': f"/playlist/{catalog['playlist_ids'][user.id][0]}/",
+    }
+
+    results = {}
+    for mode, overrides in MODES.items():
+        cache.clear()
+        with override_settings(**overrides):
+            results[mode] = measure(pages, user, args.requests)
+
+    print(f"{'page':<16} {'mode':<8} {'session':>8} {'user':>6} {'view':>6} {'total':>6}")
+    for name in pages:
+        for mode in MODES:
+            row = results[mode][name]
+            print(f"{name:<16} {mode:<8} {row['session']:>8.1f} {row['user']:>6.1f} {row['view']:>6.1f} {row['total']:>6.1f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'config': vars(args), 'results': results}, f, indent=2)
+        print(f'Results written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
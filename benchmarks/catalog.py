@@ -0,0 +1,94 @@
+"""
+Sinh catalog giả lập cho benchmark: users, songs (kèm lyrics LRC dài),
+playlists, comments và các file audio giả trong MEDIA_ROOT tạm.
+
+Dùng bulk_create nên sinh vài chục nghìn bản ghi chỉ mất vài giây.
+Phải gọi sau setup_django().
+"""
+
+import os
+import random
+
+EMOTIONS = ['happy', 'sad', 'relaxed', 'contemplative', 'unknown']
+WORDS = (
+    'em anh yêu thương nhớ mưa nắng trời xanh con đường phố đêm ngày mai hôm qua '
+    'love heart night dream light fire rain sky forever tonight dance alone'
+).split()
+
+
+def fake_lyrics(rng, lines=60):
+    """Lời dạng LRC, mỗi dòng cách nhau ~4 giây."""
+    return '\n'.join(
+        f'[{(i * 4) // 60:02d}:{(i * 4) % 60:02d}.00]' + ' '.join(rng.choices(WORDS, k=rng.randint(5, 10)))
+        for i in range(lines)
+    )
+
+
+def write_audio_files(media_root, count, size):
+    """Ghi `count` file audio giả (bytes ngẫu nhiên) vào MEDIA_ROOT/songs/, trả về danh sách tên."""
+    directory = os.path.join(media_root, 'songs')
+    os.makedirs(directory, exist_ok=True)
+    names = []
+    for i in range(count):
+        name = f'songs/bench_{i}.mp3'
+        with open(os.path.join(media_root, name), 'wb') as f:
+            f.write(os.urandom(size))
+        names.append(name)
+    return names
+
+
+def generate_catalog(media_root, songs=2000, users=20, playlists_per_user=5, songs_per_playlist=50,
+                     comments=20000, audio_files=20, audio_size=512 * 1024, lyrics_lines=60, seed=42):
+    """
+    Args:
+        lyrics_lines: Số dòng LRC mỗi bài (~50 bytes / dòng)
+
+    Returns:
+        dict: {'users': [...], 'song_ids': [...], 'playlist_ids': {user_id: [...]}}
+    """
+    from django.contrib.auth.models import User
+    from music_app.lyrics import parse_lrc
+    from music_app.models import Comment, Playlist, Song
+
+    rng = random.Random(seed)
+    audio_names = write_audio_files(media_root, audio_files, audio_size)
+
+    user_objs = User.objects.bulk_create([User(username=f'bench{i}') for i in range(users)])
+    user_objs = list(User.objects.filter(username__in=[u.username for u in user_objs]))
+
+    song_objs = []
+    for i in range(songs):
+        lyrics = fake_lyrics(rng, lyrics_lines)
+        song_objs.append(Song(
+            title=f'Song {i}',
+            artist=f'Artist {i % 500}',
+            album=f'Album {i % 1000}',
+            file=audio_names[i % len(audio_names)],
+            lyrics=lyrics,
+            lyrics_timeline=parse_lrc(lyrics),
+            emotion=rng.choice(EMOTIONS),
+            emotion_confidence=rng.random(),
+        ))
+    Song.objects.bulk_create(song_objs, batch_size=1000)
+    song_ids = list(Song.objects.values_list('id', flat=True))
+
+    playlist_ids = {}
+    through = Playlist.songs.through
+    links = []
+    for user in user_objs:
+        created = Playlist.objects.bulk_create([
+            Playlist(name=f'Playlist {j}', user=user) for j in range(playlists_per_user)
+        ])
+        ids = list(Playlist.objects.filter(user=user).values_list('id', flat=True))
+        playlist_ids[user.id] = ids
+        for playlist_id in ids[:len(created)]:
+            for song_id in rng.sample(song_ids, min(songs_per_playlist, len(song_ids))):
+                links.append(through(playlist_id=playlist_id, song_id=song_id))
+    through.objects.bulk_create(links, batch_size=2000)
+
+    Comment.objects.bulk_create([
+        Comment(user=rng.choice(user_objs), song_id=rng.choice(song_ids), content=' '.join(rng.choices(WORDS, k=12)))
+        for _ in range(comments)
+    ], batch_size=2000)
+
+    return {'users': user_objs, 'song_ids': song_ids, 'playlist_ids': playlist_ids}
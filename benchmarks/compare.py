@@ -0,0 +1,59 @@
+"""
+So sánh 2 file kết quả của benchmarks/run.py (vd: trước/sau một commit)
+
+Exit code 1 nếu có scenario bị chậm hơn ngưỡng cho phép (p95), để dùng được trong CI.
+
+Usage:
+    python benchmarks/compare.py bench-before.json bench-after.json
+    python benchmarks/compare.py bench-before.json bench-after.json --max-regression 15
+"""
+
+import argparse
+import json
+import sys
+
+
+def pct_change(before, after):
+    if not before:
+        return 0.0
+    return (after - before) / before * 100
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--max-regression', type=float, default=10.0, help='%% tăng p95 tối đa cho phép')
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    print(f"baseline  {baseline['meta'].get('commit')}  vs  candidate  {candidate['meta'].get('commit')}")
+    print(f"{'scenario':16} {'p95 ms':>20} {'req/s':>20} {'queries':>16}")
+
+    regressions = []
+    for name, before in baseline['scenarios'].items():
+        after = candidate['scenarios'].get(name)
+        if after is None:
+            continue
+        p95_change = pct_change(before['latency_ms']['p95'], after['latency_ms']['p95'])
+        rps_change = pct_change(before['rps'], after['rps'])
+        print(f"{name:16} "
+              f"{before['latency_ms']['p95']:>8} → {after['latency_ms']['p95']:<8} ({p95_change:+.0f}%) "
+              f"{before['rps']:>7} → {after['rps']:<7} ({rps_change:+.0f}%) "
+              f"{before['queries']['mean']:>5} → {after['queries']['mean']:<5}")
+        if p95_change > args.max_regression:
+            regressions.append(name)
+
+    print(f"peak RSS: {baseline['peak_rss_mb']} MB → {candidate['peak_rss_mb']} MB")
+
+    if regressions:
+        print(f"p95 regression > {args.max_regression}% in: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+"""
+Benchmark ghi đồng thời vào database (comment, cập nhật song, playlist)
+
+So sánh throughput giữa các chế độ database trong mymusic/settings.py.
+Mỗi chế độ chạy trong một process riêng vì settings chỉ được nạp 1 lần.
+
+Usage:
+    python benchmarks/db_writes.py
+    python benchmarks/db_writes.py --modes sqlite-untuned,sqlite --threads 16 --writes 200
+    DATABASE_ENGINE=postgres POSTGRES_DB=... python benchmarks/db_writes.py --modes postgres
+
+Chế độ:
+    sqlite-untuned  SQLite mặc định (rollback journal, không PRAGMA)
+    sqlite          SQLite với WAL + SQLITE_PRAGMAS
+    postgres        Postgres theo biến môi trường POSTGRES_* (dữ liệu benchmark bị xóa sau khi chạy)
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import threading
+import time
+
+from _django import percentile, setup_django
+
+MODES = {
+    'sqlite-untuned': {'DATABASE_ENGINE': 'sqlite', 'SQLITE_TUNING': '0'},
+    'sqlite': {'DATABASE_ENGINE': 'sqlite', 'SQLITE_TUNING': '1'},
+    'postgres': {'DATABASE_ENGINE': 'postgres'},
+}
+
+
+def run_worker(mode, threads, writes, readers):
+    setup_django(**MODES[mode])
+
+    from django.contrib.auth.models import User
+    from django.db import OperationalError, connection
+    from music_app.models import Comment, Playlist, Song
+
+    user = User.objects.create_user(username=f'bench-{time.time_ns()}')
+    song = Song.objects.create(title='Bench', artist='Bench', file='songs/bench.mp3')
+    playlist = Playlist.objects.create(name='Bench', user=user)
+    extra_songs = [
+        Song.objects.create(title=f'Bench {i}', artist='Bench', file=f'songs/bench_{i}.mp3')
+        for i in range(threads)
+    ]
+
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(threads + readers + 1)
+    stop_reading = threading.Event()
+
+    def writer(index):
+        own_song = extra_songs[index]
+        local_latencies, local_errors = [], 0
+        start_barrier.wait()
+        for i in range(writes):
+            started = time.perf_counter()
+            try:
+                kind = i % 3
+                if kind == 0:
+                    Comment.objects.create(user=user, song=song, content=f'bench {index}-{i}')
+                elif kind == 1:
+                    Song.objects.filter(pk=own_song.pk).update(emotion_confidence=i / writes)
+                elif i % 2:
+                    playlist.songs.add(own_song)
+                else:
+                    playlist.songs.remove(own_song)
+            except OperationalError:
+                local_errors += 1
+            local_latencies.append(time.perf_counter() - started)
+        connection.close()
+        with lock:
+            latencies.extend(local_latencies)
+            errors.append(local_errors)
+
+    def reader():
+        start_barrier.wait()
+        while not stop_reading.is_set():
+            try:
+                list(Song.objects.all()[:50])
+                list(song.comments.order_by('-created_at')[:20])
+            except OperationalError:
+                pass
+        connection.close()
+
+    writer_threads = [threading.Thread(target=writer, args=(i,)) for i in range(threads)]
+    reader_threads = [threading.Thread(target=reader) for _ in range(readers)]
+    for thread in writer_threads + reader_threads:
+        thread.start()
+
+    start_barrier.wait()
+    started = time.perf_counter()
+    for thread in writer_threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    stop_reading.set()
+    for thread in reader_threads:
+        thread.join()
+
+    total = threads * writes
+    failed = sum(errors)
+    result = {
+        'mode': mode,
+        'vendor': connection.vendor,
+        'threads': threads,
+        'readers': readers,
+        'writes': total,
+        'failed': failed,
+        'seconds': round(elapsed, 3),
+        'writes_per_sec': round((total - failed) / elapsed, 1),
+        'latency_ms': {
+            'p50': round(percentile(latencies, 50) * 1000, 2),
+            'p95': round(percentile(latencies, 95) * 1000, 2),
+            'p99': round(percentile(latencies, 99) * 1000, 2),
+        },
+    }
+
+    # Dọn dữ liệu benchmark (quan trọng với Postgres dùng chung)
+    Song.objects.filter(pk__in=[song.pk] + [s.pk for s in extra_songs]).delete()
+    user.delete()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', default='sqlite-untuned,sqlite')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--writes', type=int, default=150, help='Số lần ghi mỗi thread')
+    parser.add_argument('--readers', type=int, default=2, help='Số thread đọc chạy song song')
+    parser.add_argument('--output', help='Ghi kết quả JSON ra file')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, args.threads, args.writes, args.readers)))
+        return
+
+    results = []
+    for mode in args.modes.split(','):
+        if mode not in MODES:
+            parser.error(f'Unknown mode: {mode}')
+        proc = subprocess.run(
+            [sys.executable, __file__, '--worker', mode, '--threads', str(args.threads),
+             '--writes', str(args.writes), '--readers', str(args.readers)],
+            capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            print(proc.stderr, file=sys.stderr)
+            sys.exit(f'Benchmark failed for mode {mode}')
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        results.append(result)
+        print(f"{mode:15} {result['writes_per_sec']:>9} writes/s  "
+              f"p95 {result['latency_ms']['p95']:>8} ms  failed {result['failed']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
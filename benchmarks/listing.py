@@ -0,0 +1,94 @@
+"""
+Benchmark các queryset hiển thị danh sách bài hát (home, playlist_detail)
+
+So sánh queryset đầy đủ (SELECT mọi cột, gồm lyrics + lyrics_timeline) với
+Song.objects.for_listing() (chỉ các cột card hiển thị) trên catalog có lyrics
+dài: thời gian query + dựng instance và bộ nhớ cấp phát (tracemalloc).
+
+Usage:
+    python benchmarks/listing.py
+    python benchmarks/listing.py --songs 5000 --lyrics-lines 400 --output listing.json
+"""
+
+import argparse
+import json
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from _django import setup_django
+
+
+def consume(queryset):
+    """Giống template card: duyệt queryset và đọc các field được render."""
+    for song in queryset:
+        song.id, song.title, song.artist, song.album, song.image, song.emotion
+
+
+def measure(make_queryset, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        consume(make_queryset())
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    consume(make_queryset())
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'median_ms': round(statistics.median(timings) * 1000, 2),
+        'min_ms': round(min(timings) * 1000, 2),
+        'peak_alloc_mb': round(peak / 1024 / 1024, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--songs', type=int, default=2000)
+    parser.add_argument('--lyrics-lines', type=int, default=200, help='Số dòng LRC mỗi bài (~50 bytes / dòng)')
+    parser.add_argument('--songs-per-playlist', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--output', help='Ghi kết quả ra file JSON')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='mymusic-bench-')
+    setup_django(SQLITE_PATH=f'{workdir}/bench.sqlite3')
+
+    from django.db.models import Avg
+    from django.db.models.functions import Length
+    from catalog import generate_catalog
+    from music_app.models import Playlist, Song
+
+    catalog = generate_catalog(
+        f'{workdir}/media', songs=args.songs, users=1, playlists_per_user=1,
+        songs_per_playlist=min(args.songs_per_playlist, args.songs), comments=0,
+        audio_files=1, audio_size=1024, lyrics_lines=args.lyrics_lines,
+    )
+    playlist = Playlist.objects.get(id=catalog['playlist_ids'][catalog['users'][0].id][0])
+    avg_lyrics = Song.objects.aggregate(avg=Avg(Length('lyrics')))['avg']
+    print(f'{args.songs} songs, lyrics ~{avg_lyrics / 1024:.1f} KB/song')
+
+    cases = {
+        'home': (Song.objects.all, Song.objects.for_listing),
+        'playlist_detail': (playlist.songs.all, playlist.songs.for_listing),
+    }
+    results = {}
+    for name, (full, listing) in cases.items():
+        results[name] = {'full': measure(full, args.repeat), 'for_listing': measure(listing, args.repeat)}
+        before, after = results[name]['full'], results[name]['for_listing']
+        print(
+            f"{name:<16} full {before['median_ms']:>8.2f} ms {before['peak_alloc_mb']:>7.2f} MB   "
+            f"for_listing {after['median_ms']:>8.2f} ms {after['peak_alloc_mb']:>7.2f} MB"
+        )
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'config': vars(args), 'results': results}, f, indent=2)
+        print(f'Results written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+"""
+Benchmark các endpoint chính (home, player, playlist, stream, AI analyze)
+
+Chạy hoàn toàn offline: tạo database SQLite + MEDIA_ROOT tạm, sinh catalog
+giả lập (benchmarks/catalog.py) rồi gọi các view đồng thời qua Django test
+Client (không cần chạy server). Model AI được thay bằng bản giả có độ trễ cố
+định, trừ khi dùng --real-model.
+
+Kết quả (JSON) gồm p50/p95/p99 latency, requests/s, số query mỗi request và
+peak RSS cho từng scenario; so sánh 2 lần chạy bằng benchmarks/compare.py.
+
+Usage:
+    python benchmarks/run.py --output bench-before.json
+    python benchmarks/run.py --songs 20000 --concurrency 16 --requests 500 --output bench-after.json
+    python benchmarks/compare.py bench-before.json bench-after.json
+"""
+
+import argparse
+import json
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from _django import ROOT, percentile, setup_django
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def peak_rss_mb():
+    # Linux: ru_maxrss tính bằng KB
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def install_fake_classifier(inference_ms):
+    """
+    Thay pipeline Hugging Face bằng model giả (không cần transformers/torch, không cần mạng).
+    ml_models không còn import transformers ở module level nên chỉ cần patch hàm load model;
+    phần chuẩn bị lyrics, map nhãn và đo perf vẫn chạy code thật.
+    """
+    from music_app import ml_models
+
+    labels = ['joy', 'sadness', 'neutral', 'curiosity']
+
+    def fake_pipeline(inputs, **kwargs):
+        time.sleep(inference_ms / 1000)
+        texts = inputs if isinstance(inputs, list) else [inputs]
+        return [[{'label': random.choice(labels), 'score': 0.9}] for _ in texts]
+
+    ml_models._load_pipeline = lambda: fake_pipeline
+
+
+def build_scenarios(catalog, rng):
+    """Mỗi scenario: (tên, hàm sinh request ngẫu nhiên cho 1 user → (method, path, headers))."""
+    song_ids = catalog['song_ids']
+    playlist_ids = catalog['playlist_ids']
+
+    def stream_range(user):
+        start = rng.randint(0, 400 * 1024)
+        return 'get', f'/song/{rng.choice(song_ids)}/stream/', {'HTTP_RANGE': f'bytes={start}-{start + 64 * 1024 - 1}'}
+
+    return [
+        ('home', lambda user: ('get', '/', {})),
+        ('home_filtered', lambda user: ('get', f"/?emotion={rng.choice(['happy', 'sad', 'relaxed'])}", {})),
+        ('player', lambda user: ('get', f'/player/{rng.choice(song_ids)}/', {})),
+        ('playlist_detail', lambda user: ('get', f'/playlist/{rng.choice(playlist_ids[user.id])}/', {})),
+        ('stream_full', lambda user: ('get', f'/song/{rng.choice(song_ids)}/stream/', {})),
+        ('stream_range', stream_range),
+        ('analyze_emotion', lambda user: ('get', f'/song/{rng.choice(song_ids)}/analyze-emotion/', {})),
+    ]
+
+
+def run_scenario(name, make_request, users, requests, concurrency):
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext
+
+    local = threading.local()
+    latencies, query_counts, errors = [], [], []
+    lock = threading.Lock()
+
+    def client_for_thread():
+        if not hasattr(local, 'client'):
+            local.user = users[threading.get_ident() % len(users)]
+            local.client = Client()
+            local.client.force_login(local.user)
+        return local.client, local.user
+
+    def one_request(_):
+        client, user = client_for_thread()
+        method, path, headers = make_request(user)
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = getattr(client, method)(path, **headers)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            elapsed = time.perf_counter() - started
+        response.close()
+        with lock:
+            latencies.append(elapsed)
+            query_counts.append(len(queries))
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one_request, range(requests)))
+    wall = time.perf_counter() - started
+
+    return {
+        'requests': requests,
+        'errors': len(errors),
+        'rps': round(requests / wall, 1),
+        'latency_ms': {
+            'p50': round(percentile(latencies, 50) * 1000, 2),
+            'p95': round(percentile(latencies, 95) * 1000, 2),
+            'p99': round(percentile(latencies, 99) * 1000, 2),
+            'mean': round(sum(latencies) / len(latencies) * 1000, 2),
+        },
+        'queries': {
+            'mean': round(sum(query_counts) / len(query_counts), 1),
+            'max': max(query_counts),
+        },
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--songs', type=int, default=2000)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--playlists-per-user', type=int, default=5)
+    parser.add_argument('--comments', type=int, default=20000)
+    parser.add_argument('--requests', type=int, default=100, help='Số request mỗi scenario')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--scenarios', help='Chỉ chạy các scenario này (phân tách bằng dấu phẩy)')
+    parser.add_argument('--inference-ms', type=float, default=50, help='Độ trễ của model AI giả')
+    parser.add_argument('--real-model', action='store_true', help='Dùng model thật (cần transformers + tải model)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Ghi kết quả JSON ra file')
+    parser.add_argument('--keep', action='store_true', help='Giữ lại database/media tạm sau khi chạy')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='mymusic-bench-')
+    media_root = f'{workdir}/media'
+    setup_django(SQLITE_PATH=f'{workdir}/bench.sqlite3')
+
+    import django
+    from django.core.management import call_command
+    from django.db import connection
+    from django.test.utils import override_settings
+
+    # DEBUG=False như production; host của test Client là 'testserver'
+    override_settings(
+        MEDIA_ROOT=media_root, STATIC_ROOT=f'{workdir}/static', DEBUG=False, ALLOWED_HOSTS=['*']
+    ).enable()
+    # DEBUG=False: {% static %} cần manifest của collectstatic
+    call_command('collectstatic', interactive=False, verbosity=0)
+    if not args.real_model:
+        install_fake_classifier(args.inference_ms)
+
+    from catalog import generate_catalog
+
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+    catalog = generate_catalog(
+        media_root, songs=args.songs, users=args.users,
+        playlists_per_user=args.playlists_per_user, comments=args.comments, seed=args.seed,
+    )
+    print(f'Generated catalog ({args.songs} songs) in {time.perf_counter() - started:.1f}s')
+
+    selected = set(args.scenarios.split(',')) if args.scenarios else None
+    results = {}
+    for name, make_request in build_scenarios(catalog, rng):
+        if selected and name not in selected:
+            continue
+        result = run_scenario(name, make_request, catalog['users'], args.requests, args.concurrency)
+        results[name] = result
+        print(f"{name:16} {result['rps']:>8} req/s  p50 {result['latency_ms']['p50']:>8} ms  "
+              f"p95 {result['latency_ms']['p95']:>8} ms  p99 {result['latency_ms']['p99']:>8} ms  "
+              f"queries {result['queries']['mean']:>6}  errors {result['errors']}")
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'songs': args.songs,
+            'users': args.users,
+            'comments': args.comments,
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'fake_model': not args.real_model,
+        },
+        'scenarios': results,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'Results written to {args.output}')
+
+    if args.keep:
+        print(f'Benchmark data kept in {workdir}')
+    else:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,45 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from . import tasks
 from .models import Song, Playlist, Comment
+from .pagination import EstimatedCountPaginator
+
+class ArtistFilter(admin.SimpleListFilter):
+    """
+    Lọc theo nghệ sĩ bằng ô nhập tên (khớp chính xác, dùng index của cột artist)
+
+    Filter mặc định của field liệt kê mọi nghệ sĩ bằng SELECT DISTINCT trên cả bảng
+    ở mỗi lần mở changelist.
+    """
+    title = 'nghệ sĩ'
+    parameter_name = 'artist'
+    template = 'admin/music_app/song/artist_filter.html'
+
+    def lookups(self, request, model_admin):
+        return ()
+
+    def has_output(self):
+        return True
+
+    def choices(self, changelist):
+        return []
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(artist=self.value().strip())
+        return queryset
 
 @admin.register(Song)
 class SongAdmin(admin.ModelAdmin):
-    list_display = ('title', 'artist', 'album', 'image_preview', 'uploaded_at')
-    search_fields = ('title', 'artist', 'album', 'lyrics')
-    list_filter = ('uploaded_at', 'artist')
+    list_display = ('title', 'artist', 'album', 'emotion', 'emotion_status', 'image_preview', 'uploaded_at')
+    # Không tìm trong lyrics: LIKE '%...%' trên TextField dài = quét cả bảng
+    search_fields = ('title', 'artist', 'album')
+    list_filter = ('uploaded_at', 'emotion', 'emotion_status', ArtistFilter)
     ordering = ('-uploaded_at',)
     readonly_fields = ('image_preview',)
+    actions = ('classify_emotion', 'reingest_metadata')
+    # Không đếm cả bảng ở mỗi trang (xem pagination.py)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     fieldsets = (
         (None, {
@@ -19,6 +51,11 @@ class SongAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_queryset(self, request):
+        # Lyrics / timeline (không giới hạn độ dài) không hiển thị ở changelist; form sửa
+        # bài load lyrics khi cần (1 query)
+        return super().get_queryset(request).defer('lyrics', 'lyrics_timeline')
+
     def image_preview(self, obj):
         if obj.image:
             return f'<img src="{obj.image.url}" style="width: 50px; height: 50px; object-fit: cover;" />'
@@ -26,6 +63,33 @@ class SongAdmin(admin.ModelAdmin):
     image_preview.short_description = 'Cover'
     image_preview.allow_tags = True
 
+    @admin.action(description='Phân loại cảm xúc (AI) cho các bài đã chọn')
+    def classify_emotion(self, request, queryset):
+        song_ids = list(queryset.values_list('pk', flat=True))
+        if tasks.request_classification(song_ids):
+            self.message_user(
+                request,
+                f'Đã đưa {len(song_ids)} bài vào hàng đợi phân loại cảm xúc (chạy nền theo batch).',
+                messages.SUCCESS
+            )
+        else:
+            self.message_user(
+                request,
+                f'Đã đánh dấu {len(song_ids)} bài chờ phân loại. Chưa cấu hình inference server '
+                f'(EMOTION_INFERENCE_SERVER) nên cần chạy `python manage.py classify_songs`.',
+                messages.WARNING
+            )
+
+    @admin.action(description='Đọc lại metadata từ file audio')
+    def reingest_metadata(self, request, queryset):
+        song_ids = list(queryset.values_list('pk', flat=True))
+        tasks.enqueue(tasks.ingest_song_metadata, song_ids)
+        self.message_user(
+            request,
+            f'Đã đưa {len(song_ids)} bài vào hàng đợi đọc metadata (chạy nền theo batch).',
+            messages.SUCCESS
+        )
+
 @admin.register(Playlist)
 class PlaylistAdmin(admin.ModelAdmin):
     list_display = ('name', 'user', 'created_at')
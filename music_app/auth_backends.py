@@ -0,0 +1,40 @@
+"""
+Authentication backend cache User theo id
+
+Mỗi request @login_required gọi backend.get_user(user_id) → 1 query SELECT
+auth_user. CachedModelBackend giữ User trong Django cache trong
+AUTH_USER_CACHE_TIMEOUT giây; bản cache bị xóa khi User được lưu / xóa
+(music_app/signals.py), nên đổi mật khẩu, khóa tài khoản... có hiệu lực ngay.
+Điều đó chỉ đúng khi cache dùng chung giữa các worker, vì vậy settings chỉ bật
+backend này khi có SHARED_CACHE.
+"""
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+
+
+def user_cache_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+class CachedModelBackend(ModelBackend):
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        user = super().authenticate(request, username=username, password=password, **kwargs)
+        if user is None and password is not None:
+            # ModelBackend phía sau (chỉ để giữ session cũ) sẽ kiểm tra lại đúng mật
+            # khẩu này, tức hash thêm 1 lần cho mỗi lần đăng nhập sai → dừng ở đây
+            raise PermissionDenied
+        return user
+
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+            return user
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,108 @@
+"""
+Facet counts cho thanh lọc (vd: số bài theo emotion ở trang home)
+
+Đếm bằng 1 câu GROUP BY rồi lưu vào cache, mỗi giá trị 1 key để có thể cập
+nhật tăng/giảm nguyên tử bằng cache.incr() (Redis INCR) khi bài hát được
+tạo / sửa / xóa / phân loại lại - request đọc counts không tốn query nào.
+
+Thao tác hàng loạt không qua Song.save() (import_catalog, bulk_update) thì
+gọi invalidate(); lần đọc kế tiếp sẽ đếm lại. Cache có timeout
+(FACET_CACHE_TIMEOUT) để giới hạn sai lệch nếu 1 cập nhật nào đó bị lỡ.
+
+Cập nhật chỉ tới được mọi worker khi cache dùng chung (SHARED_CACHE, vd Redis).
+Với LocMem mỗi process có bản counts riêng, nên chỉ giữ trong
+FACET_LOCAL_CACHE_TIMEOUT giây rồi đếm lại.
+
+Usage:
+    from music_app import facets
+
+    facets.emotion.counts()          # {'happy': 12, 'sad': 3, ...}
+    facets.emotion.adjust('sad', +1)
+    facets.invalidate()
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+
+class Facet:
+    """
+    Số bài hát theo từng giá trị của 1 field của Song
+
+    Cache keys:
+        facets:song:<field>            danh sách các giá trị (đánh dấu facet đã được tính)
+        facets:song:<field>:<value>    số bài có field = value
+    """
+
+    def __init__(self, field):
+        self.field = field
+        self.index_key = f'facets:song:{field}'
+
+    def _key(self, value):
+        return f'{self.index_key}:{value}'
+
+    @property
+    def timeout(self):
+        if settings.SHARED_CACHE:
+            return getattr(settings, 'FACET_CACHE_TIMEOUT', 3600)
+        return getattr(settings, 'FACET_LOCAL_CACHE_TIMEOUT', 30)
+
+    def counts(self):
+        """dict {value: count}, chỉ đọc cache (tính lại bằng 1 query nếu chưa có / bị evict)"""
+        values = cache.get(self.index_key)
+        if values is not None:
+            cached = cache.get_many([self._key(value) for value in values])
+            if len(cached) == len(values):
+                return {value: cached[self._key(value)] for value in values}
+        return self.rebuild()
+
+    def rebuild(self):
+        from .models import Song
+
+        rows = Song.objects.order_by().values_list(self.field).annotate(count=Count('pk'))
+        counts = dict(rows)
+        cache.set_many({self._key(value): count for value, count in counts.items()}, self.timeout)
+        cache.set(self.index_key, list(counts), self.timeout)
+        return counts
+
+    def adjust(self, value, delta):
+        if not delta:
+            return
+        try:
+            cache.incr(self._key(value), delta)
+        except ValueError:
+            # Giá trị mới chưa có trong cache (hoặc đã bị evict) → đếm lại ở lần đọc sau
+            self.invalidate()
+
+    def invalidate(self):
+        cache.delete(self.index_key)
+
+
+emotion = Facet('emotion')
+
+FACETS = [emotion]
+
+
+def apply_changes(changes):
+    """
+    Cập nhật nhiều facet cùng lúc
+
+    Args:
+        changes: iterable các (old, new) - dict {field: value}, old là None với bài mới,
+            new là None với bài bị xóa
+    """
+    for facet in FACETS:
+        deltas = {}
+        for old, new in changes:
+            if old is not None and facet.field in old:
+                deltas[old[facet.field]] = deltas.get(old[facet.field], 0) - 1
+            if new is not None and facet.field in new:
+                deltas[new[facet.field]] = deltas.get(new[facet.field], 0) + 1
+        for value, delta in deltas.items():
+            facet.adjust(value, delta)
+
+
+def invalidate():
+    for facet in FACETS:
+        facet.invalidate()
@@ -0,0 +1,220 @@
+"""
+Phát hiện bài hát trùng audio bằng acoustic fingerprint (Chromaprint)
+
+Lúc upload, `fpcalc -raw` (Chromaprint, cài riêng: apt install libchromaprint-tools)
+trả về fingerprint dạng mảng uint32, ~8 giá trị / giây audio. Mỗi giá trị được
+cắt còn các bit cao làm "term" và lưu vào inverted index (FingerprintTerm:
+term → song). Tìm bài trùng:
+
+1. 1 query GROUP BY trên index (term IN (...)) → vài bài có nhiều term chung nhất
+2. So khớp chính xác từng ứng viên: tỉ lệ bit giống nhau giữa 2 fingerprint,
+   thử lệch nhau vài frame (bản cắt đầu / encode lại)
+
+Bản trùng được gắn duplicate_of = bài gốc và dùng lại emotion + metadata của
+bài gốc thay vì phân loại lại. File giống hệt nhau (cùng tên trong storage
+content-addressed) được nhận ra ngay lúc upload (exact_original, vài ms) kể cả
+khi không cài fpcalc; phần chạy fpcalc + so khớp (tới FINGERPRINT_TIMEOUT giây)
+chạy nền qua tasks.fingerprint_songs.
+"""
+
+import json
+import logging
+import shutil
+import subprocess
+from array import array
+from collections import Counter
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import Count
+
+from .storage import digest_from_name
+
+logger = logging.getLogger(__name__)
+
+# term = 20 bit cao của mỗi giá trị: lỗi bit do encode lại ít khi rơi vào cả 20 bit
+TERM_SHIFT = 12
+
+# Số ứng viên (theo số term chung) được so khớp chính xác
+CANDIDATES = 5
+
+# Độ lệch tối đa (số frame, ~0.12 giây / frame) khi so 2 fingerprint
+MAX_OFFSET = 10
+MIN_OVERLAP = 20
+
+
+def fpcalc_available():
+    return shutil.which(settings.FPCALC_PATH) is not None
+
+
+def compute(path):
+    """
+    Chạy fpcalc trên file audio
+
+    Returns:
+        tuple: (duration giây, list[int] fingerprint raw), None nếu không có fpcalc
+        hoặc không decode được file
+    """
+    binary = shutil.which(settings.FPCALC_PATH)
+    if binary is None:
+        return None
+    try:
+        proc = subprocess.run(
+            [binary, '-raw', '-json', '-length', str(settings.FINGERPRINT_LENGTH), path],
+            capture_output=True,
+            timeout=settings.FINGERPRINT_TIMEOUT,
+            check=True,
+        )
+        result = json.loads(proc.stdout)
+    except (OSError, subprocess.SubprocessError, ValueError) as e:
+        logger.warning(f"fpcalc failed for {path}: {e}")
+        return None
+    # Tùy phiên bản, fpcalc in giá trị raw dạng signed int32
+    return float(result['duration']), [value & 0xFFFFFFFF for value in result['fingerprint']]
+
+
+def terms(values):
+    return sorted({value >> TERM_SHIFT for value in values})
+
+
+def pack(values):
+    return array('I', values).tobytes()
+
+
+def unpack(data):
+    values = array('I')
+    values.frombytes(bytes(data))
+    return values
+
+
+def similarity(a, b):
+    """Tỉ lệ bit giống nhau (0.0 - 1.0) của 2 fingerprint, lấy độ lệch khớp nhất"""
+    best = 0.0
+    for offset in range(-MAX_OFFSET, MAX_OFFSET + 1):
+        x = a[offset:] if offset > 0 else a
+        y = b[-offset:] if offset < 0 else b
+        overlap = min(len(x), len(y))
+        if overlap < MIN_OVERLAP:
+            continue
+        errors = sum((x[i] ^ y[i]).bit_count() for i in range(overlap))
+        best = max(best, 1 - errors / (32 * overlap))
+    return best
+
+
+def find_match(values, before=None):
+    """
+    Tìm bài hát có audio gần giống nhất với fingerprint `values`
+
+    Args:
+        before: Chỉ xét các bài có id nhỏ hơn (bài gốc luôn là bài cũ nhất)
+
+    Returns:
+        tuple: (song_id, similarity), None nếu không có bài nào vượt FINGERPRINT_MATCH_THRESHOLD
+    """
+    from .models import AudioFingerprint, FingerprintTerm
+
+    def term_hits(chunk):
+        candidates = FingerprintTerm.objects.filter(term__in=chunk)
+        if before is not None:
+            candidates = candidates.filter(song_id__lt=before)
+        return candidates.values_list('song_id').annotate(hits=Count('pk')).order_by('-hits')
+
+    all_terms = terms(values)
+    # SQLite giới hạn số tham số mỗi câu (999 với bản cũ); Postgres không giới hạn (None)
+    max_params = connections[router.db_for_read(FingerprintTerm)].features.max_query_params
+    chunk_size = max_params - 10 if max_params else len(all_terms)
+    if len(all_terms) <= chunk_size:
+        candidate_ids = [song_id for song_id, _ in term_hits(all_terms)[:CANDIDATES]]
+    else:
+        # FINGERPRINT_LENGTH lớn → nhiều term hơn giới hạn: đếm theo từng phần rồi cộng lại
+        hits = Counter()
+        for start in range(0, len(all_terms), chunk_size):
+            hits.update(dict(term_hits(all_terms[start:start + chunk_size])))
+        candidate_ids = [song_id for song_id, _ in hits.most_common(CANDIDATES)]
+    if not candidate_ids:
+        return None
+
+    best = None
+    for song_id, data in AudioFingerprint.objects.filter(song_id__in=candidate_ids).values_list('song_id', 'data'):
+        score = similarity(values, unpack(data))
+        if score >= settings.FINGERPRINT_MATCH_THRESHOLD and (best is None or score > best[1]):
+            best = (song_id, score)
+    return best
+
+
+def index(song, duration, values):
+    """Lưu fingerprint + các term của song vào index (ghi đè bản cũ nếu có)"""
+    from .models import AudioFingerprint, FingerprintTerm
+
+    with transaction.atomic():
+        AudioFingerprint.objects.update_or_create(song=song, defaults={'duration': duration, 'data': pack(values)})
+        FingerprintTerm.objects.filter(song=song).delete()
+        FingerprintTerm.objects.bulk_create(
+            [FingerprintTerm(term=term, song=song) for term in terms(values)],
+            batch_size=500,
+        )
+
+
+def link_duplicate(song, original):
+    """
+    Đánh dấu song là bản trùng của original và dùng lại emotion / metadata mà song chưa có
+
+    Không copy ảnh bìa: file ảnh được đếm tham chiếu trong storage (xem storage.py).
+    """
+    original = original.duplicate_of or original
+    song.duplicate_of = original
+    fields = ['duplicate_of']
+
+    if song.emotion in ('', 'unknown') and original.emotion not in ('', 'unknown'):
+        song.emotion = original.emotion
+        song.emotion_confidence = original.emotion_confidence
+        fields += ['emotion', 'emotion_confidence']
+    for field in ('album', 'duration', 'lyrics'):
+        if not getattr(song, field) and getattr(original, field):
+            setattr(song, field, getattr(original, field))
+            fields.append(field)
+
+    song.save(update_fields=fields)
+
+
+def exact_original(song):
+    """
+    Bài cũ nhất có file giống hệt song (storage content-addressed: cùng nội dung ⇔
+    cùng tên file), None nếu không có
+
+    Cột file không có index: chỉ tìm trong Song khi MediaBlob (unique theo tên)
+    cho biết file đang được tham chiếu nhiều hơn 1 lần.
+    """
+    from .models import MediaBlob, Song
+
+    if not digest_from_name(song.file.name):
+        return None
+    if not MediaBlob.objects.filter(name=song.file.name, refcount__gt=1).exists():
+        return None
+    return Song.objects.filter(file=song.file.name, pk__lt=song.pk).order_by('pk').first()
+
+
+def ingest(song):
+    """
+    Fingerprint song, tìm bài trùng, đưa vào index (chạy nền: tasks.fingerprint_songs)
+
+    Returns:
+        Song: bài gốc nếu song là bản trùng, None nếu không
+    """
+    from .models import Song
+
+    original = exact_original(song)
+
+    result = compute(song.file.path)
+    if result is not None:
+        duration, values = result
+        if original is None:
+            match = find_match(values, before=song.pk)
+            if match is not None:
+                original = Song.objects.filter(pk=match[0]).first()
+                logger.info(f"Song {song.pk} matches song {match[0]} (similarity {match[1]:.2f})")
+        index(song, duration, values)
+
+    if original is not None:
+        link_duplicate(song, original)
+    return original
@@ -9,6 +9,12 @@ class SongUploadForm(forms.ModelForm):
             'lyrics': forms.Textarea(attrs={'rows': 4}),
         }
 
+class ChunkedSongForm(forms.ModelForm):
+    """Thông tin bài hát gửi kèm bước hoàn tất upload chia chunk (file audio đã có sẵn ở server)"""
+    class Meta:
+        model = Song
+        fields = ['title', 'artist', 'album', 'image', 'lyrics']
+
 class CommentForm(forms.ModelForm):
     class Meta:
         model = Comment
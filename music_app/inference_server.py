@@ -0,0 +1,210 @@
+"""
+Inference server dùng chung cho model phân loại cảm xúc
+
+Thay vì mỗi worker Django tự load 1 bản DistilRoBERTa (vài trăm MB / process),
+một process riêng giữ duy nhất 1 model và phục vụ các worker qua Unix socket
+hoặc HTTP localhost:
+
+    python manage.py run_inference_server --socket /tmp/mymusic-inference.sock
+    EMOTION_INFERENCE_SERVER=unix:/tmp/mymusic-inference.sock python manage.py runserver
+
+Các request đồng thời được gom thành micro-batch (tối đa `max_batch_size`
+lyrics, chờ tối đa `max_wait_ms`) để chạy chung 1 forward pass. Khi hàng đợi
+vượt `max_pending`, server trả 503 ngay (backpressure) thay vì để request
+chồng chất và timeout.
+
+API:
+    POST /predict   {"texts": ["lyrics 1", ...]}  → {"results": [{...} | null, ...]}
+    GET  /health                                  → {"pending": .., "batches": .., ...}
+"""
+
+import json
+import logging
+import os
+import socketserver
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+
+class Overloaded(Exception):
+    pass
+
+
+class _Item:
+    __slots__ = ('text', 'result', 'done', 'deadline', 'cancelled')
+
+    def __init__(self, text, deadline):
+        self.text = text
+        self.result = None
+        self.done = threading.Event()
+        self.deadline = deadline
+        self.cancelled = False
+
+    @property
+    def expired(self):
+        return self.cancelled or time.monotonic() >= self.deadline
+
+
+class MicroBatcher:
+    """
+    Gom các lyrics được submit từ nhiều thread thành batch cho predict_batch
+
+    Attributes:
+        max_batch_size: Số lyrics tối đa mỗi batch
+        max_wait: Thời gian (giây) chờ thêm request sau request đầu tiên của batch
+        max_pending: Số lyrics tối đa trong hàng đợi trước khi từ chối (backpressure)
+    """
+
+    def __init__(self, predict_batch, max_batch_size=16, max_wait=0.01, max_pending=256):
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_pending = max_pending
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self.batches = 0
+        self.items = 0
+
+    def submit(self, texts, timeout=30):
+        deadline = time.monotonic() + timeout
+        items = [_Item(text, deadline) for text in texts]
+        with self._cond:
+            self._drop_expired()
+            if len(self._pending) + len(items) > self.max_pending:
+                raise Overloaded
+            self._pending.extend(items)
+            self._cond.notify()
+
+        for item in items:
+            if not item.done.wait(max(0, deadline - time.monotonic())):
+                # Client đã bỏ cuộc → các item còn trong hàng đợi không được đưa vào batch nữa
+                for pending in items:
+                    pending.cancelled = True
+                raise TimeoutError('Inference timed out')
+        return [item.result for item in items]
+
+    def _drop_expired(self):
+        """Bỏ các item mà client đã timeout khỏi hàng đợi (gọi khi đang giữ self._cond)"""
+        if any(item.expired for item in self._pending):
+            self._pending = deque(item for item in self._pending if not item.expired)
+
+    def _next_batch(self):
+        with self._cond:
+            while True:
+                while not self._pending:
+                    self._cond.wait()
+                # Có request đầu tiên → chờ thêm tối đa max_wait để gom batch
+                deadline = time.monotonic() + self.max_wait
+                while len(self._pending) < self.max_batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                self._drop_expired()
+                if self._pending:
+                    size = min(self.max_batch_size, len(self._pending))
+                    return [self._pending.popleft() for _ in range(size)]
+
+    def run_forever(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                results = self.predict_batch([item.text for item in batch])
+            except Exception as e:
+                logger.exception("Batch prediction failed")
+                results = [{'error': str(e)}] * len(batch)
+            self.batches += 1
+            self.items += len(batch)
+            for item, result in zip(batch, results):
+                item.result = result
+                item.done.set()
+
+    def stats(self):
+        return {
+            'pending': len(self._pending),
+            'batches': self.batches,
+            'items': self.items,
+            'avg_batch_size': round(self.items / self.batches, 2) if self.batches else 0,
+        }
+
+
+class InferenceRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def address_string(self):
+        # client_address rỗng với Unix socket
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != '/health':
+            return self._send_json(404, {'error': 'Not found'})
+        self._send_json(200, self.server.batcher.stats())
+
+    def do_POST(self):
+        if self.path != '/predict':
+            return self._send_json(404, {'error': 'Not found'})
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            texts = json.loads(self.rfile.read(length))['texts']
+        except (ValueError, KeyError, TypeError):
+            return self._send_json(400, {'error': 'Expected JSON body {"texts": [...]}'})
+        # Kiểm tra trước khi vào hàng đợi: 1 payload sai kiểu không được làm hỏng cả batch chung
+        if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+            return self._send_json(400, {'error': '"texts" must be a list of strings'})
+
+        try:
+            results = self.server.batcher.submit(texts)
+        except Overloaded:
+            return self._send_json(503, {'error': 'Inference server overloaded'}, {'Retry-After': '1'})
+        except TimeoutError as e:
+            return self._send_json(504, {'error': str(e)})
+        self._send_json(200, {'results': results})
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    # Backlog mặc định (5) quá nhỏ khi nhiều worker gửi cùng lúc → client nhận EAGAIN
+    request_queue_size = 128
+
+
+class ThreadingTCPHTTPServer(ThreadingHTTPServer):
+    request_queue_size = 128
+
+
+def serve(batcher, host='127.0.0.1', port=8765, socket_path=None):
+    """Chạy batcher thread + HTTP server (blocking)."""
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = ThreadingUnixHTTPServer(socket_path, InferenceRequestHandler)
+        address = f'unix:{socket_path}'
+    else:
+        server = ThreadingTCPHTTPServer((host, port), InferenceRequestHandler)
+        address = f'http://{host}:{port}'
+    server.batcher = batcher
+
+    threading.Thread(target=batcher.run_forever, name='inference-batcher', daemon=True).start()
+    logger.info(f"Inference server listening on {address}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
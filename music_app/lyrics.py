@@ -0,0 +1,57 @@
+"""
+Parse lời bài hát dạng LRC (synced lyrics) thành timeline
+
+    [00:12.50]Dòng 1
+    [00:15.00][01:20.00]Điệp khúc (1 dòng, nhiều mốc thời gian)
+
+→ [[12.5, 10, 16], [15.0, 37, 46], [80.0, 37, 46]]
+
+Mỗi mục là [giây, start, end]: vị trí của dòng lời trong chính chuỗi lyrics
+(lyrics[37:46] == 'Điệp khúc'), nên timeline không lưu lại phần text lần
+thứ 2. Timeline được tính 1 lần khi lưu Song (Song.lyrics_timeline), player chỉ
+cần tìm dòng đang hát bằng binary search trên mảng thời gian.
+"""
+
+import re
+
+# [mm:ss], [mm:ss.xx], [mm:ss.xxx] hoặc [mm:ss:xx]
+_TIMESTAMP = re.compile(r'\[(\d{1,3}):(\d{2})(?:[.:](\d{1,3}))?\]')
+
+
+def parse_lrc(text):
+    """
+    Returns:
+        list: [[time_seconds, start, end], ...] đã sắp xếp theo thời gian;
+        rỗng nếu lyrics không có timestamp (lời thường).
+    """
+    timeline = []
+    line_start = 0
+    for line in (text or '').splitlines(keepends=True):
+        times = []
+        pos = 0
+        # Các timestamp liên tiếp ở đầu dòng
+        while True:
+            match = _TIMESTAMP.match(line, pos)
+            if not match:
+                break
+            minutes, seconds, fraction = match.groups()
+            time = int(minutes) * 60 + int(seconds)
+            if fraction:
+                time += int(fraction) / 10 ** len(fraction)
+            times.append(round(time, 2))
+            pos = match.end()
+
+        rest = line[pos:]
+        content = rest.strip()
+        if times and content:
+            start = line_start + pos + len(rest) - len(rest.lstrip())
+            timeline.extend([time, start, start + len(content)] for time in times)
+        line_start += len(line)
+
+    timeline.sort(key=lambda entry: entry[0])
+    return timeline
+
+
+def timeline_lines(text, timeline):
+    """[(time, dòng lời), ...] từ lyrics + timeline đã parse"""
+    return [(time, text[start:end]) for time, start, end in timeline]
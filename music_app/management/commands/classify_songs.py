@@ -0,0 +1,31 @@
+"""
+Phân loại cảm xúc các bài đang chờ (emotion_status='pending'), vd sau khi admin chọn
+"Phân loại cảm xúc" mà không có inference server, hoặc job chạy nền bị mất khi restart
+
+Chạy trong process của command: dùng inference server nếu có EMOTION_INFERENCE_SERVER,
+không thì load model tại chỗ.
+
+Usage:
+    python manage.py classify_songs
+    python manage.py classify_songs --retry-failed --limit 5000
+"""
+
+from django.core.management.base import BaseCommand
+
+from music_app import tasks
+from music_app.models import Song
+
+
+class Command(BaseCommand):
+    help = 'Classify the emotion of songs waiting for classification'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retry-failed', action='store_true', help="Chạy lại cả các bài 'failed'")
+        parser.add_argument('--limit', type=int, help='Số bài tối đa')
+
+    def handle(self, *args, **options):
+        statuses = ['pending', 'failed'] if options['retry_failed'] else ['pending']
+        waiting = Song.objects.filter(emotion_status__in=statuses).count()
+        self.stdout.write(f'Classifying {min(waiting, options["limit"] or waiting)} songs...')
+        classified = tasks.classify_pending(include_failed=options['retry_failed'], limit=options['limit'])
+        self.stdout.write(self.style.SUCCESS(f'Done: {classified} songs classified'))
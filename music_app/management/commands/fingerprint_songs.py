@@ -0,0 +1,32 @@
+"""
+Fingerprint các bài hát đã có trong catalog (backfill index phát hiện bài trùng)
+
+Usage:
+    python manage.py fingerprint_songs            # các bài chưa có fingerprint
+    python manage.py fingerprint_songs --all      # tính lại toàn bộ
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from music_app import fingerprint, tasks
+from music_app.models import Song
+
+
+class Command(BaseCommand):
+    help = 'Build the audio fingerprint index used to detect duplicate uploads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Tính lại cả các bài đã có fingerprint')
+
+    def handle(self, *args, **options):
+        if not fingerprint.fpcalc_available():
+            raise CommandError('fpcalc (Chromaprint) not found; install it or set FPCALC_PATH')
+
+        songs = Song.objects.all()
+        if not options['all']:
+            songs = songs.filter(fingerprint__isnull=True)
+        song_ids = list(songs.values_list('pk', flat=True))
+
+        self.stdout.write(f'Fingerprinting {len(song_ids)} songs...')
+        duplicates = tasks.fingerprint_songs(song_ids)
+        self.stdout.write(self.style.SUCCESS(f'Done: {duplicates} duplicates linked'))
@@ -0,0 +1,333 @@
+"""
+Import nhanh catalog bài hát từ manifest JSON/CSV lớn
+
+Khác với `loaddata` (đọc toàn bộ file rồi save() từng object), command này:
+- Đọc manifest theo kiểu streaming → bộ nhớ không phụ thuộc kích thước file
+- Kiểm tra file audio/ảnh bìa có tồn tại trong MEDIA_ROOT
+- Insert theo batch bằng bulk_create; bài đã có (trùng id) chỉ được cập nhật các
+  cột có trong record, giá trị đang lưu của cột vắng mặt được giữ nguyên
+- Giữ tham chiếu MediaBlob (storage.py) cho file/ảnh content-addressed được import
+- Record lỗi (id, emotion_confidence, duration không hợp lệ...) bị báo và bỏ qua
+- Giữ uploaded_at của manifest nếu có (không có thì là thời điểm import)
+- Tùy chọn đưa bài hát mới vào hàng đợi phân loại cảm xúc / đọc metadata
+
+Định dạng hỗ trợ:
+- JSON: mảng fixture Django (như songs.json: {"model", "pk", "fields"}) hoặc mảng object phẳng
+- CSV: header gồm các cột title, artist, album, file, image, duration, lyrics, ... (id tùy chọn)
+
+Usage:
+    python manage.py import_catalog songs.json song1.json
+    python manage.py import_catalog catalog.csv --batch-size 2000 --classify --ingest-metadata
+"""
+
+import csv
+import json
+import os
+import re
+from collections import defaultdict
+from datetime import timedelta, timezone as dt_timezone
+from functools import partial
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, reset_queries, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime, parse_duration
+
+from music_app import facets, tasks
+from music_app.lyrics import parse_lrc
+from music_app.models import Song
+from music_app.storage import media_storage
+
+# Field luôn có trong record hợp lệ / chỉ được cập nhật (bài trùng id) khi có trong
+# record. uploaded_at (auto_now_add) không nằm ở đây: bulk_create luôn ghi đè bằng thời
+# điểm hiện tại, giá trị từ manifest được ghi riêng sau đó (Command.restore_uploaded_at)
+REQUIRED_FIELDS = ['title', 'artist', 'file']
+OPTIONAL_FIELDS = ['album', 'image', 'duration', 'lyrics', 'emotion', 'emotion_confidence']
+MEDIA_FIELDS = ('file', 'image')
+
+_WHITESPACE = re.compile(r'[\s,]*')
+
+
+def iter_json_array(stream, chunk_size=1 << 16):
+    """
+    Đọc từng phần tử của một mảng JSON top-level mà không nạp cả file
+
+    Chỉ giữ trong bộ nhớ một đoạn buffer (~chunk_size) + phần tử đang parse.
+    """
+    decoder = json.JSONDecoder()
+    buffer = stream.read(chunk_size)
+    pos = _WHITESPACE.match(buffer).end()
+    if buffer[pos:pos + 1] != '[':
+        raise CommandError('JSON manifest must be a top-level array')
+    pos += 1
+    eof = False
+
+    while True:
+        pos = _WHITESPACE.match(buffer, pos).end()
+        if pos >= len(buffer) and not eof:
+            buffer, pos = stream.read(chunk_size), 0
+            eof = not buffer
+            continue
+        if buffer[pos:pos + 1] == ']':
+            return
+        try:
+            obj, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError as e:
+            if eof:
+                raise CommandError(f'Invalid JSON manifest: {e}')
+            chunk = stream.read(chunk_size)
+            eof = not chunk
+            buffer, pos = buffer[pos:] + chunk, 0
+            continue
+        yield obj
+        pos = end
+
+
+def iter_csv_rows(stream):
+    for row in csv.DictReader(stream):
+        yield {key: value for key, value in row.items() if value != ''}
+
+
+class Command(BaseCommand):
+    help = 'Stream-import song manifests (JSON fixtures or CSV) with batched upserts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('manifests', nargs='+', help='Path tới file .json / .csv')
+        parser.add_argument('--format', choices=['json', 'csv'], help='Mặc định: đoán theo đuôi file')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--no-validate-media', action='store_true',
+            help='Không kiểm tra file audio/ảnh có tồn tại trong MEDIA_ROOT'
+        )
+        parser.add_argument(
+            '--classify', action='store_true',
+            help='Đưa bài hát mới (có lyrics) vào hàng đợi phân loại cảm xúc'
+        )
+        parser.add_argument(
+            '--ingest-metadata', action='store_true',
+            help='Đưa bài hát mới vào hàng đợi đọc metadata (duration) từ file audio'
+        )
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.stats = {'created': 0, 'updated': 0, 'skipped': 0}
+        self.imported_pks = False
+
+        for path in options['manifests']:
+            if not os.path.exists(path):
+                raise CommandError(f'Manifest not found: {path}')
+            fmt = options['format'] or os.path.splitext(path)[1].lstrip('.').lower()
+            if fmt not in ('json', 'csv'):
+                raise CommandError(f'Cannot detect manifest format of {path}, use --format')
+
+            self.stdout.write(f'Importing {path}...')
+            with open(path, encoding='utf-8', newline='') as stream:
+                records = iter_json_array(stream) if fmt == 'json' else iter_csv_rows(stream)
+                batch = []
+                for record in records:
+                    song = self.build_song(record)
+                    if song is None:
+                        continue
+                    batch.append(song)
+                    if len(batch) >= options['batch_size']:
+                        self.flush(batch)
+                        batch = []
+                if batch:
+                    self.flush(batch)
+
+        if self.imported_pks:
+            self.reset_sequences()
+
+        if options['classify'] or options['ingest_metadata']:
+            self.stdout.write('Waiting for background jobs...')
+            tasks.wait()
+
+        self.stdout.write(self.style.SUCCESS(
+            'Done: {created} created, {updated} updated, {skipped} skipped'.format(**self.stats)
+        ))
+
+    def build_song(self, record):
+        """Chuẩn hóa 1 record (fixture hoặc object phẳng) thành Song chưa lưu, None nếu bỏ qua."""
+        if not isinstance(record, dict):
+            self.warn({'title': record}, 'record is not an object')
+            return None
+        if 'fields' in record:
+            if record.get('model', 'music_app.song').lower() != 'music_app.song':
+                self.stats['skipped'] += 1
+                return None
+            data = dict(record['fields'], id=record.get('pk'))
+        else:
+            data = dict(record)
+            data.setdefault('id', data.pop('pk', None))
+
+        if not data.get('title') or not data.get('artist') or not data.get('file'):
+            self.warn(data, 'missing title/artist/file')
+            return None
+
+        if not self.options['no_validate_media']:
+            if not os.path.exists(os.path.join(settings.MEDIA_ROOT, data['file'])):
+                self.warn(data, f"audio file not found: {data['file']}")
+                return None
+            if data.get('image') and not os.path.exists(os.path.join(settings.MEDIA_ROOT, data['image'])):
+                # Không ghi đè ảnh đang có của bài trùng id
+                self.stderr.write(f"  {data.get('id') or data.get('title')!r}: cover not found: {data['image']}")
+                del data['image']
+
+        try:
+            song = self.make_song(data)
+        except (TypeError, ValueError) as e:
+            self.warn(data, f'invalid value: {e}')
+            return None
+        song.imported_uploaded_at = self.parse_uploaded_at(data)
+        # Cột được cập nhật nếu bài đã có trong DB
+        song.imported_fields = REQUIRED_FIELDS + [field for field in OPTIONAL_FIELDS if field in data]
+        if 'lyrics' in data:
+            song.imported_fields.append('lyrics_timeline')
+        return song
+
+    def make_song(self, data):
+        duration = data.get('duration')
+        if isinstance(duration, str):
+            parsed = parse_duration(duration)
+            if parsed is None:
+                raise ValueError(f'invalid duration {duration!r}')
+            duration = parsed
+        elif isinstance(duration, (int, float)):
+            duration = timedelta(seconds=duration)
+        elif duration is not None:
+            raise ValueError(f'invalid duration {duration!r}')
+
+        # `or ''`: manifest có thể ghi "album": null, CharField / TextField không nhận NULL
+        lyrics = data.get('lyrics') or ''
+        return Song(
+            id=int(data['id']) if data.get('id') else None,
+            title=data['title'],
+            artist=data['artist'],
+            album=data.get('album') or '',
+            file=data['file'],
+            image=data.get('image') or '',
+            duration=duration,
+            lyrics=lyrics,
+            # bulk_create không gọi Song.save() nên phải tự parse LRC
+            lyrics_timeline=parse_lrc(lyrics),
+            emotion=data.get('emotion') or 'unknown',
+            emotion_confidence=float(data.get('emotion_confidence') or 0.0),
+        )
+
+    def parse_uploaded_at(self, data):
+        value = data.get('uploaded_at')
+        if not value:
+            return None
+        try:
+            uploaded_at = parse_datetime(value)
+        except (TypeError, ValueError):
+            uploaded_at = None
+        if uploaded_at is None:
+            self.stderr.write(
+                f"  {data.get('id') or data.get('title')!r}: invalid uploaded_at {value!r}, using import time"
+            )
+            return None
+        if settings.USE_TZ and timezone.is_naive(uploaded_at):
+            uploaded_at = timezone.make_aware(uploaded_at, dt_timezone.utc)
+        return uploaded_at
+
+    def warn(self, data, reason):
+        self.stats['skipped'] += 1
+        self.stderr.write(f"  skip {data.get('id') or data.get('title')!r}: {reason}")
+
+    def flush(self, batch):
+        """Ghi 1 batch: cập nhật các bài đã có (trùng id), insert phần còn lại."""
+        pks = [song.id for song in batch if song.id is not None]
+        new_ids = []
+        reclassify_ids = []
+        existing = {}
+
+        with transaction.atomic():
+            if pks:
+                existing = {
+                    row['pk']: row
+                    for row in Song.objects.filter(pk__in=pks).values('pk', 'file', 'image', 'lyrics')
+                }
+                self.imported_pks = True
+            if existing:
+                reclassify_ids = self.update_existing([song for song in batch if song.id in existing], existing)
+            created = [song for song in batch if song.id not in existing]
+            if created:
+                Song.objects.bulk_create(created)
+                for song in created:
+                    for field in MEDIA_FIELDS:
+                        media_storage.add_reference(getattr(song, field).name)
+                new_ids.extend(song.id for song in created if song.id is not None)
+            self.restore_uploaded_at(batch)
+        updated = len(existing)
+
+        # bulk_create không gửi signal → facet counts (home) được đếm lại ở lần đọc sau
+        facets.invalidate()
+
+        self.stats['created'] += len(batch) - updated
+        self.stats['updated'] += updated
+        self.stdout.write(f"  {self.stats['created'] + self.stats['updated']} songs imported")
+        # Với DEBUG=True Django giữ lại SQL (kèm lyrics) của mọi query → xóa để bộ nhớ không tăng dần
+        reset_queries()
+
+        if (new_ids or reclassify_ids) and self.options['classify']:
+            tasks.enqueue(tasks.classify_songs, new_ids + reclassify_ids)
+        if new_ids and self.options['ingest_metadata']:
+            tasks.enqueue(tasks.ingest_song_metadata, new_ids)
+
+    def update_existing(self, songs, existing):
+        """
+        Cập nhật các bài đã có, chỉ những cột có trong record (song.imported_fields)
+
+        Đổi file/ảnh thì giữ tham chiếu tới file mới và trả lại file cũ sau khi commit
+        (giống signals.release_replaced_media). Lyrics đổi mà record không kèm emotion
+        thì kết quả phân loại cũ bị xóa để phân loại lại.
+
+        Returns:
+            list: id các bài cần phân loại lại
+        """
+        groups = defaultdict(list)
+        reclassify_ids = []
+        for song in songs:
+            old = existing[song.id]
+            fields = list(song.imported_fields)
+            if 'lyrics' in fields and 'emotion' not in fields and song.lyrics != old['lyrics']:
+                song.emotion, song.emotion_confidence, song.emotion_status = 'unknown', 0.0, ''
+                fields += ['emotion', 'emotion_confidence', 'emotion_status']
+                reclassify_ids.append(song.id)
+            for field in MEDIA_FIELDS:
+                new_name = getattr(song, field).name
+                if field in fields and new_name != old[field]:
+                    media_storage.add_reference(new_name)
+                    if old[field]:
+                        transaction.on_commit(partial(media_storage.delete, old[field]))
+            groups[tuple(fields)].append(song)
+
+        for fields, group in groups.items():
+            Song.objects.bulk_update(group, fields, batch_size=500)
+        return reclassify_ids
+
+    def restore_uploaded_at(self, batch):
+        """Ghi uploaded_at từ manifest (bulk_update không áp dụng auto_now_add như bulk_create)"""
+        songs = []
+        for song in batch:
+            if song.imported_uploaded_at is None:
+                continue
+            if song.id is None:
+                # Backend không trả id sau bulk_create (vd MySQL) → không cập nhật được
+                self.stderr.write(f"  {song.title!r}: uploaded_at not supported without an explicit id")
+                continue
+            song.uploaded_at = song.imported_uploaded_at
+            songs.append(song)
+        if songs:
+            Song.objects.bulk_update(songs, ['uploaded_at'], batch_size=500)
+
+    def reset_sequences(self):
+        """Đồng bộ lại sequence id (Postgres) sau khi insert id tường minh, giống loaddata."""
+        sequence_sql = connection.ops.sequence_reset_sql(no_style(), [Song])
+        if sequence_sql:
+            with connection.cursor() as cursor:
+                for sql in sequence_sql:
+                    cursor.execute(sql)
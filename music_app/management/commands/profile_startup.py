@@ -0,0 +1,151 @@
+"""
+Đo thời gian khởi động và bộ nhớ của process web (cold start)
+
+Mỗi kịch bản chạy trong 1 process Python mới (giống 1 worker gunicorn/uvicorn
+vừa spawn), đo:
+    - wall time từ lúc spawn interpreter tới khi xong
+    - peak RSS của process con
+    - số module đã import, và module nặng (torch, transformers) có bị kéo vào không
+    - (tuỳ chọn) các import tốn thời gian nhất theo `python -X importtime`
+
+Kịch bản:
+    check          python manage.py check
+    wsgi           import mymusic.wsgi (django.setup + load middleware)
+    asgi           import mymusic.asgi
+    first_request  wsgi + 1 request GET /login/ qua WSGI application + import music_app.ml_models
+
+Usage:
+    python manage.py profile_startup
+    python manage.py profile_startup --repeat 5 --importtime
+    python manage.py profile_startup --max-seconds 2 --max-rss-mb 120 --json startup.json
+
+Vượt ngưỡng (STARTUP_BUDGET trong settings hoặc tham số dòng lệnh) hoặc có module
+cấm trong sys.modules → CommandError (exit code 1), dùng được trong CI.
+"""
+
+import json
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Code chạy trong process con. In ra 1 dòng JSON cuối cùng trên stdout.
+CHILD_CODE = r'''
+import json, os, resource, sys
+scenario = sys.argv[1]
+sys.path.insert(0, os.getcwd())
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mymusic.settings')
+
+if scenario == 'check':
+    from django.core.management import execute_from_command_line
+    execute_from_command_line(['manage.py', 'check', '-v', '0'])
+elif scenario == 'asgi':
+    import mymusic.asgi
+else:
+    from mymusic.wsgi import application
+    if scenario == 'first_request':
+        from wsgiref.util import setup_testing_defaults
+        environ = {'PATH_INFO': '/login/', 'HTTP_HOST': 'localhost'}
+        setup_testing_defaults(environ)
+        status = []
+        body = application(environ, lambda s, headers, exc_info=None: status.append(s))
+        b''.join(body)
+        body.close()
+        if not status[0].startswith(('2', '3')):
+            raise SystemExit('first request failed: ' + status[0])
+        # View phân tích cảm xúc import module này khi được gọi; bản thân import không được kéo torch vào
+        import music_app.ml_models
+
+print(json.dumps({
+    'rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    'modules': len(sys.modules),
+    'loaded': sorted(name for name in sys.argv[2].split(',') if name in sys.modules),
+}))
+'''
+
+SCENARIOS = ['check', 'wsgi', 'asgi', 'first_request']
+
+
+def parse_importtime(stderr, top):
+    """Các module có thời gian import (self, µs) lớn nhất từ output của -X importtime."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        # Dùng thời gian self thay vì cumulative để module cha (vd mymusic.wsgi) không che mất module con
+        own, _, name = line[len('import time:'):].split('|')
+        entries.append((int(own), name.strip()))
+    entries.sort(reverse=True)
+    return entries[:top]
+
+
+class Command(BaseCommand):
+    help = 'Measure cold-start time and memory of the web process and enforce a startup budget'
+
+    def add_arguments(self, parser):
+        budget = getattr(settings, 'STARTUP_BUDGET', {})
+        parser.add_argument('--scenario', action='append', choices=SCENARIOS, help='Mặc định: tất cả')
+        parser.add_argument('--repeat', type=int, default=3, help='Chạy mỗi kịch bản N lần, lấy lần nhanh nhất')
+        parser.add_argument('--max-seconds', type=float, default=budget.get('seconds'))
+        parser.add_argument('--max-rss-mb', type=float, default=budget.get('rss_mb'))
+        parser.add_argument(
+            '--forbid', default=','.join(budget.get('forbidden_modules', ['torch', 'transformers'])),
+            help='Các module không được có trong sys.modules sau khi khởi động (phân tách bằng dấu phẩy)'
+        )
+        parser.add_argument('--importtime', action='store_true', help='In các import chậm nhất')
+        parser.add_argument('--json', help='Ghi kết quả ra file JSON')
+
+    def run_child(self, scenario, forbidden, importtime):
+        command = [sys.executable]
+        if importtime:
+            command += ['-X', 'importtime']
+        command += ['-c', CHILD_CODE, scenario, ','.join(forbidden)]
+
+        started = time.perf_counter()
+        proc = subprocess.run(command, cwd=settings.BASE_DIR, capture_output=True, text=True)
+        elapsed = time.perf_counter() - started
+        if proc.returncode != 0:
+            raise CommandError(f'{scenario}: process exited with {proc.returncode}\n{proc.stderr[-2000:]}')
+
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        result['seconds'] = round(elapsed, 3)
+        if importtime:
+            result['slowest_imports'] = parse_importtime(proc.stderr, 10)
+        return result
+
+    def handle(self, *args, **options):
+        forbidden = [name for name in options['forbid'].split(',') if name]
+        results = {}
+        failures = []
+
+        for scenario in options['scenario'] or SCENARIOS:
+            runs = [
+                self.run_child(scenario, forbidden, options['importtime'])
+                for _ in range(max(1, options['repeat']))
+            ]
+            best = min(runs, key=lambda run: run['seconds'])
+            best['rss_mb'] = max(run['rss_mb'] for run in runs)
+            results[scenario] = best
+
+            self.stdout.write(
+                f"{scenario:<14} {best['seconds']:>7.3f}s  {best['rss_mb']:>7.1f} MB  {best['modules']:>5} modules"
+            )
+            for cumulative, name in best.get('slowest_imports', []):
+                self.stdout.write(f"    {cumulative / 1000:>8.1f} ms  {name}")
+
+            if options['max_seconds'] is not None and best['seconds'] > options['max_seconds']:
+                failures.append(f"{scenario}: {best['seconds']}s > {options['max_seconds']}s")
+            if options['max_rss_mb'] is not None and best['rss_mb'] > options['max_rss_mb']:
+                failures.append(f"{scenario}: {best['rss_mb']} MB > {options['max_rss_mb']} MB")
+            if best['loaded']:
+                failures.append(f"{scenario}: heavy modules imported at startup: {', '.join(best['loaded'])}")
+
+        if options['json']:
+            with open(options['json'], 'w') as f:
+                json.dump({'python': sys.version.split()[0], 'results': results}, f, indent=2)
+
+        if failures:
+            raise CommandError('Startup budget exceeded:\n  ' + '\n  '.join(failures))
+        self.stdout.write(self.style.SUCCESS('Startup within budget'))
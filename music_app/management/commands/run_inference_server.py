@@ -0,0 +1,49 @@
+"""
+Chạy inference server dùng chung cho model cảm xúc (xem music_app/inference_server.py)
+
+Usage:
+    python manage.py run_inference_server --socket /tmp/mymusic-inference.sock
+    python manage.py run_inference_server --port 8765 --batch-size 32 --window-ms 20
+
+Sau đó trỏ các worker web tới server:
+    EMOTION_INFERENCE_SERVER=unix:/tmp/mymusic-inference.sock
+"""
+
+import logging
+
+from django.core.management.base import BaseCommand
+
+from music_app.inference_server import MicroBatcher, serve
+
+
+class Command(BaseCommand):
+    help = 'Serve the emotion model to all web workers with dynamic micro-batching'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--socket', help='Lắng nghe trên Unix socket này (ưu tiên hơn --host/--port)')
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--batch-size', type=int, default=16, help='Số lyrics tối đa mỗi batch')
+        parser.add_argument('--window-ms', type=float, default=10, help='Thời gian chờ gom batch')
+        parser.add_argument(
+            '--max-pending', type=int, default=256,
+            help='Số lyrics tối đa trong hàng đợi, vượt quá thì trả 503'
+        )
+
+    def handle(self, *args, **options):
+        from music_app.ml_models import EmotionClassifier
+
+        logging.basicConfig(level=logging.INFO)
+
+        # Luôn load model tại chỗ (không phải client mode), và load ngay thay vì chờ request đầu tiên
+        classifier = EmotionClassifier(server_address=None)
+        self.stdout.write('Loading model...')
+        classifier.classifier
+
+        batcher = MicroBatcher(
+            classifier.predict_batch,
+            max_batch_size=options['batch_size'],
+            max_wait=options['window_ms'] / 1000,
+            max_pending=options['max_pending'],
+        )
+        serve(batcher, host=options['host'], port=options['port'], socket_path=options['socket'])
@@ -0,0 +1,55 @@
+"""
+Chép database SQLite primary sang các replica giả lập (SQLITE_REPLICA_PATHS)
+
+SQLite không có replication; dùng lệnh này để có 2 file "primary / replica"
+khi chạy thử router đọc-ghi (music_app/routers.py) ở máy local. Chạy với
+--interval để mô phỏng replica cập nhật trễ vài giây.
+
+Usage:
+    SQLITE_REPLICA_PATHS=/tmp/replica1.sqlite3 python manage.py sync_sqlite_replicas
+    SQLITE_REPLICA_PATHS=/tmp/replica1.sqlite3 python manage.py sync_sqlite_replicas --interval 2
+"""
+
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = 'Copy the primary SQLite database to the replica stand-in files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, help='Đồng bộ lặp lại mỗi N giây (Ctrl+C để dừng)')
+
+    def handle(self, *args, **options):
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError('Only SQLite primaries can be synced; use real replication for Postgres')
+        if not settings.REPLICA_DATABASES:
+            raise CommandError('No replicas configured (set SQLITE_REPLICA_PATHS)')
+
+        self.verbosity = options['verbosity']
+        while True:
+            self.sync()
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
+
+    def sync(self):
+        source = sqlite3.connect(str(settings.DATABASES['default']['NAME']))
+        try:
+            for alias in settings.REPLICA_DATABASES:
+                # Đóng connection Django đang mở tới replica trước khi ghi đè
+                connections[alias].close()
+                target = sqlite3.connect(str(settings.DATABASES[alias]['NAME']))
+                try:
+                    # Online backup API: chép nhất quán kể cả khi primary đang được ghi
+                    source.backup(target)
+                finally:
+                    target.close()
+                if self.verbosity:
+                    self.stdout.write(f'{alias} synced')
+        finally:
+            source.close()
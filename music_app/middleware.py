@@ -0,0 +1,239 @@
+import json
+import logging
+import mimetypes
+import os
+import random
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed, SuspiciousFileOperation
+from django.db import connections
+from django.http import FileResponse
+from django.utils._os import safe_join
+
+from . import perf, routers, tasks
+
+logger = logging.getLogger('music_app.perf')
+
+
+class PerformanceMiddleware:
+    """
+    Đo SQL / render / inference / bytes stream của mỗi request (xem perf.py)
+
+    - Header Server-Timing (xem được trong tab Network của DevTools)
+    - 1 dòng log JSON / request (logger 'music_app.perf')
+    - Request chậm hơn PERF_SLOW_REQUEST_MS được log kèm các câu SQL chậm nhất,
+      lấy mẫu theo PERF_SLOW_SAMPLE_RATE
+    """
+
+    def __init__(self, get_response):
+        if not settings.PERF_INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = perf.RequestMetrics()
+        token = perf.activate(metrics)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics.sql_wrapper))
+                response = self.get_response(request)
+        finally:
+            perf.deactivate(token)
+
+        total_ms = metrics.elapsed * 1000
+        response['Server-Timing'] = self.server_timing(metrics, total_ms)
+        if response.streaming and not response.is_async:
+            # stream_bytes chỉ biết sau khi gửi xong (hoặc client ngắt) → log khi response được đóng
+            response.streaming_content = perf.CloseCallbackIterator(
+                response.streaming_content, lambda: self.log(request, response, metrics, total_ms)
+            )
+        else:
+            self.log(request, response, metrics, total_ms)
+        return response
+
+    @staticmethod
+    def server_timing(metrics, total_ms):
+        entries = [f'db;dur={metrics.timings["db"] * 1000:.1f};desc="{len(metrics.queries)} queries"']
+        for name in ('render', 'inference'):
+            if name in metrics.timings:
+                entries.append(f'{name};dur={metrics.timings[name] * 1000:.1f}')
+        if metrics.counts.get('stream_bytes'):
+            entries.append(f'stream;desc="{metrics.counts["stream_bytes"]} bytes"')
+        entries.append(f'total;dur={total_ms:.1f}')
+        return ', '.join(entries)
+
+    @staticmethod
+    def log(request, response, metrics, total_ms):
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(total_ms, 1),
+            'db_ms': round(metrics.timings['db'] * 1000, 1),
+            'queries': len(metrics.queries),
+            'render_ms': round(metrics.timings['render'] * 1000, 1),
+            'inference_ms': round(metrics.timings['inference'] * 1000, 1),
+            'stream_bytes': metrics.counts['stream_bytes'],
+        }
+        logger.info(json.dumps(record))
+
+        if total_ms < settings.PERF_SLOW_REQUEST_MS or random.random() >= settings.PERF_SLOW_SAMPLE_RATE:
+            return
+
+        slowest = sorted(metrics.queries, key=lambda query: query[0], reverse=True)[:10]
+        repeated = Counter(sql for _, _, sql in metrics.queries)
+        record['slow_queries'] = [
+            {'ms': round(duration * 1000, 2), 'db': alias, 'sql': sql} for duration, alias, sql in slowest
+        ]
+        # Cùng 1 câu SQL chạy nhiều lần thường là dấu hiệu N+1
+        record['repeated_queries'] = [
+            {'count': count, 'sql': sql} for sql, count in repeated.most_common(5) if count > 1
+        ]
+        logger.warning('Slow request: %s', json.dumps(record))
+
+
+class PrecompressedStaticMiddleware:
+    """
+    Phục vụ STATIC_ROOT (sau collectstatic) kèm bản nén sẵn .br / .gz (xem staticfiles.py)
+
+    File có hash trong tên (đã ghi trong manifest) không bao giờ đổi nội dung →
+    Cache-Control immutable 1 năm; trình duyệt không gửi lại request ở các lần
+    xem trang sau. Bật bằng SERVE_STATIC (mặc định khi DEBUG=False; khi DEBUG,
+    runserver tự phục vụ static từ các app).
+    """
+
+    IMMUTABLE = 'public, max-age=31536000, immutable'
+    DEFAULT = 'public, max-age=60'
+    ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+    def __init__(self, get_response):
+        if not settings.SERVE_STATIC or not settings.STATIC_ROOT:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefix = '/' + settings.STATIC_URL.lstrip('/')
+        self.root = str(settings.STATIC_ROOT)
+        self.hashed = self.load_hashed_names()
+
+    def load_hashed_names(self):
+        try:
+            with open(os.path.join(self.root, 'staticfiles.json')) as f:
+                return set(json.load(f).get('paths', {}).values())
+        except (OSError, ValueError):
+            return set()
+
+    @classmethod
+    def choose_encodings(cls, header):
+        """
+        Các encoding nén sẵn (trong ENCODINGS) mà client chấp nhận, q cao trước
+
+        Parse token + q-value của Accept-Encoding: 'br;q=0' là từ chối br, '*' áp
+        dụng cho encoding không được nêu tên.
+        """
+        qualities = {}
+        for item in header.split(','):
+            coding, *params = [part.strip() for part in item.split(';')]
+            if not coding:
+                continue
+            quality = 1.0
+            for param in params:
+                key, _, value = param.partition('=')
+                if key.strip().lower() == 'q':
+                    try:
+                        quality = float(value)
+                    except ValueError:
+                        quality = 0.0
+            qualities[coding.lower()] = quality
+
+        ranked = []
+        for order, (candidate, suffix) in enumerate(cls.ENCODINGS):
+            quality = qualities.get(candidate, qualities.get('*', 0.0))
+            if quality > 0:
+                ranked.append((-quality, order, candidate, suffix))
+        return [(candidate, suffix) for _, _, candidate, suffix in sorted(ranked)]
+
+    def __call__(self, request):
+        if request.method in ('GET', 'HEAD') and request.path.startswith(self.prefix):
+            response = self.serve(request, request.path[len(self.prefix):])
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def serve(self, request, name):
+        try:
+            path = safe_join(self.root, name)
+        except SuspiciousFileOperation:
+            return None
+        if not os.path.isfile(path):
+            return None
+
+        content_type, _ = mimetypes.guess_type(path)
+        encoding = None
+        for candidate, suffix in self.choose_encodings(request.headers.get('Accept-Encoding', '')):
+            if os.path.isfile(path + suffix):
+                encoding, path = candidate, path + suffix
+                break
+
+        # filename của file gốc: Content-Disposition không mang tên .br / .gz
+        response = FileResponse(
+            open(path, 'rb'),
+            content_type=content_type or 'application/octet-stream',
+            filename=os.path.basename(name),
+        )
+        if encoding:
+            response['Content-Encoding'] = encoding
+        response['Vary'] = 'Accept-Encoding'
+        response['Cache-Control'] = self.IMMUTABLE if name in self.hashed else self.DEFAULT
+        return response
+
+
+class ReplicaPinningMiddleware:
+    """
+    Read-your-writes khi dùng read replica (xem routers.py)
+
+    - Request ghi (POST/PUT/PATCH/DELETE) đọc từ primary ngay từ đầu
+    - Request có ghi vào music_app (kể cả GET, vd analyze emotion) → set cookie ghim user vào primary trong
+      REPLICA_PIN_SECONDS giây, đủ để replica bắt kịp trước khi user đọc lại
+    """
+
+    COOKIE_NAME = 'db_pin'
+    UNSAFE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+    def __init__(self, get_response):
+        if not settings.REPLICA_DATABASES:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pinned = request.method in self.UNSAFE_METHODS or self.COOKIE_NAME in request.COOKIES
+        token = routers.activate(pinned)
+        try:
+            response = self.get_response(request)
+            wrote = routers.has_written()
+        finally:
+            routers.deactivate(token)
+
+        if wrote:
+            response.set_cookie(
+                self.COOKIE_NAME, '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+
+class BackgroundMaintenanceMiddleware:
+    """
+    Khởi động job dọn dẹp định kỳ (tasks.run_maintenance) khi process web load middleware
+
+    Đặt ở middleware thay vì AppConfig.ready() để không chạy trong migrate, shell,
+    các management command... Không xử lý request nào (MiddlewareNotUsed).
+    """
+
+    def __init__(self, get_response):
+        if settings.MAINTENANCE_INTERVAL:
+            tasks.start_periodic(tasks.run_maintenance, settings.MAINTENANCE_INTERVAL)
+        raise MiddlewareNotUsed
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-18 22:10
+
+from django.db import migrations, models
+import music_app.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music_app', '0005_song_emotion_song_emotion_confidence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('size', models.BigIntegerField(default=0)),
+                ('refcount', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='song',
+            name='file',
+            field=models.FileField(storage=music_app.storage.ContentAddressedStorage(), upload_to='songs/'),
+        ),
+        migrations.AlterField(
+            model_name='song',
+            name='image',
+            field=models.ImageField(blank=True, help_text='Album cover image', null=True, storage=music_app.storage.ContentAddressedStorage(), upload_to='covers/'),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 4.2.30 on 2026-10-18 22:13
+
+import re
+
+from django.db import migrations, models
+
+# Bản sao cố định của music_app.lyrics.parse_lrc tại thời điểm migration này
+# (định dạng [[giây, dòng], ...]); không import code của app để migration không
+# đổi hành vi khi parser thay đổi về sau.
+_TIMESTAMP = re.compile(r'\[(\d{1,3}):(\d{2})(?:[.:](\d{1,3}))?\]')
+
+
+def parse_lrc(text):
+    timeline = []
+    for line in (text or '').splitlines():
+        times = []
+        pos = 0
+        while True:
+            match = _TIMESTAMP.match(line, pos)
+            if not match:
+                break
+            minutes, seconds, fraction = match.groups()
+            time = int(minutes) * 60 + int(seconds)
+            if fraction:
+                time += int(fraction) / 10 ** len(fraction)
+            times.append(round(time, 2))
+            pos = match.end()
+
+        content = line[pos:].strip()
+        if times and content:
+            timeline.extend([time, content] for time in times)
+
+    timeline.sort(key=lambda entry: entry[0])
+    return timeline
+
+
+def build_lyrics_timelines(apps, schema_editor):
+    Song = apps.get_model('music_app', 'Song')
+    batch = []
+    for song in Song.objects.exclude(lyrics='').only('id', 'lyrics').iterator(chunk_size=500):
+        song.lyrics_timeline = parse_lrc(song.lyrics)
+        if song.lyrics_timeline:
+            batch.append(song)
+        if len(batch) >= 500:
+            Song.objects.bulk_update(batch, ['lyrics_timeline'])
+            batch = []
+    Song.objects.bulk_update(batch, ['lyrics_timeline'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music_app', '0007_uploadsession'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='song',
+            name='lyrics_timeline',
+            field=models.JSONField(blank=True, default=list, editable=False, help_text='Lời dạng LRC đã parse: [[giây, dòng], ...] sắp theo thời gian'),
+        ),
+        migrations.RunPython(build_lyrics_timelines, migrations.RunPython.noop),
+    ]
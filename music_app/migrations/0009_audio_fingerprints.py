@@ -0,0 +1,40 @@
+# Generated by Django 4.2.30 on 2026-10-18 22:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music_app', '0008_song_lyrics_timeline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='song',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, help_text='Bài gốc có cùng audio (phát hiện bằng fingerprint lúc upload)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='music_app.song'),
+        ),
+        migrations.CreateModel(
+            name='AudioFingerprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('duration', models.FloatField(help_text='Độ dài audio (giây) theo fpcalc')),
+                ('data', models.BinaryField(help_text='Mảng uint32 (fingerprint raw) dạng bytes')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('song', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='fingerprint', to='music_app.song')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='FingerprintTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.IntegerField()),
+                ('song', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='music_app.song')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['term', 'song'], name='fingerprint_term_song')],
+            },
+        ),
+    ]
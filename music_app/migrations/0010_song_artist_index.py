@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 22:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music_app', '0009_audio_fingerprints'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='song',
+            name='artist',
+            field=models.CharField(db_index=True, max_length=200),
+        ),
+    ]
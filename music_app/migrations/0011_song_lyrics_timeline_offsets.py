@@ -0,0 +1,66 @@
+# Generated by Django 4.2.30 on 2026-10-18 22:49
+
+import re
+
+from django.db import migrations, models
+
+# Bản sao cố định của music_app.lyrics.parse_lrc (định dạng [[giây, start, end], ...])
+_TIMESTAMP = re.compile(r'\[(\d{1,3}):(\d{2})(?:[.:](\d{1,3}))?\]')
+
+
+def parse_lrc(text):
+    timeline = []
+    line_start = 0
+    for line in (text or '').splitlines(keepends=True):
+        times = []
+        pos = 0
+        while True:
+            match = _TIMESTAMP.match(line, pos)
+            if not match:
+                break
+            minutes, seconds, fraction = match.groups()
+            time = int(minutes) * 60 + int(seconds)
+            if fraction:
+                time += int(fraction) / 10 ** len(fraction)
+            times.append(round(time, 2))
+            pos = match.end()
+
+        rest = line[pos:]
+        content = rest.strip()
+        if times and content:
+            start = line_start + pos + len(rest) - len(rest.lstrip())
+            timeline.extend([time, start, start + len(content)] for time in times)
+        line_start += len(line)
+
+    timeline.sort(key=lambda entry: entry[0])
+    return timeline
+
+
+def rebuild_lyrics_timelines(apps, schema_editor):
+    """[[giây, dòng], ...] → [[giây, start, end], ...] (không lưu text lần 2)"""
+    Song = apps.get_model('music_app', 'Song')
+    batch = []
+    for song in Song.objects.exclude(lyrics='').only('id', 'lyrics').iterator(chunk_size=500):
+        song.lyrics_timeline = parse_lrc(song.lyrics)
+        if song.lyrics_timeline:
+            batch.append(song)
+        if len(batch) >= 500:
+            Song.objects.bulk_update(batch, ['lyrics_timeline'])
+            batch = []
+    Song.objects.bulk_update(batch, ['lyrics_timeline'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music_app', '0010_song_artist_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='song',
+            name='lyrics_timeline',
+            field=models.JSONField(blank=True, default=list, editable=False, help_text='Lời dạng LRC đã parse: [[giây, start, end], ...] sắp theo thời gian, lyrics[start:end] là dòng lời'),
+        ),
+        migrations.RunPython(rebuild_lyrics_timelines, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 22:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music_app', '0011_song_lyrics_timeline_offsets'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='song',
+            name='emotion_status',
+            field=models.CharField(blank=True, choices=[('', 'Chưa yêu cầu'), ('pending', 'Đang chờ'), ('done', 'Xong'), ('skipped', 'Bỏ qua (lời không hợp lệ)'), ('failed', 'Lỗi')], db_index=True, default='', help_text='Trạng thái phân loại cảm xúc chạy nền', max_length=10),
+        ),
+    ]
@@ -10,21 +10,67 @@ Cách hoạt động:
 3. Classification: Neural network phân loại vào 4 emotions
 """
 
-from transformers import pipeline
-from dotenv import load_dotenv
-import torch
+import http.client
+import json
 import logging
 import os
+import socket
+
+from . import perf
 
 # Suppress Hugging Face authentication warning
 os.environ["HF_HUB_DISABLE_SYMLINKS_WARNING"] = "1"
 os.environ["HTTP_HUB_OFFLINE"] = "0"
 
-load_dotenv()
-HF_TOKEN = os.getenv("HF_TOKEN")
+# transformers/torch KHÔNG được import ở module level: import chúng mất vài giây và
+# hàng trăm MB RAM, trong khi module này được import bởi view, admin, command, test...
+# Chỉ load khi thực sự chạy inference (xem _load_pipeline). HF_TOKEN (nếu có trong .env)
+# đã được nạp vào os.environ bởi load_dotenv() trong settings và được huggingface_hub tự đọc.
+
+# Inference server dùng chung (music_app/inference_server.py), vd: "unix:/tmp/mymusic-inference.sock"
+# hoặc "http://127.0.0.1:8765". Không đặt → mỗi process tự load model như trước.
+EMOTION_INFERENCE_SERVER = os.getenv("EMOTION_INFERENCE_SERVER")
+EMOTION_INFERENCE_TIMEOUT = float(os.getenv("EMOTION_INFERENCE_TIMEOUT", "30"))
 
 logger = logging.getLogger(__name__)
 
+# Estimate: 1 token ≈ 4 characters → 512 tokens ≈ 2048 chars
+MAX_CHARS = 2000
+
+# Emotion mapping: Map từ model labels sang 4 emotions của ta
+# (module-level để không phải dựng lại dict mỗi lần predict)
+EMOTION_MAP = {
+    'joy': 'happy',
+    'optimism': 'happy',
+    'love': 'happy',
+    'surprise': 'happy',
+    'excitement': 'happy',
+    'amusement': 'happy',
+    'gratitude': 'happy',
+    'pride': 'happy',
+    
+    'sadness': 'sad',
+    'anger': 'sad',
+    'fear': 'sad',
+    'disgust': 'sad',
+    'disappointment': 'sad',
+    'remorse': 'sad',
+    'grief': 'sad',
+    
+    'calm': 'relaxed',
+    'relief': 'relaxed',
+    'neutral': 'relaxed',
+    'approval': 'relaxed',
+    'caring': 'relaxed',
+    
+    'curiosity': 'contemplative',
+    'confusion': 'contemplative',
+    'realization': 'contemplative',
+    'desire': 'contemplative',
+    'admiration': 'contemplative',
+}
+
+
 
 class EmotionClassifier:
     """
@@ -32,18 +78,24 @@ class EmotionClassifier:
     
     Attributes:
         _classifier: Hugging Face pipeline instance (lazy loaded)
+        server_address: Địa chỉ inference server; nếu có thì chạy ở client mode
+            (không load model trong process này, gửi lyrics sang server)
     
     Methods:
         predict(lyrics): Phân tích lyrics → return {'emotion': 'happy', 'confidence': 0.85}
     """
     
-    def __init__(self):
+    def __init__(self, server_address=None):
         """
         Initialize classifier (model chưa được load)
         Model sẽ được load lần đầu gọi predict() → Lazy loading
         """
         self._classifier = None
-        logger.info("EmotionClassifier initialized (model not loaded yet)")
+        self.server_address = server_address
+        if server_address:
+            logger.info(f"EmotionClassifier initialized (client mode, server: {server_address})")
+        else:
+            logger.info("EmotionClassifier initialized (model not loaded yet)")
     
     @property
     def classifier(self):
@@ -61,12 +113,7 @@ class EmotionClassifier:
         if self._classifier is None:
             logger.info("Loading emotion classification model (first time)...")
             try:
-                self._classifier = pipeline(
-                    task="text-classification",
-                    model="j-hartmann/emotion-english-distilroberta-base",
-                    top_k=None,
-                    truncation=True  # Quan trọng: Tự động cắt lời bài hát nếu quá dài
-                )
+                self._classifier = _load_pipeline()
                 logger.info("Model loaded successfully!")
             except Exception as e:
                 logger.error(f"Failed to load model: {e}")
@@ -96,6 +143,91 @@ class EmotionClassifier:
         5. Return emotion + confidence
         """
         
+        if self.server_address:
+            return self._predict_remote([lyrics])[0]
+        
+        lyrics_truncated = self._prepare(lyrics)
+        if lyrics_truncated is None:
+            return None
+        
+        try:
+            # Call AI model
+            logger.info(f"Analyzing lyrics ({len(lyrics_truncated)} chars)...")
+            with perf.timer('inference'):
+                results = self.classifier(lyrics_truncated, truncation=True)[0]
+            return self._map_scores(results)
+            
+        except Exception as e:
+            error_msg = str(e)
+            logger.error(f"Error during prediction: {error_msg}")
+            return {'error': error_msg}
+    
+    def predict_batch(self, lyrics_list, batch_size=8):
+        """
+        Phân tích nhiều lyrics trong 1 lần gọi model (dùng cho job chạy nền / import)
+        
+        Args:
+            lyrics_list (list[str]): Danh sách lời bài hát
+            batch_size (int): Số lyrics đưa vào model mỗi forward pass
+        
+        Returns:
+            list: Cùng thứ tự với lyrics_list, mỗi phần tử giống kết quả của predict()
+            (dict emotion/confidence, None nếu lyrics không hợp lệ, dict error nếu lỗi)
+        """
+        if self.server_address:
+            return self._predict_remote(lyrics_list)
+        
+        prepared = [self._prepare(lyrics) for lyrics in lyrics_list]
+        valid = [(i, text) for i, text in enumerate(prepared) if text is not None]
+        outputs = [None] * len(lyrics_list)
+        if not valid:
+            return outputs
+        
+        try:
+            logger.info(f"Analyzing {len(valid)} lyrics in batches of {batch_size}...")
+            with perf.timer('inference'):
+                results = self.classifier([text for _, text in valid], truncation=True, batch_size=batch_size)
+            for (i, _), scores in zip(valid, results):
+                outputs[i] = self._map_scores(scores)
+        except Exception as e:
+            error_msg = str(e)
+            logger.error(f"Error during batch prediction: {error_msg}")
+            for i, _ in valid:
+                outputs[i] = {'error': error_msg}
+        
+        return outputs
+    
+    def _predict_remote(self, lyrics_list):
+        """Client mode: gửi lyrics (đã validate/truncate) sang inference server, cùng format kết quả"""
+        prepared = [self._prepare(lyrics) for lyrics in lyrics_list]
+        valid = [(i, text) for i, text in enumerate(prepared) if text is not None]
+        outputs = [None] * len(lyrics_list)
+        if not valid:
+            return outputs
+        
+        try:
+            with perf.timer('inference'):
+                status, body = _post_json(self.server_address, '/predict', {'texts': [text for _, text in valid]})
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            logger.error(f"Inference server unavailable: {e}")
+            status, body = None, {'error': f'Inference server unavailable: {e}'}
+        
+        # Body lỗi / lạ (503 backpressure, lỗi validate, proxy...) → từng bài bị đánh dấu lỗi
+        results = body.get('results') if status == 200 and isinstance(body, dict) else None
+        if isinstance(results, list) and len(results) == len(valid):
+            for (i, _), result in zip(valid, results):
+                outputs[i] = result if _is_valid_result(result) else {'error': 'Invalid result from inference server'}
+        else:
+            error = body.get('error') if isinstance(body, dict) else None
+            if not isinstance(error, str) or not error:
+                error = f'Invalid response from inference server ({status})'
+            for i, _ in valid:
+                outputs[i] = {'error': error}
+        return outputs
+    
+    @staticmethod
+    def _prepare(lyrics):
+        """Validate + truncate lyrics; trả về None nếu lyrics không hợp lệ (quá ngắn, rỗng)"""
         # Validation: Check lyrics có hợp lệ không
         if not lyrics:
             logger.warning("Empty lyrics provided")
@@ -108,70 +240,83 @@ class EmotionClassifier:
             return None
         
         # Truncate lyrics nếu quá dài (BERT models có limit ~512 tokens)
-        # Estimate: 1 token ≈ 4 characters → 512 tokens ≈ 2048 chars
-        MAX_CHARS = 2000
         if len(lyrics_clean) > MAX_CHARS:
-            lyrics_truncated = lyrics_clean[:MAX_CHARS]
             logger.info(f"Truncated lyrics from {len(lyrics_clean)} to {MAX_CHARS} chars")
-        else:
-            lyrics_truncated = lyrics_clean
+            return lyrics_clean[:MAX_CHARS]
+        return lyrics_clean
+    
+    @staticmethod
+    def _map_scores(results):
+        """Map scores của model sang 1 trong 4 emotions của ta"""
+        # Get top emotion (highest score)
+        top_result = max(results, key=lambda x: x['score'])
         
-        try:
-            # Call AI model
-            logger.info(f"Analyzing lyrics ({len(lyrics_truncated)} chars)...")
-            results = self.classifier(lyrics_truncated, truncation=True)[0]
-            
-            # Emotion mapping: Map từ model labels sang 4 emotions của ta
-            emotion_map = {
-                'joy': 'happy',
-                'optimism': 'happy',
-                'love': 'happy',
-                'surprise': 'happy',
-                'excitement': 'happy',
-                'amusement': 'happy',
-                'gratitude': 'happy',
-                'pride': 'happy',
-                
-                'sadness': 'sad',
-                'anger': 'sad',
-                'fear': 'sad',
-                'disgust': 'sad',
-                'disappointment': 'sad',
-                'remorse': 'sad',
-                'grief': 'sad',
-                
-                'calm': 'relaxed',
-                'relief': 'relaxed',
-                'neutral': 'relaxed',
-                'approval': 'relaxed',
-                'caring': 'relaxed',
-                
-                'curiosity': 'contemplative',
-                'confusion': 'contemplative',
-                'realization': 'contemplative',
-                'desire': 'contemplative',
-                'admiration': 'contemplative',
-            }
-            
-            # Get top emotion (highest score)
-            top_result = max(results, key=lambda x: x['score'])
-            
-            # Map to our 4 emotions
-            raw_emotion = top_result['label'].lower()
-            emotion = emotion_map.get(raw_emotion, 'relaxed')
-            confidence = top_result['score']
-            
-            logger.info(f"Prediction: {emotion} ({confidence:.2%} confidence) [raw: {raw_emotion}]")
-            
-            return {
-                'emotion': emotion,
-                'confidence': float(confidence)
-            }
-            
-        except Exception as e:
-            error_msg = str(e)
-            logger.error(f"Error during prediction: {error_msg}")
-            return {'error': error_msg}
+        # Map to our 4 emotions
+        raw_emotion = top_result['label'].lower()
+        emotion = EMOTION_MAP.get(raw_emotion, 'relaxed')
+        confidence = top_result['score']
+        
+        logger.info(f"Prediction: {emotion} ({confidence:.2%} confidence) [raw: {raw_emotion}]")
+        
+        return {
+            'emotion': emotion,
+            'confidence': float(confidence)
+        }
+
+
+def _is_valid_result(result):
+    """Kết quả 1 bài từ inference server có đúng format của predict() không"""
+    if result is None:
+        return True
+    if not isinstance(result, dict):
+        return False
+    if 'error' in result:
+        return isinstance(result['error'], str)
+    return (
+        result.get('emotion') in EMOTION_MAP.values()
+        and isinstance(result.get('confidence'), (int, float))
+        and not isinstance(result.get('confidence'), bool)
+    )
+
+
+def _load_pipeline():
+    """Import transformers (kéo theo torch) và tạo pipeline - chỉ gọi khi cần inference thật"""
+    from transformers import pipeline
+    
+    return pipeline(
+        task="text-classification",
+        model="j-hartmann/emotion-english-distilroberta-base",
+        top_k=None,
+        truncation=True  # Quan trọng: Tự động cắt lời bài hát nếu quá dài
+    )
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection qua Unix domain socket"""
+    
+    def __init__(self, path, timeout):
+        super().__init__('localhost', timeout=timeout)
+        self._socket_path = path
+    
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self._socket_path)
+
+
+def _post_json(address, path, payload):
+    """POST JSON tới inference server ("unix:/path.sock" hoặc "http://host:port") → (status, dict)"""
+    if address.startswith('unix:'):
+        conn = _UnixHTTPConnection(address[len('unix:'):], timeout=EMOTION_INFERENCE_TIMEOUT)
+    else:
+        host = address.split('://', 1)[-1].rstrip('/')
+        conn = http.client.HTTPConnection(host, timeout=EMOTION_INFERENCE_TIMEOUT)
+    try:
+        conn.request('POST', path, body=json.dumps(payload), headers={'Content-Type': 'application/json'})
+        response = conn.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        conn.close()
 
 
 # ============ Singleton Pattern ============
@@ -199,6 +344,6 @@ def get_emotion_classifier():
     
     if _emotion_classifier_instance is None:
         logger.info("Creating EmotionClassifier singleton instance")
-        _emotion_classifier_instance = EmotionClassifier()
+        _emotion_classifier_instance = EmotionClassifier(server_address=EMOTION_INFERENCE_SERVER)
     
     return _emotion_classifier_instance
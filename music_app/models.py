@@ -1,16 +1,41 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import User
+from .lyrics import parse_lrc, timeline_lines
+from .storage import MediaFileField, MediaImageField, media_storage
+
+class SongQuerySet(models.QuerySet):
+    # Các cột mà card bài hát (home, playlist_detail) thực sự hiển thị
+    LISTING_FIELDS = ('id', 'title', 'artist', 'album', 'image', 'emotion')
+
+    def for_listing(self):
+        """
+        Chỉ SELECT các cột của card - lyrics / lyrics_timeline (không giới hạn độ dài)
+        bị defer, chỉ được load nếu có code truy cập tới (thêm 1 query / bài).
+        """
+        return self.only(*self.LISTING_FIELDS)
+
 
 class Song(models.Model):
     title = models.CharField(max_length=200)
-    artist = models.CharField(max_length=200)
+    artist = models.CharField(max_length=200, db_index=True)
     album = models.CharField(max_length=200, blank=True)
-    file = models.FileField(upload_to='songs/')
-    image = models.ImageField(upload_to='covers/', blank=True, null=True, help_text="Album cover image")
+    file = MediaFileField(upload_to='songs/', storage=media_storage)
+    image = MediaImageField(upload_to='covers/', storage=media_storage, blank=True, null=True, help_text="Album cover image")
     duration = models.DurationField(null=True, blank=True)
     lyrics = models.TextField(blank=True, help_text="Lời bài hát")
+    lyrics_timeline = models.JSONField(
+        default=list,
+        blank=True,
+        editable=False,
+        help_text="Lời dạng LRC đã parse: [[giây, start, end], ...] sắp theo thời gian, "
+                  "lyrics[start:end] là dòng lời"
+    )
     uploaded_at = models.DateTimeField(auto_now_add=True)
     
+    objects = SongQuerySet.as_manager()
+    
     # AI Emotion Classification fields
     emotion = models.CharField(
         max_length=20,
@@ -29,11 +54,68 @@ class Song(models.Model):
         default=0.0,
         help_text="Độ tin cậy của AI (0.0 - 1.0)"
     )
+    # Trạng thái job phân loại chạy nền: job nằm trong thread pool của process nên có thể
+    # mất khi process restart - bài còn 'pending' / 'failed' được chạy lại bằng
+    # `manage.py classify_songs` hoặc job định kỳ (tasks.run_maintenance)
+    emotion_status = models.CharField(
+        max_length=10,
+        choices=[
+            ('', 'Chưa yêu cầu'),
+            ('pending', 'Đang chờ'),
+            ('done', 'Xong'),
+            ('skipped', 'Bỏ qua (lời không hợp lệ)'),
+            ('failed', 'Lỗi'),
+        ],
+        default='',
+        blank=True,
+        db_index=True,
+        help_text="Trạng thái phân loại cảm xúc chạy nền"
+    )
+    duplicate_of = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='duplicates',
+        help_text="Bài gốc có cùng audio (phát hiện bằng fingerprint lúc upload)"
+    )
+
+    # Giá trị lúc load từ DB của các field mà signals.py cần so sánh khi lưu
+    # (file media được tham chiếu, field có facet) → không cần SELECT lại trong pre_save
+    TRACKED_FIELDS = ('file', 'image', 'emotion')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: value for name, value in zip(field_names, values) if name in cls.TRACKED_FIELDS
+        }
+        return instance
 
     @property
     def emotion_confidence_pct(self):
         return self.emotion_confidence * 100
 
+    @property
+    def lyrics_times(self):
+        """Chỉ các mốc thời gian của timeline (phần text đã được render sẵn trong HTML)"""
+        return [time for time, _, _ in self.lyrics_timeline]
+
+    @property
+    def lyrics_lines(self):
+        """[(giây, dòng lời), ...] theo timeline, text lấy từ lyrics"""
+        return timeline_lines(self.lyrics, self.lyrics_timeline)
+
+    def save(self, *args, **kwargs):
+        # Parse LRC 1 lần lúc lưu thay vì ở mỗi lần mở player
+        # (bỏ qua nếu lyrics đang bị defer, vd instance từ for_listing(): lyrics không đổi)
+        if 'lyrics' not in self.get_deferred_fields():
+            self.lyrics_timeline = parse_lrc(self.lyrics)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'lyrics' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'lyrics_timeline'}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.title} - {self.artist}"
 
@@ -54,3 +136,48 @@ class Comment(models.Model):
 
     def __str__(self):
         return f'{self.user.username} - {self.song.title}'
+
+class MediaBlob(models.Model):
+    """Số tham chiếu tới 1 file media content-addressed (xem storage.py)"""
+    name = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField(default=0)
+    refcount = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.name} ({self.refcount})'
+
+class UploadSession(models.Model):
+    """Phiên upload chia chunk (resumable) đang dở, xem music_app/uploads.py"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField(help_text="Tổng dung lượng file (bytes)")
+    offset = models.BigIntegerField(default=0, help_text="Số bytes đã nhận")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def is_complete(self):
+        return self.offset >= self.size
+
+    def __str__(self):
+        return f'{self.filename} ({self.offset}/{self.size})'
+
+class AudioFingerprint(models.Model):
+    """Chromaprint fingerprint (raw) của 1 bài hát, xem music_app/fingerprint.py"""
+    song = models.OneToOneField(Song, on_delete=models.CASCADE, related_name='fingerprint')
+    duration = models.FloatField(help_text="Độ dài audio (giây) theo fpcalc")
+    data = models.BinaryField(help_text="Mảng uint32 (fingerprint raw) dạng bytes")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'Fingerprint of {self.song_id}'
+
+class FingerprintTerm(models.Model):
+    """Inverted index: 1 term (bits cao của 1 giá trị fingerprint) → bài hát chứa nó"""
+    term = models.IntegerField()
+    song = models.ForeignKey(Song, on_delete=models.CASCADE, related_name='+')
+
+    class Meta:
+        indexes = [models.Index(fields=['term', 'song'], name='fingerprint_term_song')]
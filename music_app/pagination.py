@@ -0,0 +1,77 @@
+"""
+Paginator cho changelist admin trên bảng lớn
+
+Paginator mặc định chạy SELECT COUNT(*) trên toàn bộ kết quả ở mỗi trang
+changelist - với vài trăm nghìn bài hát (nhất là trên Postgres) đó là 1 lần
+quét cả bảng. Ở đây chỉ đếm chính xác tới `exact_limit` dòng; vượt quá thì
+dùng số dòng ước lượng mà database đã có sẵn.
+"""
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def estimate_row_count(model, using='default'):
+    """Số dòng ước lượng của bảng (không quét bảng), None nếu database không hỗ trợ"""
+    connection = connections[using]
+    table = connection.ops.quote_name(model._meta.db_table)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            # Cập nhật bởi VACUUM / ANALYZE (autovacuum); -1 nếu bảng chưa được analyze
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [table])
+        elif connection.vendor == 'sqlite':
+            # rowid lớn nhất: tra index của primary key, lệch bằng số dòng đã bị xóa
+            cursor.execute(f'SELECT MAX(rowid) FROM {table}')
+        else:
+            return None
+        row = cursor.fetchone()
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    - <= exact_limit kết quả: đếm chính xác (COUNT trên subquery có LIMIT)
+    - Không có filter/search: số dòng ước lượng của bảng; ước lượng nhỏ (<= exact_count_below)
+      thì đếm chính xác luôn vì vẫn rẻ
+    - Có filter/search: dừng ở exact_limit (chỉ duyệt được exact_limit kết quả đầu,
+      thu hẹp filter để xem tiếp)
+
+    Ước lượng có thể lớn hơn thực tế (MAX(rowid) sau khi xóa, reltuples cũ): trang
+    cuối theo ước lượng mà rỗng thì đếm chính xác lại và trả về trang cuối thật.
+    """
+
+    exact_limit = 10000
+    exact_count_below = 100000
+
+    @cached_property
+    def count(self):
+        self.estimated = False
+        queryset = self.object_list
+        bounded = queryset.order_by()[:self.exact_limit + 1].count()
+        if bounded <= self.exact_limit:
+            return bounded
+        if not queryset.query.where:
+            estimate = estimate_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate <= self.exact_count_below:
+                return queryset.order_by().count()
+            if estimate is not None:
+                self.estimated = True
+                return max(estimate, bounded)
+        return self.exact_limit
+
+    def page(self, number):
+        page = super().page(number)
+        if self.count and self.estimated and page.number > 1 and not page.object_list.exists():
+            # Ước lượng quá cao: đếm chính xác 1 lần (chỉ khi đi tới phần đuôi)
+            self.__dict__['count'] = self.object_list.order_by().count()
+            self.__dict__.pop('num_pages', None)
+            self.estimated = False
+            return super().page(min(page.number, self.num_pages))
+        return page
+
+    def get_elided_page_range(self, number=1, **kwargs):
+        # Admin truyền số trang được yêu cầu, có thể lớn hơn num_pages sau khi page() đếm lại
+        return super().get_elided_page_range(min(int(number), self.num_pages), **kwargs)
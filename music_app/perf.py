@@ -0,0 +1,154 @@
+"""
+Đo hiệu năng theo từng request (bật bằng PERF_INSTRUMENTATION=1)
+
+PerformanceMiddleware (music_app/middleware.py) tạo một RequestMetrics cho
+mỗi request và đặt vào context var; các hook ở đây cộng dồn vào đó:
+
+- SQL: connection.execute_wrapper → số query + thời gian, giữ lại câu SQL
+- Render template: InstrumentedDjangoTemplates (template backend)
+- Inference AI: perf.timer('inference') trong EmotionClassifier
+- Stream: perf.count_bytes('stream', iterator) trong stream_song - đếm số bytes thực sự
+  gửi đi (response streaming được log khi đóng, xem PerformanceMiddleware)
+
+Ngoài request (shell, management command) không có metrics nên các hook
+không làm gì cả.
+"""
+
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.template.backends.django import DjangoTemplates, Template, reraise
+from django.template.exceptions import TemplateDoesNotExist
+
+_current = ContextVar('music_app_perf_metrics', default=None)
+
+
+class RequestMetrics:
+    """Số liệu của 1 request: thời gian theo nhóm (giây), bộ đếm và danh sách query"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.timings = defaultdict(float)
+        self.counts = defaultdict(int)
+        self.queries = []
+
+    def add_time(self, name, seconds):
+        self.timings[name] += seconds
+        self.counts[name] += 1
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def sql_wrapper(self, execute, sql, params, many, context):
+        """Dùng với connection.execute_wrapper()"""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.add_time('db', duration)
+            self.queries.append((duration, context['connection'].alias, sql))
+
+
+def current():
+    """RequestMetrics của request hiện tại, None nếu instrumentation không bật."""
+    return _current.get()
+
+
+def activate(metrics):
+    return _current.set(metrics)
+
+
+def deactivate(token):
+    _current.reset(token)
+
+
+@contextmanager
+def timer(name):
+    """Cộng thời gian chạy của block vào metrics[name] (no-op khi không có request đang đo)."""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add_time(name, time.perf_counter() - started)
+
+
+def count_bytes(name, chunks):
+    """
+    Bọc iterator nội dung của response streaming: cộng số bytes mỗi khi 1 chunk
+    thực sự được gửi đi (range request, client ngắt giữa chừng đều đúng)
+
+    Metrics được lấy lúc tạo vì iterator chạy sau khi middleware đã trả response.
+    """
+    metrics = _current.get()
+    if metrics is None:
+        return chunks
+
+    def counted():
+        try:
+            for chunk in chunks:
+                metrics.counts[f'{name}_bytes'] += len(chunk)
+                yield chunk
+        finally:
+            # response.close() chỉ đóng iterator ngoài cùng này
+            if hasattr(chunks, 'close'):
+                chunks.close()
+
+    return counted()
+
+
+class CloseCallbackIterator:
+    """
+    Bọc nội dung của response streaming, gọi `callback` đúng 1 lần khi response được
+    đóng (gửi xong, client ngắt, kể cả khi chưa gửi chunk nào)
+
+    Gán vào response.streaming_content: Django đăng ký close() của nội dung
+    streaming với response.close() (API công khai, không dựa vào thuộc tính riêng).
+    """
+
+    def __init__(self, chunks, callback):
+        self._chunks = chunks
+        self._iterator = iter(chunks)
+        self._callback = callback
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._iterator)
+
+    def close(self):
+        try:
+            if hasattr(self._chunks, 'close'):
+                self._chunks.close()
+        finally:
+            # close() có thể bị gọi lồng nhau (iterator bọc response gọi lại close())
+            callback, self._callback = self._callback, None
+            if callback is not None:
+                callback()
+
+
+class InstrumentedTemplate(Template):
+    def render(self, context=None, request=None):
+        with timer('render'):
+            return super().render(context, request)
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates có đo thời gian render (gồm cả các query lazy chạy trong lúc render)"""
+
+    def from_string(self, template_code):
+        return InstrumentedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return InstrumentedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
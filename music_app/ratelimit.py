@@ -0,0 +1,73 @@
+"""
+Rate limiting cho các thao tác ghi (comment, ...)
+
+Bộ đếm theo cửa sổ thời gian cố định cho từng user, lưu trong Django cache để
+mọi worker dùng chung (khi cache là Redis/Memcached). Mỗi cửa sổ dài
+`capacity / refill_rate` giây (thời gian để nạp lại đủ `capacity` token) và cho
+phép tối đa `capacity` request → vẫn cho burst ngắn nhưng chặn spam kéo dài
+trước khi nó chạm tới database.
+
+Bộ đếm chỉ dùng cache.add() + cache.incr() (nguyên tử trên Redis / Memcached /
+LocMem), nên nhiều request song song không thể cùng đọc một giá trị cũ rồi lọt qua.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+class RateLimiter:
+    """
+    Giới hạn số request theo cửa sổ cố định, lưu trong cache
+
+    Attributes:
+        scope: Tên nhóm thao tác (vd: 'comment'), dùng làm prefix cho cache key
+        capacity: Số request tối đa trong 1 cửa sổ (kích thước burst)
+        refill_rate: Tốc độ trung bình cho phép (request/giây); 0 = không bao giờ
+            nạp lại, tổng cộng chỉ được `capacity` request
+    """
+
+    def __init__(self, scope, capacity, refill_rate):
+        self.scope = scope
+        self.capacity = int(capacity)
+        self.refill_rate = float(refill_rate)
+        self.window = self.capacity / self.refill_rate if self.refill_rate else None
+
+    def consume(self, ident, now=None):
+        """
+        Tính 1 request cho `ident`
+
+        Returns:
+            tuple: (allowed, retry_after) - retry_after là số giây cần chờ
+            khi bị từ chối (None nếu không bao giờ được phép nữa), 0 nếu được phép.
+        """
+        now = time.time() if now is None else now
+        if self.window:
+            window_index = int(now // self.window)
+            key = f'ratelimit:{self.scope}:{ident}:{window_index}'
+            # Hết hạn sau khi cửa sổ kết thúc
+            timeout = int(self.window) + 1
+        else:
+            key = f'ratelimit:{self.scope}:{ident}'
+            timeout = None
+
+        cache.add(key, 0, timeout)
+        try:
+            count = cache.incr(key)
+        except ValueError:
+            # Key vừa hết hạn giữa add() và incr()
+            cache.add(key, 0, timeout)
+            count = cache.incr(key)
+
+        if count <= self.capacity:
+            return True, 0
+        if not self.window:
+            return False, None
+        return False, (window_index + 1) * self.window - now
+
+
+def get_limiter(scope):
+    """Tạo RateLimiter từ cấu hình `RATE_LIMITS[scope]` trong settings."""
+    config = settings.RATE_LIMITS[scope]
+    return RateLimiter(scope, config['capacity'], config['refill_rate'])
@@ -0,0 +1,116 @@
+"""
+Router primary / read replica cho dữ liệu catalog (app music_app)
+
+- Đọc model của music_app → 1 replica ngẫu nhiên trong REPLICA_DATABASES
+- Ghi → default (primary); các app khác (auth, session, admin log...) luôn ở default
+- Read-your-writes: sau khi request ghi vào music_app, các lần đọc còn lại của
+  request đó đi thẳng vào primary; ReplicaPinningMiddleware (middleware.py)
+  giữ user ở primary thêm REPLICA_PIN_SECONDS giây bằng cookie, và ghim cả
+  request POST/PATCH/DELETE vào primary ngay từ đầu
+
+Ngoài request (job nền, management command), read-your-writes chỉ có hiệu lực
+bên trong `with routers.scope():` - tasks chạy mỗi job trong 1 scope riêng. Ngoài
+scope, ghi không ghim gì cả (nếu không, 1 thread / process chạy lâu sẽ bị ghim vào
+primary vĩnh viễn sau lần ghi đầu tiên).
+
+Không có replica nào được cấu hình thì mọi thứ ở default như trước.
+"""
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+
+class _PinState:
+    # Object mutable thay vì bool: view sync chạy qua sync_to_async (ASGI) làm việc trên
+    # bản copy của context, nhưng vẫn trỏ tới cùng object này
+    __slots__ = ('pinned', 'wrote')
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+_state = ContextVar('music_app_db_pin', default=None)
+
+# Bảng sổ sách nội bộ (refcount media, phiên upload) cần đọc giá trị mới nhất ngay
+# cả khi replica trễ → luôn ở primary
+PRIMARY_ONLY_MODELS = {'mediablob', 'uploadsession'}
+
+
+def pin_to_primary():
+    """Các lần đọc còn lại trong scope hiện tại (request / job) đi vào primary"""
+    state = _state.get()
+    if state is not None:
+        state.pinned = True
+
+
+def mark_write():
+    state = _state.get()
+    if state is not None:
+        state.pinned = state.wrote = True
+
+
+def has_written():
+    state = _state.get()
+    return state is not None and state.wrote
+
+
+def is_pinned():
+    state = _state.get()
+    return state is not None and state.pinned
+
+
+def activate(pinned):
+    return _state.set(_PinState(pinned))
+
+
+def deactivate(token):
+    _state.reset(token)
+
+
+@contextmanager
+def scope(pinned=False):
+    """
+    1 đơn vị công việc ngoài request: sau lần ghi đầu tiên, các lần đọc còn lại
+    trong block đi vào primary; ra khỏi block thì hết ghim
+    """
+    token = activate(pinned)
+    try:
+        yield
+    finally:
+        deactivate(token)
+
+
+class PrimaryReplicaRouter:
+    app_label = 'music_app'
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label != self.app_label or model._meta.model_name in PRIMARY_ONLY_MODELS:
+            return None
+        replicas = settings.REPLICA_DATABASES
+        # Trong transaction trên primary phải đọc cùng transaction đó
+        if not replicas or is_pinned() or connections['default'].in_atomic_block:
+            return 'default'
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label == self.app_label:
+            mark_write()
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primary và replica có cùng dữ liệu → quan hệ giữa object đọc từ 2 nơi vẫn hợp lệ
+        databases = {'default', *settings.REPLICA_DATABASES}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Replica nhận schema từ primary (replication / sync_sqlite_replicas)
+        if db in settings.REPLICA_DATABASES:
+            return False
+        return None
@@ -0,0 +1,133 @@
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import facets
+from .auth_backends import user_cache_key
+from .models import Song
+from .storage import media_storage
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """Áp dụng settings.SQLITE_PRAGMAS (WAL, synchronous, ...) cho mỗi connection SQLite mới."""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    if not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def _saved_facet_fields(instance, update_fields):
+    """Các field có facet thực sự được ghi trong lần save này"""
+    deferred = instance.get_deferred_fields()
+    return [
+        facet.field for facet in facets.FACETS
+        if facet.field not in deferred and (update_fields is None or facet.field in update_fields)
+    ]
+
+
+MEDIA_FIELDS = ('file', 'image')
+
+
+@receiver(pre_save, sender=Song)
+def remember_old_values(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Giá trị cũ (trong DB) của file/ảnh và các field có facet sắp được ghi
+
+    Lấy từ Song.from_db (_loaded_values); chỉ SELECT khi instance không được load
+    từ DB hoặc field đó bị defer lúc load.
+    """
+    instance._facet_fields = _saved_facet_fields(instance, update_fields)
+    instance._old_values = None
+    if raw or instance.pk is None:
+        return
+    deferred = instance.get_deferred_fields()
+    fields = [
+        field for field in MEDIA_FIELDS
+        if field not in deferred and (update_fields is None or field in update_fields)
+    ] + instance._facet_fields
+    loaded = getattr(instance, '_loaded_values', {})
+    missing = [field for field in fields if field not in loaded]
+    old = {field: loaded[field] for field in fields if field in loaded}
+    if missing:
+        row = Song.objects.filter(pk=instance.pk).values(*missing).first()
+        if row is None:
+            return
+        old.update(row)
+    instance._old_values = old
+
+
+@receiver(post_save, sender=Song)
+def release_replaced_media(sender, instance, raw=False, **kwargs):
+    """
+    Trả lại các tham chiếu media không còn dùng sau khi transaction commit
+
+    - File/ảnh cũ bị thay bằng file khác
+    - Tham chiếu vừa giữ bởi upload (MediaFileField) mà bản ghi đã có sẵn, vd lưu
+      lại đúng nội dung cũ → tên file không đổi
+    """
+    acquired = instance.__dict__.pop('_acquired_media', {})
+    if raw:
+        return
+    old_values = instance._old_values or {}
+    for field in MEDIA_FIELDS:
+        new_name = getattr(instance, field).name if field in instance.__dict__ else None
+        old_name = old_values.get(field)
+        released = list(acquired.get(field, []))
+        if new_name in released and old_name != new_name:
+            released.remove(new_name)
+        if old_name and field in old_values and old_name != new_name:
+            released.append(old_name)
+        for name in released:
+            transaction.on_commit(partial(media_storage.delete, name))
+
+    loaded = instance.__dict__.setdefault('_loaded_values', {})
+    for field in Song.TRACKED_FIELDS:
+        if field in instance.__dict__:
+            value = instance.__dict__[field]
+            loaded[field] = getattr(value, 'name', value)
+
+
+@receiver(post_save, sender=Song)
+def update_facet_counts(sender, instance, created, raw=False, **kwargs):
+    fields = getattr(instance, '_facet_fields', None)
+    if raw or not fields:
+        return
+    new = {field: getattr(instance, field) for field in fields}
+    old_values = instance._old_values
+    old = None if created or old_values is None else {field: old_values[field] for field in fields}
+    if old == new:
+        return
+    transaction.on_commit(partial(facets.apply_changes, [(old, new)]))
+
+
+@receiver(post_delete, sender=Song)
+def release_deleted_media(sender, instance, **kwargs):
+    """Bỏ tham chiếu tới file/ảnh của bài hát bị xóa; file chỉ mất khi không còn ai dùng."""
+    for field in ('file', 'image'):
+        name = getattr(instance, field).name
+        if name:
+            transaction.on_commit(partial(media_storage.delete, name))
+
+
+@receiver(post_delete, sender=Song)
+def update_facet_counts_on_delete(sender, instance, **kwargs):
+    old = {facet.field: getattr(instance, facet.field) for facet in facets.FACETS}
+    transaction.on_commit(partial(facets.apply_changes, [(old, None)]))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Xóa User khỏi cache của CachedModelBackend khi được lưu (đổi mật khẩu, last_login...) / xóa."""
+    cache.delete(user_cache_key(instance.pk))
@@ -0,0 +1,71 @@
+const searchInput = document.getElementById("song-search");
+const songCards = document.querySelectorAll(".song-card-wrap");
+const voiceSearchBtn = document.getElementById("voice-search-btn");
+
+searchInput?.addEventListener("input", (e) => {
+  const keyword = e.target.value.toLowerCase().trim();
+  songCards.forEach((card) => {
+    const title = card.dataset.title || "";
+    const artist = card.dataset.artist || "";
+    const match = title.includes(keyword) || artist.includes(keyword);
+    card.style.display = match ? "" : "none";
+  });
+});
+
+// Voice search functionality
+if (
+  "webkitSpeechRecognition" in window ||
+  "SpeechRecognition" in window
+) {
+  const SpeechRecognition =
+    window.SpeechRecognition || window.webkitSpeechRecognition;
+  const recognition = new SpeechRecognition();
+
+  recognition.continuous = false;
+  recognition.interimResults = false;
+  recognition.lang = "vi-VN"; // Vietnamese language
+
+  let isListening = false;
+
+  voiceSearchBtn?.addEventListener("click", () => {
+    if (isListening) {
+      recognition.stop();
+      isListening = false;
+      voiceSearchBtn.innerHTML = '<i class="fas fa-microphone"></i>';
+      voiceSearchBtn.style.color = "#e2e8f0";
+    } else {
+      recognition.start();
+      isListening = true;
+      voiceSearchBtn.innerHTML =
+        '<i class="fas fa-microphone-slash"></i>';
+      voiceSearchBtn.style.color = "#ef4444";
+    }
+  });
+
+  recognition.onresult = (event) => {
+    let transcript = event.results[0][0].transcript;
+    transcript = transcript.replace(/\.$/, ""); // Remove trailing period
+    searchInput.value = transcript;
+    searchInput.dispatchEvent(new Event("input"));
+  };
+
+  recognition.onend = () => {
+    isListening = false;
+    voiceSearchBtn.innerHTML = '<i class="fas fa-microphone"></i>';
+    voiceSearchBtn.style.color = "#e2e8f0";
+  };
+
+  recognition.onerror = (event) => {
+    console.error("Speech recognition error:", event.error);
+    isListening = false;
+    voiceSearchBtn.innerHTML = '<i class="fas fa-microphone"></i>';
+    voiceSearchBtn.style.color = "#e2e8f0";
+    alert("Lỗi nhận dạng giọng nói. Vui lòng thử lại.");
+  };
+} else {
+  voiceSearchBtn?.addEventListener("click", () => {
+    alert("Trình duyệt của bạn không hỗ trợ tìm kiếm bằng giọng nói.");
+  });
+  voiceSearchBtn.style.opacity = "0.5";
+  voiceSearchBtn.disabled = true;
+}
@@ -0,0 +1,190 @@
+// Tự động đóng modal sau khi thêm vào playlist thành công
+if (document.getElementById('player-messages')) {
+  setTimeout(function () {
+    var modal = bootstrap.Modal.getInstance(document.getElementById('addToPlaylistModal'));
+    if (modal) {
+      modal.hide();
+    }
+  }, 1500);
+}
+
+const audio = document.getElementById("audio-player");
+const playBtn = document.getElementById("play-btn");
+const progressBarContainer = document.querySelector(".custom-progress-container");
+const progress = document.querySelector(".custom-progress-fill");
+const currentTimeEl = document.getElementById("current-time");
+const totalDurationEl = document.getElementById("total-duration");
+
+let isSeeking = false; // Flag to prevent timeupdate interference
+
+playBtn.addEventListener("click", () => {
+  if (audio.paused) {
+    audio.play();
+    playBtn.innerHTML = '<i class="fas fa-pause"></i>';
+  } else {
+    audio.pause();
+    playBtn.innerHTML = '<i class="fas fa-play"></i>';
+  }
+});
+
+// Format time helper function
+const formatTime = (seconds) => {
+  if (!seconds || isNaN(seconds)) return "0:00";
+  const mins = Math.floor(seconds / 60);
+  const secs = Math.floor(seconds % 60)
+    .toString()
+    .padStart(2, "0");
+  return `${mins}:${secs}`;
+};
+
+// Update total duration when metadata loads
+audio.addEventListener("loadedmetadata", () => {
+  totalDurationEl.textContent = formatTime(audio.duration);
+});
+
+// Update progress bar and current time
+audio.addEventListener("timeupdate", () => {
+  if (isSeeking) return; // Skip updates while seeking
+  if (!audio.duration || !isFinite(audio.duration)) return;
+
+  const progressPercent = (audio.currentTime / audio.duration) * 100;
+  progress.style.width = progressPercent + "%";
+  currentTimeEl.textContent = formatTime(audio.currentTime);
+});
+
+// Seek functionality - click on progress bar to jump to position
+progressBarContainer.addEventListener("click", (e) => {
+  // Prevent default behavior AND stop propagation
+  e.preventDefault();
+  e.stopPropagation();
+
+  const rect = progressBarContainer.getBoundingClientRect();
+  const clickX = e.clientX - rect.left;
+  const width = rect.width;
+  const duration = audio.duration;
+
+  console.log("Seek Debug:", {
+    clickX,
+    width,
+    duration,
+    currentTimeBefore: audio.currentTime,
+    readyState: audio.readyState,
+    paused: audio.paused
+  });
+
+  // Check if duration is valid
+  if (!duration || !isFinite(duration) || duration === 0) {
+    console.warn("Cannot seek: audio duration not ready yet");
+    return;
+  }
+
+  const newTime = (clickX / width) * duration;
+  console.log("Calculated newTime:", newTime);
+
+  if (newTime >= 0 && newTime <= duration) {
+    isSeeking = true; // Set flag before seeking
+    audio.currentTime = newTime;
+    console.log("Set currentTime to:", newTime);
+
+    // Update UI immediately
+    const progressPercent = (newTime / duration) * 100;
+    progress.style.width = progressPercent + "%";
+    currentTimeEl.textContent = formatTime(newTime);
+  } else {
+    console.warn("Invalid seek time:", newTime);
+  }
+});
+
+// Reset seeking flag when seek completes
+audio.addEventListener("seeked", () => {
+  isSeeking = false;
+  console.log("Seek completed, currentTime:", audio.currentTime);
+});
+
+
+
+audio.addEventListener("ended", () => {
+  playBtn.innerHTML = '<i class="fas fa-play"></i>';
+});
+
+// --- Comments (AJAX) ---
+// Đăng bình luận không cần reload trang; server chỉ trả về HTML của bình luận mới.
+// Không có fetch thì form submit bình thường; lỗi mạng / response lạ chỉ báo lỗi, không
+// submit lại form (bình luận có thể đã được lưu → đăng 2 lần, bỏ qua cả rate limit).
+const commentForm = document.getElementById("comment-form");
+const commentsList = document.getElementById("comments-list");
+const commentCount = document.getElementById("comment-count");
+
+if (commentForm && window.fetch) {
+  commentForm.addEventListener("submit", (e) => {
+    e.preventDefault();
+    const submitBtn = commentForm.querySelector("button[type=submit]");
+    submitBtn.disabled = true;
+
+    fetch(commentForm.dataset.ajaxUrl, {
+      method: "POST",
+      body: new FormData(commentForm),
+      headers: { "X-Requested-With": "XMLHttpRequest" },
+      credentials: "same-origin",
+    })
+      .then((res) => res.json().then((data) => ({ ok: res.ok, data }), () => ({ ok: false, data: {} })))
+      .then(({ ok, data }) => {
+        if (!ok) {
+          alert(data.error || "Không thể đăng bình luận.");
+          return;
+        }
+        const empty = document.getElementById("comments-empty");
+        if (empty) empty.remove();
+        commentsList.insertAdjacentHTML("afterbegin", data.html);
+        commentsList.scrollTop = 0;
+        commentCount.textContent = parseInt(commentCount.textContent, 10) + 1;
+        commentForm.reset();
+      })
+      .catch(() => alert("Không thể đăng bình luận, vui lòng tải lại trang."))
+      .finally(() => {
+        submitBtn.disabled = false;
+      });
+  });
+}
+
+// --- Synced Lyrics Logic ---
+// Timeline LRC đã được parse sẵn ở server (Song.lyrics_timeline); các dòng đã render trong HTML,
+// ở đây chỉ cần mảng thời gian (tăng dần) để tìm dòng đang hát bằng binary search.
+const lyricsTimesEl = document.getElementById("lyrics-times");
+const lyricsTimes = lyricsTimesEl ? JSON.parse(lyricsTimesEl.textContent) : [];
+const lyricsLines = document.getElementById("lyrics-content").getElementsByClassName("lyrics-line");
+let activeLyricIndex = -1;
+
+// Index của dòng cuối cùng có time <= t, -1 nếu chưa tới dòng đầu tiên
+const findLyricIndex = (t) => {
+  let lo = 0;
+  let hi = lyricsTimes.length - 1;
+  let found = -1;
+  while (lo <= hi) {
+    const mid = (lo + hi) >> 1;
+    if (lyricsTimes[mid] <= t) {
+      found = mid;
+      lo = mid + 1;
+    } else {
+      hi = mid - 1;
+    }
+  }
+  return found;
+};
+
+// Update active line: chỉ đụng tới dòng cũ và dòng mới khi dòng đang hát thay đổi
+audio.addEventListener("timeupdate", () => {
+  if (!lyricsTimes.length) return;
+
+  const index = findLyricIndex(audio.currentTime);
+  if (index === activeLyricIndex) return;
+
+  if (activeLyricIndex >= 0) {
+    lyricsLines[activeLyricIndex].classList.remove("active");
+  }
+  if (index >= 0) {
+    lyricsLines[index].classList.add("active");
+    lyricsLines[index].scrollIntoView({ behavior: "smooth", block: "center" });
+  }
+  activeLyricIndex = index;
+});
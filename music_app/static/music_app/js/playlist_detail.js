@@ -0,0 +1,6 @@
+function playFirstSong() {
+  const firstSong = document.querySelector(".song-card-wrap a");
+  if (firstSong) {
+    window.location.href = firstSong.href;
+  }
+}
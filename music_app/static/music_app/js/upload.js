@@ -0,0 +1,114 @@
+document.addEventListener('DOMContentLoaded', function () {
+  var inputs = document.querySelectorAll('input:not([type="checkbox"]):not([type="radio"]), textarea, select');
+  inputs.forEach(function (input) {
+    input.classList.add('form-control');
+  });
+});
+
+// --- Resumable chunked upload (xem music_app/uploads.py) ---
+// File lớn hơn 1 chunk được gửi từng phần; mất mạng thì hỏi server offset hiện tại rồi gửi tiếp.
+// File nhỏ / trình duyệt cũ vẫn dùng form POST bình thường.
+(function () {
+  const form = document.getElementById('upload-form');
+  const fileInput = form.querySelector('input[type="file"][name="file"]');
+  const uploadBtn = document.getElementById('upload-btn');
+  const errorBox = document.getElementById('upload-error');
+  const chunkSize = parseInt(form.dataset.chunkSize, 10);
+  const csrfToken = form.querySelector('[name=csrfmiddlewaretoken]').value;
+  const MAX_RETRIES = 5;
+
+  const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+  const showError = (msg) => {
+    errorBox.textContent = msg;
+    errorBox.classList.remove('d-none');
+  };
+  const setProgress = (sent, total) => {
+    uploadBtn.innerHTML = '<i class="fas fa-spinner fa-spin me-2"></i>Uploading ' +
+      Math.floor((sent / total) * 100) + '%';
+  };
+
+  const checksum = async (blob) => {
+    if (!window.crypto || !crypto.subtle) return null; // chỉ có trên HTTPS/localhost
+    const digest = await crypto.subtle.digest('SHA-256', await blob.arrayBuffer());
+    return 'sha256 ' + btoa(String.fromCharCode(...new Uint8Array(digest)));
+  };
+
+  // Tạo phiên mới, hoặc dùng lại phiên dở dang của cùng file (lưu trong localStorage)
+  const openSession = async (file) => {
+    const key = 'upload:' + [file.name, file.size, file.lastModified].join(':');
+    const saved = localStorage.getItem(key);
+    if (saved) {
+      const res = await fetch(saved, { method: 'HEAD', credentials: 'same-origin' });
+      if (res.ok) return { key, url: saved, offset: parseInt(res.headers.get('Upload-Offset'), 10) };
+      localStorage.removeItem(key);
+    }
+    const body = new FormData();
+    body.append('filename', file.name);
+    body.append('size', file.size);
+    const res = await fetch(form.dataset.chunkedUrl, {
+      method: 'POST', body, credentials: 'same-origin', headers: { 'X-CSRFToken': csrfToken },
+    });
+    if (!res.ok) throw new Error((await res.json()).error || 'Cannot start upload');
+    const url = res.headers.get('Location');
+    localStorage.setItem(key, url);
+    return { key, url, offset: 0 };
+  };
+
+  const sendChunks = async (file, session) => {
+    let offset = session.offset;
+    let retries = 0;
+    while (offset < file.size) {
+      const chunk = file.slice(offset, offset + chunkSize);
+      const headers = { 'X-CSRFToken': csrfToken, 'Upload-Offset': String(offset) };
+      const sum = await checksum(chunk);
+      if (sum) headers['Upload-Checksum'] = sum;
+      try {
+        const res = await fetch(session.url, { method: 'PATCH', body: chunk, headers, credentials: 'same-origin' });
+        const serverOffset = parseInt(res.headers.get('Upload-Offset'), 10);
+        if (res.ok) {
+          offset = serverOffset;
+          retries = 0;
+        } else if (res.status === 409 || res.status === 460) {
+          // Gửi lại từ offset server đang giữ; lệch mãi không hết thì dừng
+          if (++retries > MAX_RETRIES) throw new Error((await res.json()).error || 'Upload failed');
+          offset = serverOffset;
+        } else {
+          throw new Error((await res.json()).error || 'Upload failed');
+        }
+      } catch (err) {
+        if (++retries > MAX_RETRIES) throw err;
+        await sleep(1000 * retries);
+        const res = await fetch(session.url, { method: 'HEAD', credentials: 'same-origin' });
+        if (res.ok) offset = parseInt(res.headers.get('Upload-Offset'), 10);
+      }
+      setProgress(offset, file.size);
+    }
+  };
+
+  form.addEventListener('submit', async (e) => {
+    const file = fileInput.files[0];
+    if (!file || file.size <= chunkSize || !window.fetch) return;
+    e.preventDefault();
+    errorBox.classList.add('d-none');
+    uploadBtn.disabled = true;
+
+    try {
+      const session = await openSession(file);
+      await sendChunks(file, session);
+
+      const body = new FormData(form);
+      body.delete('file');
+      const res = await fetch(session.url + 'complete/', {
+        method: 'POST', body, credentials: 'same-origin', headers: { 'X-CSRFToken': csrfToken },
+      });
+      const data = await res.json();
+      if (!res.ok) throw new Error(data.error || JSON.stringify(data.errors));
+      localStorage.removeItem(session.key);
+      window.location = data.redirect;
+    } catch (err) {
+      showError(err.message);
+      uploadBtn.disabled = false;
+      uploadBtn.innerHTML = '<i class="fas fa-upload me-2"></i>Upload Song';
+    }
+  });
+})();
@@ -0,0 +1,115 @@
+"""
+Pipeline static files: hash tên file + minify + nén sẵn gzip/brotli
+
+`python manage.py collectstatic` với MinifiedManifestStaticFilesStorage sẽ:
+
+1. Đặt tên file theo hash nội dung (ManifestStaticFilesStorage), vd:
+   music_app/css/home.css → music_app/css/home.3f2a9c1b7d4e.css, và ghi
+   staticfiles.json để {% static %} trả về tên đã hash
+2. Minify CSS (bộ minify đơn giản ở dưới) và JS (cần `rjsmin`, optional)
+3. Ghi thêm bản .gz (và .br nếu có thư viện `brotli`) cạnh mỗi file text
+
+PrecompressedStaticMiddleware (music_app/middleware.py) phục vụ các file này
+với bản nén phù hợp Accept-Encoding và header Cache-Control immutable.
+"""
+
+import gzip
+import re
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import rjsmin
+except ImportError:  # rjsmin là optional: thiếu thì JS chỉ được nén, không minify
+    rjsmin = None
+
+try:
+    import brotli
+except ImportError:  # brotli là optional: thiếu thì chỉ có bản .gz
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.txt', '.html', '.map', '.xml')
+
+# Bản nén nhỏ hơn bản gốc chưa tới 5% thì không đáng giữ
+MIN_COMPRESSION_RATIO = 0.95
+
+_CSS_STRING_OR_COMMENT = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')|/\*.*?\*/', re.S)
+_CSS_STRING = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')')
+
+
+def minify_css(css):
+    """Bỏ comment, khoảng trắng thừa và ';' cuối block (không đụng tới nội dung chuỗi)"""
+    css = _CSS_STRING_OR_COMMENT.sub(lambda m: m.group(1) or '', css)
+    parts = _CSS_STRING.split(css)
+    # Phần tử lẻ là chuỗi "..." / '...', giữ nguyên
+    for i in range(0, len(parts), 2):
+        part = re.sub(r'\s+', ' ', parts[i])
+        part = re.sub(r'\s*([{};,>])\s*', r'\1', part)
+        part = re.sub(r':\s+', ':', part)
+        parts[i] = part.replace(';}', '}')
+    return ''.join(parts).strip()
+
+
+def minify_js(js):
+    if rjsmin is None:
+        return js
+    return rjsmin.jsmin(js)
+
+
+MINIFIERS = {
+    '.css': minify_css,
+    '.js': minify_js,
+}
+
+
+class MinifiedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """ManifestStaticFilesStorage + minify CSS/JS + ghi bản .gz/.br nén sẵn"""
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        # hashed_files: tên gốc → tên hash cuối cùng (bỏ qua các bản trung gian của CSS có url())
+        for hashed_name in sorted(set(self.hashed_files.values())):
+            self._minify(hashed_name)
+            yield from self._compress(hashed_name)
+
+    def _minify(self, name):
+        """
+        Minify tại chỗ file đã hash. Hash vẫn tính trên nguồn chưa minify nên
+        vẫn đổi khi nguồn đổi (đủ để cache busting).
+        """
+        minifier = MINIFIERS.get(self._extension(name))
+        if minifier is None or name.endswith('.min' + self._extension(name)):
+            return
+        with self.open(name) as f:
+            try:
+                source = f.read().decode('utf-8')
+            except UnicodeDecodeError:
+                return
+        minified = minifier(source)
+        if len(minified) < len(source):
+            self.delete(name)
+            self._save(name, ContentFile(minified.encode('utf-8')))
+
+    def _compress(self, name):
+        if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+            return
+        with self.open(name) as f:
+            content = f.read()
+        variants = [('.gz', gzip.compress(content, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(content)))
+        for suffix, compressed in variants:
+            if len(compressed) >= len(content) * MIN_COMPRESSION_RATIO:
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(compressed))
+            yield name + suffix, name + suffix, True
+
+    @staticmethod
+    def _extension(name):
+        dot = name.rfind('.')
+        return name[dot:] if dot != -1 else ''
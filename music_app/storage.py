@@ -0,0 +1,211 @@
+"""
+Content-addressed storage cho file media (audio, ảnh bìa)
+
+Mỗi file upload được hash SHA-256 ngay trong lúc ghi xuống đĩa (không đọc
+lại lần 2) và lưu theo digest:
+
+    songs/noi_nay_co_anh.mp3  →  songs/3f/3f9a...c2.mp3
+
+Upload trùng nội dung chỉ tạo thêm 1 tham chiếu (MediaBlob.refcount) chứ
+không tốn thêm dung lượng; file chỉ bị xóa khi không còn bản ghi nào dùng.
+Digest trong tên file cũng được dùng làm ETag ổn định khi stream.
+
+File cũ (lưu theo tên trước khi có storage này) vẫn đọc bình thường, chỉ
+không được đếm tham chiếu.
+
+Mỗi lần storage.save() giữ 1 tham chiếu cho bản ghi sẽ trỏ tới file đó.
+MediaFileField / MediaImageField ghi lại các tham chiếu này trên instance để
+signal post_save (music_app/signals.py) trả lại tham chiếu thừa, vd khi lưu
+lại đúng nội dung cũ (tên file không đổi).
+"""
+
+import hashlib
+import os
+import posixpath
+import re
+import shutil
+import tempfile
+
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.db.models.fields.files import FieldFile, ImageFieldFile
+from django.utils.deconstruct import deconstructible
+
+_DIGEST_NAME = re.compile(r'^([0-9a-f]{64})(\.[^./]*)?$')
+
+
+def digest_from_name(name):
+    """Trả về SHA-256 digest nếu `name` là file content-addressed, ngược lại None."""
+    if not name:
+        return None
+    match = _DIGEST_NAME.match(posixpath.basename(name))
+    return match.group(1) if match else None
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    FileSystemStorage lưu file theo SHA-256 của nội dung
+
+    upload_to của field (vd: 'songs/') vẫn quyết định thư mục gốc; tên file
+    gốc chỉ còn giữ lại phần đuôi (.mp3, .jpg, ...).
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # Tên cuối cùng được quyết định trong _save() theo nội dung, không cần thêm hậu tố ngẫu nhiên
+        return name
+
+    def _save(self, name, content):
+        directory = posixpath.dirname(name)
+        os.makedirs(self.path(directory), exist_ok=True)
+
+        hasher = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.path(directory), suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                for chunk in content.chunks():
+                    hasher.update(chunk)
+                    tmp.write(chunk)
+                    size += len(chunk)
+
+            final_name = self._digest_name(name, hasher.hexdigest())
+            self._acquire(final_name, size, tmp_path)
+        finally:
+            if os.path.exists(tmp_path):
+                # Trùng nội dung → giữ bản đã có, bỏ bản vừa ghi (hoặc lỗi giữa chừng)
+                os.remove(tmp_path)
+        return final_name
+
+    @staticmethod
+    def _digest_name(name, digest):
+        extension = os.path.splitext(name)[1].lower()
+        return posixpath.join(posixpath.dirname(name), digest[:2], digest + extension)
+
+    def save_existing(self, name, path, digest=None):
+        """
+        Lưu file `path` đã có sẵn trên đĩa (vd file ghép từ upload chia chunk) bằng
+        cách chuyển file vào chỗ thay vì copy nội dung; `digest` (SHA-256 hex) đã
+        tính trước thì không đọc lại file. `path` không còn tồn tại sau khi gọi.
+
+        Returns:
+            str: Tên file content-addressed
+        """
+        if digest is None:
+            hasher = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(64 * 1024), b''):
+                    hasher.update(block)
+            digest = hasher.hexdigest()
+        final_name = self._digest_name(name, digest)
+        try:
+            self._acquire(final_name, os.path.getsize(path), path)
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+        return final_name
+
+    def _acquire(self, name, size, tmp_path):
+        """
+        +1 tham chiếu tới `name` và đảm bảo file có trên đĩa (chuyển tmp_path vào nếu chưa có)
+
+        Tăng refcount trước (UPDATE giữ row lock / write lock SQLite tới khi commit)
+        rồi mới kiểm tra file: delete() đồng thời phải chờ, nên không thể xóa file
+        giữa lúc kiểm tra và lúc tham chiếu được ghi nhận.
+        """
+        MediaBlob = apps.get_model('music_app', 'MediaBlob')
+        with transaction.atomic():
+            if not MediaBlob.objects.filter(name=name).update(refcount=F('refcount') + 1):
+                try:
+                    with transaction.atomic():
+                        MediaBlob.objects.create(name=name, size=size, refcount=1)
+                except IntegrityError:
+                    # Request khác vừa tạo cùng blob
+                    MediaBlob.objects.filter(name=name).update(refcount=F('refcount') + 1)
+            final_path = self.path(name)
+            if tmp_path is not None and not os.path.exists(final_path):
+                os.makedirs(os.path.dirname(final_path), exist_ok=True)
+                # Cùng thư mục / ổ đĩa: rename; khác ổ đĩa (vd CHUNKED_UPLOAD_DIR) thì copy
+                shutil.move(tmp_path, final_path)
+                os.chmod(final_path, self.file_permissions_mode or 0o644)
+
+    def add_reference(self, name):
+        """
+        +1 tham chiếu tới file content-addressed đã có trên đĩa, cho bản ghi được ghi
+        thẳng tên file mà không qua save() (vd import_catalog); file thường thì bỏ qua
+        """
+        if not digest_from_name(name):
+            return
+        size = os.path.getsize(self.path(name)) if self.exists(name) else 0
+        self._acquire(name, size, None)
+
+    def delete(self, name):
+        """
+        Bỏ 1 tham chiếu tới `name`; file chỉ bị xóa khỏi đĩa khi không còn tham chiếu nào
+
+        File không được đếm tham chiếu (file cũ) thì giữ nguyên, giống hành vi
+        trước đây là không bao giờ tự xóa media.
+        """
+        if not digest_from_name(name):
+            return
+        MediaBlob = apps.get_model('music_app', 'MediaBlob')
+        # Giảm + xóa file trong cùng transaction (xem _acquire)
+        with transaction.atomic():
+            MediaBlob.objects.filter(name=name, refcount__gt=0).update(refcount=F('refcount') - 1)
+            deleted, _ = MediaBlob.objects.filter(name=name, refcount__lte=0).delete()
+            if deleted:
+                super().delete(name)
+
+
+media_storage = ContentAddressedStorage()
+
+
+class _TrackedFieldFileMixin:
+    """Ghi lại tên file mà mỗi lần save() đã giữ tham chiếu (instance._acquired_media)"""
+
+    def save(self, name, content, save=True):
+        super().save(name, content, save=False)
+        self._record_acquired()
+        if save:
+            self.instance.save()
+
+    def save_existing(self, name, path, digest=None, save=True):
+        """Như save() nhưng chuyển file `path` có sẵn vào storage (ContentAddressedStorage.save_existing)"""
+        name = self.field.generate_filename(self.instance, name)
+        self.name = self.storage.save_existing(name, path, digest)
+        setattr(self.instance, self.field.attname, self.name)
+        self._committed = True
+        self._record_acquired()
+        if save:
+            self.instance.save()
+
+    def _record_acquired(self):
+        acquired = self.instance.__dict__.setdefault('_acquired_media', {})
+        acquired.setdefault(self.field.attname, []).append(self.name)
+
+
+class MediaFieldFile(_TrackedFieldFileMixin, FieldFile):
+    pass
+
+
+class MediaImageFieldFile(_TrackedFieldFileMixin, ImageFieldFile):
+    pass
+
+
+class MediaFileField(models.FileField):
+    attr_class = MediaFieldFile
+
+    def deconstruct(self):
+        # Với migration đây vẫn là FileField thường
+        name, path, args, kwargs = super().deconstruct()
+        return name, 'django.db.models.FileField', args, kwargs
+
+
+class MediaImageField(models.ImageField):
+    attr_class = MediaImageFieldFile
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        return name, 'django.db.models.ImageField', args, kwargs
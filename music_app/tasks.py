@@ -0,0 +1,354 @@
+"""
+Background jobs chạy trong process hiện tại
+
+Dự án chưa dùng Celery/RQ, nên các việc nặng (phân loại cảm xúc, đọc
+metadata file audio) được đẩy vào một thread pool nhỏ. Request/command chỉ
+cần enqueue rồi trả về ngay; job tự mở và đóng DB connection riêng.
+
+Usage:
+    from music_app import tasks
+
+    tasks.enqueue(tasks.classify_songs, [1, 2, 3])
+    tasks.wait()   # chỉ cần trong management command (process sắp thoát)
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+try:
+    import fcntl
+except ImportError:  # Windows: không có flock
+    fcntl = None
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, connection
+from django.utils import timezone
+
+from . import facets, routers
+
+try:
+    from mutagen import File as MutagenFile
+except ImportError:  # mutagen là optional: thiếu thì bỏ qua bước đọc metadata
+    MutagenFile = None
+
+logger = logging.getLogger(__name__)
+
+# 1 worker: model AI và SQLite đều không hưởng lợi từ nhiều job ghi song song
+MAX_WORKERS = 1
+
+# Số bài hát xử lý (và ghi lại) mỗi lần
+BATCH_SIZE = 32
+
+# Số bài 'pending' tối đa được phân loại lại mỗi lần chạy run_maintenance
+MAINTENANCE_CLASSIFY_LIMIT = 1000
+
+_executor = None
+_pending = set()
+_periodic = {}
+_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='music-task')
+        return _executor
+
+
+def _run(func, args, kwargs):
+    close_old_connections()
+    try:
+        # Read-your-writes (routers.py) trong phạm vi 1 job
+        with routers.scope():
+            return func(*args, **kwargs)
+    except Exception:
+        logger.exception(f"Background task {func.__name__} failed")
+        raise
+    finally:
+        connection.close()
+
+
+def enqueue(func, *args, **kwargs):
+    """Đưa func(*args, **kwargs) vào hàng đợi chạy nền, trả về Future."""
+    future = _get_executor().submit(_run, func, args, kwargs)
+    with _lock:
+        _pending.add(future)
+    future.add_done_callback(_discard)
+    return future
+
+
+def _discard(future):
+    with _lock:
+        _pending.discard(future)
+
+
+def wait():
+    """Chờ tất cả job đang chờ/đang chạy hoàn thành."""
+    while True:
+        with _lock:
+            futures = list(_pending)
+        if not futures:
+            return
+        for future in futures:
+            try:
+                future.result()
+            except Exception:
+                pass  # đã được log trong _run
+
+
+def _claim_period(name, interval):
+    """
+    True nếu process hiện tại được chạy job `name` trong chu kỳ này
+
+    Có SHARED_CACHE: cache.add() (nguyên tử trên Redis) → 1 worker / chu kỳ trên
+    toàn hệ thống. Không có (LocMem chỉ trong 1 process): flock trên 1 file trong
+    PERIODIC_LOCK_DIR, file giữ thời điểm chạy gần nhất → 1 worker / chu kỳ trên
+    mỗi máy.
+    """
+    if settings.SHARED_CACHE:
+        return cache.add(f'periodic:{name}', 1, interval)
+    if fcntl is None:
+        return True  # Windows: thường chỉ có 1 process (runserver)
+
+    os.makedirs(settings.PERIODIC_LOCK_DIR, exist_ok=True)
+    with open(os.path.join(settings.PERIODIC_LOCK_DIR, f'{name}.lock'), 'a+') as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False  # worker khác đang giữ lock
+        lock_file.seek(0)
+        try:
+            last_run = float(lock_file.read() or 0)
+        except ValueError:
+            last_run = 0
+        now = time.time()
+        if now - last_run < interval:
+            return False
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(str(now))
+        return True
+
+
+def start_periodic(func, interval, name=None):
+    """
+    Chạy func() mỗi `interval` giây trong 1 daemon thread của process hiện tại
+
+    Khi có nhiều worker, mỗi chu kỳ chỉ 1 worker thực sự chạy job (_claim_period).
+    """
+    name = name or func.__name__
+
+    def loop():
+        while True:
+            time.sleep(interval)
+            if not _claim_period(name, interval):
+                continue
+            try:
+                _run(func, (), {})
+            except Exception:
+                pass  # đã được log trong _run
+
+    with _lock:
+        # Mỗi process chỉ 1 thread cho mỗi job (middleware có thể được load nhiều lần)
+        if name not in _periodic:
+            _periodic[name] = threading.Thread(target=loop, name=f'music-periodic-{name}', daemon=True)
+            _periodic[name].start()
+        return _periodic[name]
+
+
+def _batches(items, size=BATCH_SIZE):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def request_classification(song_ids):
+    """
+    Đánh dấu các bài cần phân loại cảm xúc (emotion_status='pending') và chạy nền
+    nếu có inference server
+
+    Không có EMOTION_INFERENCE_SERVER thì không chạy trong process hiện tại (process
+    web sẽ phải load transformers + model): các bài nằm chờ tới khi chạy
+    `manage.py classify_songs`.
+
+    Returns:
+        bool: True nếu job đã được đưa vào hàng đợi
+    """
+    from .ml_models import EMOTION_INFERENCE_SERVER
+    from .models import Song
+
+    Song.objects.filter(pk__in=song_ids).update(emotion_status='pending')
+    if not EMOTION_INFERENCE_SERVER:
+        return False
+    enqueue(classify_songs, song_ids)
+    return True
+
+
+def classify_songs(song_ids):
+    """
+    Phân loại cảm xúc cho các bài hát theo batch (1 forward pass / batch, 1 UPDATE / batch)
+
+    emotion_status của mỗi bài được cập nhật theo kết quả: done, skipped (lyrics
+    không hợp lệ) hoặc failed (lỗi model / inference server, chạy lại được).
+
+    Returns:
+        int: Số bài hát đã được phân loại
+    """
+    from .ml_models import get_emotion_classifier
+    from .models import Song
+
+    classifier = get_emotion_classifier()
+    classified = 0
+
+    for batch_ids in _batches(song_ids):
+        songs = list(Song.objects.filter(pk__in=batch_ids).only('id', 'lyrics', 'emotion'))
+        results = classifier.predict_batch([song.lyrics for song in songs])
+
+        updated = []
+        changes = []
+        skipped = []
+        failed = []
+        for song, result in zip(songs, results):
+            if isinstance(result, dict) and 'emotion' in result:
+                changes.append(({'emotion': song.emotion}, {'emotion': result['emotion']}))
+                song.emotion = result['emotion']
+                song.emotion_confidence = result['confidence']
+                song.emotion_status = 'done'
+                updated.append(song)
+            elif result is None:
+                skipped.append(song.pk)
+            else:
+                failed.append(song.pk)
+
+        Song.objects.bulk_update(updated, ['emotion', 'emotion_confidence', 'emotion_status'])
+        Song.objects.filter(pk__in=skipped).update(emotion_status='skipped')
+        Song.objects.filter(pk__in=failed).update(emotion_status='failed')
+        # bulk_update không gửi signal → tự cập nhật facet counts
+        facets.apply_changes(changes)
+        classified += len(updated)
+
+    logger.info(f"Classified {classified}/{len(song_ids)} songs")
+    return classified
+
+
+def classify_pending(include_failed=False, limit=None):
+    """
+    Chạy lại phân loại cho các bài còn 'pending' (job bị mất khi process restart)
+    và tuỳ chọn cả các bài 'failed'
+
+    Returns:
+        int: Số bài hát đã được phân loại
+    """
+    from .models import Song
+
+    statuses = ['pending', 'failed'] if include_failed else ['pending']
+    song_ids = list(Song.objects.filter(emotion_status__in=statuses).order_by('pk').values_list('pk', flat=True)[:limit])
+    if not song_ids:
+        return 0
+    return classify_songs(song_ids)
+
+
+def ingest_song_metadata(song_ids):
+    """
+    Đọc metadata từ file audio (hiện tại: duration) và lưu vào Song
+
+    Cần thư viện `mutagen`; nếu chưa cài thì bỏ qua.
+
+    Returns:
+        int: Số bài hát đã được cập nhật
+    """
+    from .models import Song
+
+    if MutagenFile is None:
+        logger.warning("mutagen is not installed, skipping metadata ingest")
+        return 0
+
+    ingested = 0
+    for batch_ids in _batches(song_ids):
+        songs = list(Song.objects.filter(pk__in=batch_ids).only('id', 'file', 'duration'))
+
+        updated = []
+        for song in songs:
+            if not song.file or not os.path.exists(song.file.path):
+                continue
+            try:
+                audio = MutagenFile(song.file.path)
+            except Exception as e:
+                logger.warning(f"Cannot read metadata of song {song.id}: {e}")
+                continue
+            if audio is not None and getattr(audio, 'info', None) is not None:
+                song.duration = timedelta(seconds=round(audio.info.length))
+                updated.append(song)
+
+        Song.objects.bulk_update(updated, ['duration'])
+        ingested += len(updated)
+
+    logger.info(f"Ingested metadata for {ingested}/{len(song_ids)} songs")
+    return ingested
+
+
+def fingerprint_songs(song_ids):
+    """
+    Fingerprint + đưa vào index các bài hát (theo thứ tự id, để bản trùng trỏ về bài cũ nhất)
+
+    Returns:
+        int: Số bài được đánh dấu là bản trùng
+    """
+    from . import fingerprint
+    from .models import Song
+
+    duplicates = 0
+    for batch_ids in _batches(sorted(song_ids)):
+        for song in Song.objects.filter(pk__in=batch_ids).order_by('pk'):
+            if not song.file or not os.path.exists(song.file.path):
+                continue
+            if fingerprint.ingest(song) is not None:
+                duplicates += 1
+
+    logger.info(f"Fingerprinted {len(song_ids)} songs, {duplicates} duplicates found")
+    return duplicates
+
+
+def prune_expired_sessions(batch_size=1000):
+    """
+    Xóa session hết hạn khỏi bảng django_session (giống `manage.py clearsessions`
+    nhưng theo batch để không giữ lock lâu)
+
+    Returns:
+        int: Số session đã xóa
+    """
+    from django.contrib.sessions.models import Session
+
+    deleted = 0
+    while True:
+        keys = list(
+            Session.objects.filter(expire_date__lt=timezone.now()).values_list('pk', flat=True)[:batch_size]
+        )
+        if not keys:
+            break
+        Session.objects.filter(pk__in=keys).delete()
+        deleted += len(keys)
+
+    if deleted:
+        logger.info(f"Pruned {deleted} expired sessions")
+    return deleted
+
+
+def run_maintenance():
+    """
+    Job định kỳ của process web: dọn session hết hạn và phiên upload bỏ dở; chạy lại
+    phân loại cảm xúc còn dang dở nếu có inference server (không load model trong process web)
+    """
+    from . import uploads
+    from .ml_models import EMOTION_INFERENCE_SERVER
+
+    prune_expired_sessions()
+    uploads.purge_expired()
+    if EMOTION_INFERENCE_SERVER:
+        classify_pending(limit=MAINTENANCE_CLASSIFY_LIMIT)
@@ -1,3 +1,616 @@
-from django.test import TestCase
+import base64
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import connections
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from . import facets, ml_models, perf, routers, tasks, uploads
+from .management.commands.profile_startup import Command as ProfileStartupCommand
+from .lyrics import parse_lrc, timeline_lines
+from .models import Comment, MediaBlob, Song, UploadSession
+from .middleware import PerformanceMiddleware, PrecompressedStaticMiddleware
+from .pagination import EstimatedCountPaginator
+from .ratelimit import RateLimiter
+from .storage import digest_from_name
+
+
+# Manifest storage cần collectstatic trước khi render template
+plain_staticfiles = override_settings(STORAGES={
+    **settings.STORAGES,
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+})
+
+
+@plain_staticfiles
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    Router primary / replica (routers.py) + ReplicaPinningMiddleware
+
+    Chạy với 2 replica giả lập: `manage.py test` tự thêm replica_1, replica_2 (TEST
+    MIRROR của default, xem settings), hoặc SQLITE_REPLICA_PATHS=... như khi dùng
+    sync_sqlite_replicas. TransactionTestCase vì trong transaction (TestCase) router
+    luôn đọc từ primary.
+    """
+
+    databases = '__all__'
+
+    def setUp(self):
+        self.assertGreaterEqual(len(settings.REPLICA_DATABASES), 2)
+        self.song = Song.objects.create(title='Song', artist='Artist', file='songs/a.mp3')
+        self.user = User.objects.create_user('listener', password='secret')
+
+    def capture(self):
+        return {alias: CaptureQueriesContext(connections[alias]) for alias in ['default', *settings.REPLICA_DATABASES]}
+
+    def run_captured(self, func):
+        contexts = self.capture()
+        for context in contexts.values():
+            context.__enter__()
+        try:
+            func()
+        finally:
+            for context in contexts.values():
+                context.__exit__(None, None, None)
+        return {
+            alias: [query['sql'] for query in context.captured_queries if 'music_app_song' in query['sql']]
+            for alias, context in contexts.items()
+        }
+
+    def replica_queries(self, queries):
+        return sum(len(queries[alias]) for alias in settings.REPLICA_DATABASES)
+
+    def test_unpinned_reads_go_to_a_replica(self):
+        queries = self.run_captured(lambda: list(Song.objects.all()))
+        self.assertEqual(queries['default'], [])
+        self.assertEqual(self.replica_queries(queries), 1)
+
+    def test_pinned_reads_go_to_primary(self):
+        with routers.scope(pinned=True):
+            queries = self.run_captured(lambda: list(Song.objects.all()))
+        self.assertEqual(len(queries['default']), 1)
+        self.assertEqual(self.replica_queries(queries), 0)
+
+    def test_write_pins_only_until_scope_ends(self):
+        def write_then_read():
+            with routers.scope():
+                Song.objects.filter(pk=self.song.pk).update(title='Renamed')
+                list(Song.objects.all())
+            list(Song.objects.all())
+
+        queries = self.run_captured(write_then_read)
+        # UPDATE + SELECT trong scope ở primary, SELECT sau scope ở replica
+        self.assertEqual(len(queries['default']), 2)
+        self.assertEqual(self.replica_queries(queries), 1)
+
+    def test_write_outside_scope_does_not_pin(self):
+        Song.objects.filter(pk=self.song.pk).update(title='Renamed')
+        self.assertFalse(routers.is_pinned())
+        self.assertIn(Song.objects.all().db, settings.REPLICA_DATABASES)
+
+    def test_pin_cookie_after_write(self):
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('add_comment_ajax', args=[self.song.pk]), {'content': 'Hay quá'})
+        self.assertEqual(response.status_code, 201)
+        self.assertIn('db_pin', response.cookies)
+
+        # Cookie còn hạn → đọc catalog từ primary
+        queries = self.run_captured(lambda: self.client.get(reverse('home')))
+        self.assertTrue(queries['default'])
+        self.assertEqual(self.replica_queries(queries), 0)
+
+        # Hết hạn cookie → quay lại replica
+        self.client.cookies.pop('db_pin')
+        queries = self.run_captured(lambda: self.client.get(reverse('home')))
+        self.assertEqual(queries['default'], [])
+        self.assertGreater(self.replica_queries(queries), 0)
+
+
+class RateLimiterTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_capacity_per_window(self):
+        limiter = RateLimiter('test', capacity=3, refill_rate=3 / 60)
+        results = [limiter.consume(1, now=1000.0) for _ in range(4)]
+        self.assertEqual([allowed for allowed, _ in results], [True, True, True, False])
+        # Cửa sổ [960, 1020) → chờ tới 1020
+        self.assertAlmostEqual(results[-1][1], 20.0)
+        self.assertTrue(limiter.consume(2, now=1000.0)[0])
+        self.assertTrue(limiter.consume(1, now=1020.0)[0])
+
+    def test_no_refill_never_allows_again(self):
+        limiter = RateLimiter('test', capacity=1, refill_rate=0)
+        self.assertEqual(limiter.consume(1), (True, 0))
+        self.assertEqual(limiter.consume(1), (False, None))
+
+
+@override_settings(RATE_LIMITS={'comment': {'capacity': 2, 'refill_rate': 2 / 60}})
+class CommentRateLimitTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.song = Song.objects.create(title='Song', artist='Artist', file='songs/a.mp3')
+        self.user = User.objects.create_user('listener', password='secret')
+        self.client.force_login(self.user)
+        self.url = reverse('add_comment_ajax', args=[self.song.pk])
+
+    def test_ajax_returns_429_after_capacity(self):
+        statuses = [self.client.post(self.url, {'content': f'Bình luận {i}'}).status_code for i in range(3)]
+        self.assertEqual(statuses, [201, 201, 429])
+        response = self.client.post(self.url, {'content': 'Nữa'})
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(Comment.objects.filter(song=self.song).count(), 2)
+
+    @override_settings(RATE_LIMITS={'comment': {'capacity': 1, 'refill_rate': 0}})
+    def test_no_refill_is_still_rate_limited(self):
+        self.assertEqual(self.client.post(self.url, {'content': 'Một'}).status_code, 201)
+        response = self.client.post(self.url, {'content': 'Hai'})
+        self.assertEqual(response.status_code, 429)
+        self.assertNotIn('Retry-After', response)
+
+
+class TempMediaMixin:
+    """MEDIA_ROOT + CHUNKED_UPLOAD_DIR trong thư mục tạm, xóa sau mỗi test"""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        overrides = override_settings(
+            MEDIA_ROOT=self.media_root,
+            CHUNKED_UPLOAD_DIR=os.path.join(self.media_root, 'tmp_uploads'),
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+
+class ChunkedUploadTests(TempMediaMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('uploader', password='secret')
+        self.client.force_login(self.user)
+        self.data = b'ID3' + os.urandom(3000)
+
+    def start(self, size=None):
+        response = self.client.post(reverse('chunked_upload_create'), {
+            'filename': 'song.mp3', 'size': len(self.data) if size is None else size,
+        })
+        return response
+
+    def patch(self, url, offset, chunk, checksum=None):
+        headers = {'HTTP_UPLOAD_OFFSET': str(offset)}
+        if checksum is not None:
+            headers['HTTP_UPLOAD_CHECKSUM'] = checksum
+        return self.client.generic('PATCH', url, chunk, content_type='application/offset+octet-stream', **headers)
+
+    @staticmethod
+    def sha256_header(chunk):
+        return 'sha256 ' + base64.b64encode(hashlib.sha256(chunk).digest()).decode()
+
+    def test_invalid_sizes(self):
+        self.assertEqual(self.start(size=0).status_code, 400)
+        with override_settings(CHUNKED_UPLOAD_MAX_SIZE=10):
+            self.assertEqual(self.start().status_code, 413)
+
+    def test_offset_conflict_and_checksum(self):
+        url = self.start()['Location']
+        first, rest = self.data[:1000], self.data[1000:]
+
+        response = self.patch(url, 0, first, checksum=self.sha256_header(b'other'))
+        self.assertEqual(response.status_code, 460)
+        self.assertEqual(response['Upload-Offset'], '0')
+        self.assertEqual(self.patch(url, 0, first, checksum='sha256 not*base64').status_code, 400)
+
+        self.assertEqual(self.patch(url, 0, first, checksum=self.sha256_header(first)).status_code, 204)
+        # Gửi lại chunk đã nhận / nhảy cóc → 409 kèm offset đúng
+        for offset in (0, 2000):
+            response = self.patch(url, offset, rest[:10])
+            self.assertEqual(response.status_code, 409)
+            self.assertEqual(response['Upload-Offset'], '1000')
+        session = UploadSession.objects.get()
+        self.assertEqual(os.path.getsize(uploads.part_path(session)), 1000)
+
+    def test_resume_and_complete(self):
+        url = self.start()['Location']
+        self.assertEqual(self.patch(url, 0, self.data[:1000]).status_code, 204)
+
+        # Mất kết nối: hỏi lại offset rồi gửi tiếp
+        response = self.client.head(url)
+        self.assertEqual(response['Upload-Offset'], '1000')
+        self.assertEqual(self.patch(url, 1000, self.data[1000:]).status_code, 204)
+        digest = hashlib.sha256(self.data).hexdigest()
+        # Hash được tính dần khi nhận chunk
+        self.assertEqual(uploads.content_digest(UploadSession.objects.get()), digest)
+
+        response = self.client.post(url + 'complete/', {'title': 'Song', 'artist': 'Artist'})
+        self.assertEqual(response.status_code, 201)
+        song = Song.objects.get(pk=response.json()['id'])
+        self.assertEqual(song.file.name, f'songs/{digest[:2]}/{digest}.mp3')
+        with song.file.open('rb') as f:
+            self.assertEqual(f.read(), self.data)
+        self.assertEqual(MediaBlob.objects.get(name=song.file.name).refcount, 1)
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertEqual(os.listdir(settings.CHUNKED_UPLOAD_DIR), [])
+
+    def test_complete_without_running_hash(self):
+        # Các chunk đi qua worker khác → complete tự hash lại file
+        url = self.start()['Location']
+        self.patch(url, 0, self.data)
+        uploads._running_hashes.clear()
+        response = self.client.post(url + 'complete/', {'title': 'Song', 'artist': 'Artist'})
+        song = Song.objects.get(pk=response.json()['id'])
+        self.assertIn(hashlib.sha256(self.data).hexdigest(), song.file.name)
+
+
+class ContentAddressedStorageTests(TempMediaMixin, TestCase):
+
+    def create_song(self, content, title='Song'):
+        song = Song(title=title, artist='Artist')
+        song.file.save('track.mp3', ContentFile(content), save=False)
+        with self.captureOnCommitCallbacks(execute=True):
+            song.save()
+        return song
+
+    def refcount(self, name):
+        return MediaBlob.objects.filter(name=name).values_list('refcount', flat=True).first()
+
+    def test_same_content_is_stored_once(self):
+        first = self.create_song(b'audio')
+        second = self.create_song(b'audio', title='Copy')
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertEqual(self.refcount(first.file.name), 2)
+        self.assertNotEqual(self.create_song(b'other').file.name, first.file.name)
+
+    def test_file_is_deleted_with_last_reference(self):
+        first = self.create_song(b'audio')
+        second = self.create_song(b'audio', title='Copy')
+        path = first.file.path
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertEqual(self.refcount(second.file.name), 1)
+        self.assertTrue(os.path.exists(path))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertIsNone(self.refcount(second.file.name))
+        self.assertFalse(os.path.exists(path))
+
+    def test_resaving_same_content_keeps_one_reference(self):
+        song = self.create_song(b'audio')
+        song.file.save('again.mp3', ContentFile(b'audio'), save=False)
+        with self.captureOnCommitCallbacks(execute=True):
+            song.save()
+        self.assertEqual(self.refcount(song.file.name), 1)
+
+    def test_replacing_file_releases_old_one(self):
+        song = self.create_song(b'audio')
+        old_name, old_path = song.file.name, song.file.path
+        song.file.save('new.mp3', ContentFile(b'new audio'), save=False)
+        with self.captureOnCommitCallbacks(execute=True):
+            song.save()
+        self.assertIsNone(self.refcount(old_name))
+        self.assertFalse(os.path.exists(old_path))
+        self.assertEqual(self.refcount(song.file.name), 1)
+
+
+class StreamSongTests(TempMediaMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.data = bytes(range(256)) * 40
+        self.song = Song(title='Song', artist='Artist')
+        self.song.file.save('track.mp3', ContentFile(self.data))
+        self.url = reverse('stream_song', args=[self.song.pk])
+        self.etag = f'"{digest_from_name(self.song.file.name)}"'
+
+    def test_full_response_has_etag(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], self.etag)
+        self.assertEqual(b''.join(response.streaming_content), self.data)
+
+    def test_if_none_match(self):
+        for header in (self.etag, f'W/{self.etag}', f'"other", {self.etag}', '*'):
+            with self.subTest(header=header):
+                response = self.client.get(self.url, HTTP_IF_NONE_MATCH=header)
+                self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+
+    def test_range(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(self.data)}')
+        self.assertEqual(b''.join(response.streaming_content), self.data[100:200])
+        self.assertEqual(self.client.get(self.url, HTTP_RANGE=f'bytes={len(self.data)}-').status_code, 416)
+
+    def test_if_range(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=self.etag)
+        self.assertEqual(response.status_code, 206)
+        # File đã đổi (ETag khác) → trả toàn bộ file
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.data)
+
+
+class LrcParserTests(SimpleTestCase):
+
+    def test_offsets_point_into_lyrics(self):
+        text = '[ti:Bài hát]\n[00:12.50]Dòng 1\r\n[00:15.00][01:20.00]  Điệp khúc  \n'
+        timeline = parse_lrc(text)
+        self.assertEqual([time for time, _, _ in timeline], [12.5, 15.0, 80.0])
+        self.assertEqual(
+            timeline_lines(text, timeline),
+            [(12.5, 'Dòng 1'), (15.0, 'Điệp khúc'), (80.0, 'Điệp khúc')],
+        )
+
+    def test_timestamp_formats(self):
+        text = '[01:02]a\n[01:02.5]b\n[01:02.344]c\n[01:02:07]d\n[100:00.00]e'
+        self.assertEqual([time for time, _, _ in parse_lrc(text)], [62, 62.07, 62.34, 62.5, 6000])
+
+    def test_plain_and_empty_lines(self):
+        self.assertEqual(parse_lrc('Lời thường\nkhông timestamp'), [])
+        self.assertEqual(parse_lrc(None), [])
+        # Dòng chỉ có timestamp (nhạc dạo) bị bỏ qua
+        self.assertEqual(timeline_lines('[00:01.00]\n[00:02.00]x', parse_lrc('[00:01.00]\n[00:02.00]x')), [(2.0, 'x')])
+
+
+class SongLyricsTimelineTests(TestCase):
+
+    def test_timeline_follows_lyrics_on_save(self):
+        song = Song.objects.create(title='Song', artist='Artist', file='songs/a.mp3', lyrics='[00:01.00]một')
+        self.assertEqual(song.lyrics_lines, [(1.0, 'một')])
+
+        song.lyrics = '[00:02.00]hai\n[00:03.00]ba'
+        song.save(update_fields=['lyrics'])
+        song.refresh_from_db()
+        self.assertEqual(song.lyrics_times, [2.0, 3.0])
+        self.assertEqual(song.lyrics_lines, [(2.0, 'hai'), (3.0, 'ba')])
+
+    def test_deferred_lyrics_keep_timeline(self):
+        song = Song.objects.create(title='Song', artist='Artist', file='songs/a.mp3', lyrics='[00:01.00]một')
+        listed = Song.objects.for_listing().get(pk=song.pk)
+        listed.title = 'Renamed'
+        listed.save()
+        song.refresh_from_db()
+        self.assertEqual(song.lyrics_timeline, parse_lrc(song.lyrics))
+
+
+class StartupImportTests(SimpleTestCase):
+    """Process web (và import music_app.ml_models) không được kéo torch / transformers vào"""
+
+    def test_heavy_modules_not_loaded_at_startup(self):
+        command = ProfileStartupCommand()
+        for scenario in ('wsgi', 'first_request'):
+            with self.subTest(scenario=scenario):
+                result = command.run_child(scenario, ['torch', 'transformers'], importtime=False)
+                self.assertEqual(result['loaded'], [])
+
+
+class FacetCountTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        for emotion in ('happy', 'happy', 'sad'):
+            self.create_song(emotion)
+
+    def create_song(self, emotion):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Song.objects.create(title='Song', artist='Artist', file='songs/a.mp3', emotion=emotion)
+
+    def test_counts_are_cached(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(facets.emotion.counts(), {'happy': 2, 'sad': 1})
+        with self.assertNumQueries(0):
+            self.assertEqual(facets.emotion.counts(), {'happy': 2, 'sad': 1})
+
+    def test_signals_adjust_cached_counts(self):
+        facets.emotion.counts()
+        song = self.create_song('sad')
+        with self.captureOnCommitCallbacks(execute=True):
+            song.emotion = 'happy'
+            song.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            Song.objects.filter(emotion='sad').first().delete()
+        with self.assertNumQueries(0):
+            self.assertEqual(facets.emotion.counts(), {'happy': 3, 'sad': 0})
+
+    def test_new_value_and_invalidate_recount(self):
+        facets.emotion.counts()
+        self.create_song('calm')
+        Song.objects.filter(emotion='sad').update(emotion='calm')
+        facets.invalidate()
+        self.assertEqual(facets.emotion.counts(), {'happy': 2, 'calm': 2})
+
+    def test_timeout_depends_on_shared_cache(self):
+        with override_settings(SHARED_CACHE=True, FACET_CACHE_TIMEOUT=3600, FACET_LOCAL_CACHE_TIMEOUT=30):
+            self.assertEqual(facets.emotion.timeout, 3600)
+        with override_settings(SHARED_CACHE=False, FACET_CACHE_TIMEOUT=3600, FACET_LOCAL_CACHE_TIMEOUT=30):
+            self.assertEqual(facets.emotion.timeout, 30)
+
+
+class SmallEstimatedCountPaginator(EstimatedCountPaginator):
+    exact_limit = 5
+    exact_count_below = 0
+
+
+class EstimatedCountPaginatorTests(TestCase):
+
+    def setUp(self):
+        Song.objects.bulk_create(
+            Song(title=f'Song {i}', artist='Artist', file='songs/a.mp3') for i in range(20)
+        )
+        # Ước lượng SQLite là MAX(rowid): xóa các dòng đầu → cao hơn số dòng thực tế
+        Song.objects.filter(pk__in=Song.objects.order_by('pk').values('pk')[:8]).delete()
+        self.songs = Song.objects.order_by('pk')
+        self.max_pk = self.songs.last().pk
+
+    def test_small_result_is_counted_exactly(self):
+        paginator = EstimatedCountPaginator(self.songs, 5)
+        self.assertEqual(paginator.count, 12)
+        self.assertFalse(paginator.estimated)
+
+    @skipUnless(connections['default'].vendor == 'sqlite', 'ước lượng MAX(rowid) của SQLite')
+    def test_estimate_is_corrected_on_empty_tail_page(self):
+        paginator = SmallEstimatedCountPaginator(self.songs, 5)
+        self.assertEqual(paginator.count, self.max_pk)
+        self.assertTrue(paginator.estimated)
+
+        last = paginator.num_pages
+        self.assertGreater(last, 3)
+        page = paginator.page(last)
+        self.assertEqual(page.number, 3)
+        self.assertEqual(len(page.object_list), 2)
+        self.assertEqual((paginator.count, paginator.num_pages), (12, 3))
+        self.assertEqual(list(paginator.get_elided_page_range(last)), [1, 2, 3])
+
+    def test_filtered_result_stops_at_exact_limit(self):
+        paginator = SmallEstimatedCountPaginator(self.songs.filter(artist='Artist'), 5)
+        self.assertEqual(paginator.count, SmallEstimatedCountPaginator.exact_limit)
+
+
+@plain_staticfiles
+class SongAdminTests(TestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', password='secret')
+        self.client.force_login(self.admin)
+        self.song = Song.objects.create(title='Song', artist='Artist', file='songs/a.mp3', lyrics='[00:01.00]x')
+
+    def test_changelist_does_not_load_lyrics(self):
+        with CaptureQueriesContext(connections['default']) as ctx:
+            response = self.client.get(reverse('admin:music_app_song_changelist'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Song')
+        self.assertFalse(any('"lyrics"' in query['sql'] for query in ctx.captured_queries))
+
+    def test_change_form_still_shows_lyrics(self):
+        response = self.client.get(reverse('admin:music_app_song_change', args=[self.song.pk]))
+        self.assertContains(response, '[00:01.00]x')
+
+
+class PrecompressedStaticMiddlewareTests(SimpleTestCase):
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        for name, content in (('app.css', b'body{}'), ('app.css.gz', b'gz'), ('app.css.br', b'br')):
+            with open(os.path.join(root, name), 'wb') as f:
+                f.write(content)
+        overrides = override_settings(SERVE_STATIC=True, STATIC_ROOT=root, STATIC_URL='/static/')
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.middleware = PrecompressedStaticMiddleware(lambda request: HttpResponse(status=404))
+
+    def get(self, accept_encoding):
+        request = RequestFactory().get('/static/app.css', HTTP_ACCEPT_ENCODING=accept_encoding)
+        response = self.middleware(request)
+        self.addCleanup(response.close)
+        return response
+
+    def test_encoding_negotiation(self):
+        cases = {
+            'gzip, deflate, br': 'br',
+            'br;q=0, gzip': 'gzip',
+            'gzip;q=1.0, br;q=0.5': 'gzip',
+            'gzip;q=0, br;q=0': None,
+            '*': 'br',
+            '*, br;q=0': 'gzip',
+            'deflate': None,
+            '': None,
+        }
+        for header, expected in cases.items():
+            with self.subTest(header=header):
+                response = self.get(header)
+                self.assertEqual(response.get('Content-Encoding'), expected)
+                self.assertEqual(response['Vary'], 'Accept-Encoding')
+
+    def test_headers_use_original_asset_name(self):
+        response = self.get('br')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('filename="app.css"', response['Content-Disposition'])
+        self.assertEqual(b''.join(response.streaming_content), b'br')
+
+
+class RemoteClassificationTests(TestCase):
+    LYRICS = 'I am walking on sunshine and it feels so good'
+
+    def setUp(self):
+        cache.clear()
+        self.songs = [
+            Song.objects.create(title=f'Song {i}', artist='Artist', file='songs/a.mp3', lyrics=self.LYRICS)
+            for i in range(2)
+        ]
+        patcher = mock.patch.object(ml_models, '_emotion_classifier_instance', ml_models.EmotionClassifier(
+            server_address='unix:/nonexistent.sock'
+        ))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def classify(self, status, body):
+        with mock.patch.object(ml_models, '_post_json', return_value=(status, body)):
+            tasks.classify_songs([song.pk for song in self.songs])
+        return [Song.objects.get(pk=song.pk) for song in self.songs]
+
+    def test_results_are_saved(self):
+        songs = self.classify(200, {'results': [{'emotion': 'happy', 'confidence': 0.9}, None]})
+        self.assertEqual([(song.emotion, song.emotion_status) for song in songs], [('happy', 'done'), ('unknown', 'skipped')])
+
+    def test_error_payloads_mark_songs_failed(self):
+        payloads = [
+            (503, {'error': 'Server busy'}),
+            (400, 'Bad Request'),
+            (200, {'oops': True}),
+            (200, {'results': [{'emotion': 'happy', 'confidence': 0.9}]}),  # thiếu 1 kết quả
+            (200, {'results': 'nope'}),
+        ]
+        for status, body in payloads:
+            with self.subTest(status=status, body=body):
+                songs = self.classify(status, body)
+                self.assertEqual([song.emotion_status for song in songs], ['failed', 'failed'])
+
+    def test_invalid_items_fail_individually(self):
+        songs = self.classify(200, {'results': [{'emotion': 'happy', 'confidence': 0.9}, {'emotion': 'angry'}]})
+        self.assertEqual([song.emotion_status for song in songs], ['done', 'failed'])
+
+
+@override_settings(PERF_INSTRUMENTATION=True, PERF_SLOW_REQUEST_MS=10 ** 6)
+class PerformanceMiddlewareTests(SimpleTestCase):
+
+    def streaming_view(self, request):
+        return StreamingHttpResponse(perf.count_bytes('stream', iter([b'ab', b'cd'])))
+
+    def logged_records(self, logs):
+        return [json.loads(message.split(':', 2)[2]) for message in logs.output]
+
+    def test_streaming_response_logged_once_after_close(self):
+        middleware = PerformanceMiddleware(self.streaming_view)
+        with self.assertLogs('music_app.perf', 'INFO') as logs:
+            response = middleware(RequestFactory().get('/stream/'))
+            self.assertEqual(b''.join(response.streaming_content), b'abcd')
+            response.close()
+            response.close()
+        records = self.logged_records(logs)
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]['stream_bytes'], 4)
+
+    def test_aborted_stream_is_logged(self):
+        middleware = PerformanceMiddleware(self.streaming_view)
+        with self.assertLogs('music_app.perf', 'INFO') as logs:
+            middleware(RequestFactory().get('/stream/')).close()
+        self.assertEqual([record['stream_bytes'] for record in self.logged_records(logs)], [0])
@@ -0,0 +1,195 @@
+"""
+Resumable upload chia chunk cho file audio lớn (giao thức kiểu tus, rút gọn)
+
+Flow:
+1. POST   /upload/chunked/                  {filename, size}     → 201, Location + Upload-Offset: 0
+2. PATCH  /upload/chunked/<id>/             body = chunk          → 204, Upload-Offset mới
+          Header: Upload-Offset (vị trí chunk), Upload-Checksum: "sha256 <base64>" (tùy chọn)
+3. HEAD   /upload/chunked/<id>/             → Upload-Offset hiện tại (để resume sau khi mất mạng)
+4. POST   /upload/chunked/<id>/complete/    title, artist, ... (+ image) → tạo Song
+
+Chunk được đọc từ request theo từng block nhỏ và ghi thẳng vào file tạm
+trong CHUNKED_UPLOAD_DIR, nên bộ nhớ không phụ thuộc kích thước file và
+mỗi request chỉ giữ worker trong thời gian gửi 1 chunk.
+
+SHA-256 của cả file (tên content-addressed, xem storage.py) được tính dần khi
+các chunk tới; bước complete chỉ chuyển file tạm vào storage, không copy lại.
+Trạng thái hash nằm trong bộ nhớ của process nhận chunk: nếu các chunk đi qua
+nhiều worker thì complete phải đọc lại file 1 lần để hash (vẫn không copy).
+"""
+
+import base64
+import binascii
+import hashlib
+import os
+from datetime import timedelta
+
+try:
+    import fcntl
+except ImportError:  # Windows: không có flock, chỉ dựa vào kiểm tra offset khi commit
+    fcntl = None
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import UploadSession
+
+READ_BLOCK_SIZE = 64 * 1024
+
+# session id → (offset, sha256 của file tạm tới offset đó) cho các phiên đang upload
+# qua process này; giới hạn số phiên để các phiên bỏ dở không giữ bộ nhớ mãi
+_running_hashes = {}
+MAX_RUNNING_HASHES = 1000
+
+
+class ChunkError(Exception):
+    """Chunk không hợp lệ; `status` là HTTP status trả về cho client"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def part_path(session):
+    return os.path.join(settings.CHUNKED_UPLOAD_DIR, f'{session.pk}.part')
+
+
+def create_session(user, filename, size):
+    """Tạo phiên upload mới + file tạm rỗng; dọn các phiên quá hạn của user."""
+    if size <= 0:
+        raise ChunkError('Invalid upload size')
+    if size > settings.CHUNKED_UPLOAD_MAX_SIZE:
+        raise ChunkError('Upload too large', status=413)
+
+    purge_expired(user)
+    os.makedirs(settings.CHUNKED_UPLOAD_DIR, exist_ok=True)
+    session = UploadSession.objects.create(user=user, filename=os.path.basename(filename), size=size)
+    open(part_path(session), 'wb').close()
+    return session
+
+
+def _parse_checksum(header):
+    """'sha256 <base64>' → bytes digest, None nếu không có header."""
+    if not header:
+        return None
+    algorithm, _, value = header.partition(' ')
+    if algorithm.lower() != 'sha256':
+        raise ChunkError('Unsupported checksum algorithm')
+    try:
+        digest = base64.b64decode(value, validate=True)
+    except binascii.Error:
+        raise ChunkError('Malformed Upload-Checksum header')
+    if len(digest) != hashlib.sha256().digest_size:
+        raise ChunkError('Malformed Upload-Checksum header')
+    return digest
+
+
+def append_chunk(session, request):
+    """
+    Ghi body của request vào file tạm tại session.offset
+
+    Chunk chỉ được chấp nhận khi Upload-Offset khớp offset hiện tại và
+    checksum (nếu có) đúng; chunk lỗi bị cắt bỏ để client gửi lại. Các PATCH
+    đồng thời vào cùng phiên được xếp hàng bằng flock trên file tạm.
+
+    Returns:
+        int: offset mới
+    """
+    try:
+        offset = int(request.headers['Upload-Offset'])
+        length = int(request.headers.get('Content-Length') or 0)
+    except (KeyError, ValueError):
+        raise ChunkError('Upload-Offset and Content-Length headers are required')
+
+    if length > settings.CHUNKED_UPLOAD_CHUNK_SIZE:
+        raise ChunkError('Chunk too large', status=413)
+    if offset + length > session.size:
+        raise ChunkError('Chunk exceeds declared upload size', status=413)
+
+    expected_digest = _parse_checksum(request.headers.get('Upload-Checksum'))
+    hasher = hashlib.sha256()
+    received = 0
+
+    with open(part_path(session), 'r+b') as part:
+        if fcntl is not None:
+            fcntl.flock(part, fcntl.LOCK_EX)
+            # Request trước (cùng phiên) có thể vừa commit trong lúc chờ lock
+            session.refresh_from_db(fields=['offset'])
+        if offset != session.offset:
+            raise ChunkError(f'Offset mismatch, expected {session.offset}', status=409)
+
+        file_hasher = _running_hash(session.pk, offset)
+        part.seek(offset)
+        while received < length:
+            block = request.read(min(READ_BLOCK_SIZE, length - received))
+            if not block:
+                break
+            hasher.update(block)
+            if file_hasher is not None:
+                file_hasher.update(block)
+            part.write(block)
+            received += len(block)
+
+        if received != length or (expected_digest is not None and hasher.digest() != expected_digest):
+            part.truncate(offset)
+            if received != length:
+                raise ChunkError('Incomplete chunk')
+            raise ChunkError('Checksum mismatch', status=460)
+        part.truncate(offset + length)
+
+        # Chỉ tăng offset nếu chưa có request nào khác ghi đè trong lúc này
+        updated = UploadSession.objects.filter(pk=session.pk, offset=offset).update(
+            offset=offset + length, updated_at=timezone.now()
+        )
+        if not updated:
+            # Bỏ phần vừa ghi: file tạm phải luôn dài đúng bằng offset đã commit
+            session.refresh_from_db(fields=['offset'])
+            part.truncate(session.offset)
+            raise ChunkError('Concurrent upload to the same session', status=409)
+    session.offset = offset + length
+    if file_hasher is not None:
+        _remember_hash(session.pk, session.offset, file_hasher)
+    return session.offset
+
+
+def _running_hash(session_id, offset):
+    """Bản sao hash của file tạm tới `offset`, None nếu process này không có"""
+    if offset == 0:
+        return hashlib.sha256()
+    running = _running_hashes.get(session_id)
+    if running is None or running[0] != offset:
+        return None
+    return running[1].copy()
+
+
+def _remember_hash(session_id, offset, hasher):
+    _running_hashes.pop(session_id, None)
+    while len(_running_hashes) >= MAX_RUNNING_HASHES:
+        _running_hashes.pop(next(iter(_running_hashes)), None)
+    _running_hashes[session_id] = (offset, hasher)
+
+
+def content_digest(session):
+    """SHA-256 (hex) của file đã ghép; None nếu process này không theo dõi đủ các chunk"""
+    running = _running_hashes.get(session.pk)
+    if running is None or running[0] != session.size:
+        return None
+    return running[1].hexdigest()
+
+
+def discard(session):
+    """Xóa file tạm + phiên upload."""
+    _running_hashes.pop(session.pk, None)
+    if os.path.exists(part_path(session)):
+        os.remove(part_path(session))
+    session.delete()
+
+
+def purge_expired(user=None):
+    """Dọn các phiên không có chunk mới quá CHUNKED_UPLOAD_EXPIRY_HOURS."""
+    cutoff = timezone.now() - timedelta(hours=settings.CHUNKED_UPLOAD_EXPIRY_HOURS)
+    sessions = UploadSession.objects.filter(updated_at__lt=cutoff)
+    if user is not None:
+        sessions = sessions.filter(user=user)
+    for session in sessions:
+        discard(session)
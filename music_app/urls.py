@@ -7,6 +7,9 @@ urlpatterns = [
     path('register/', views.register_view, name='register'),
     path('logout/', views.logout_view, name='logout'),
     path('upload/', views.upload_song, name='upload_song'),
+    path('upload/chunked/', views.chunked_upload_create, name='chunked_upload_create'),
+    path('upload/chunked/<uuid:upload_id>/', views.chunked_upload, name='chunked_upload'),
+    path('upload/chunked/<uuid:upload_id>/complete/', views.chunked_upload_complete, name='chunked_upload_complete'),
     path('player/<int:song_id>/', views.player, name='player'),
     path('playlist/create/', views.create_playlist, name='create_playlist'),
     path('playlist/<int:playlist_id>/', views.playlist_detail, name='playlist_detail'),
@@ -14,6 +17,7 @@ urlpatterns = [
     path('playlist/<int:playlist_id>/add-song/<int:song_id>/', views.add_song_to_playlist, name='add_song_to_playlist'),
     path('playlist/<int:playlist_id>/remove-song/<int:song_id>/', views.remove_song_from_playlist, name='remove_song_from_playlist'),
     path('comment/<int:song_id>/', views.add_comment, name='add_comment'),
+    path('comment/<int:song_id>/ajax/', views.add_comment_ajax, name='add_comment_ajax'),
     path('song/<int:song_id>/stream/', views.stream_song, name='stream_song'),
     path('song/<int:song_id>/analyze-emotion/', views.analyze_song_emotion, name='analyze_emotion'),
 ]
\ No newline at end of file
@@ -1,13 +1,23 @@
 from django.utils.safestring import mark_safe
-from django.shortcuts import render, redirect
+from django.shortcuts import render, redirect, get_object_or_404
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.views.decorators.http import require_POST, require_http_methods
+from django.conf import settings
+from django.db import transaction
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.contrib.auth.models import User
-from .models import Song, Playlist, Comment
-from .forms import SongUploadForm, CommentForm
-from django.http import FileResponse, Http404, HttpResponse
+from .models import Song, Playlist, Comment, UploadSession
+from .forms import SongUploadForm, ChunkedSongForm, CommentForm
+from . import facets, fingerprint, perf, tasks, uploads
+from .ratelimit import get_limiter
+from .storage import digest_from_name
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.http import parse_etags
 import os
+from functools import partial
 
 def login_view(request):
     if request.method == 'POST':
@@ -51,6 +61,24 @@ def logout_view(request):
     logout(request)
     return redirect('login')
 
+def _check_duplicate(request, song):
+    """
+    Bài vừa upload có trùng bài đã có không: file giống hệt thì báo ngay cho user;
+    fingerprint audio (fpcalc, có thể mất vài chục giây) chạy nền và tự gắn
+    duplicate_of nếu tìm thấy bản gần giống
+    """
+    original = fingerprint.exact_original(song)
+    if original is not None:
+        fingerprint.link_duplicate(song, original)
+        messages.info(
+            request,
+            f'Bài hát này có vẻ trùng với "{original.title} - {original.artist}". '
+            f'Đã dùng lại cảm xúc và thông tin của bài gốc.'
+        )
+    if fingerprint.fpcalc_available():
+        transaction.on_commit(partial(tasks.enqueue, tasks.fingerprint_songs, [song.pk]))
+    return original
+
 @login_required
 def upload_song(request):
     if request.method == 'POST':
@@ -58,31 +86,116 @@ def upload_song(request):
         if form.is_valid():
             song = form.save()
             messages.success(request, f'Song "{song.title}" uploaded successfully!')
+            _check_duplicate(request, song)
             return redirect('home')
     else:
         form = SongUploadForm()
-    return render(request, 'music_app/upload.html', {'form': form})
+    return render(request, 'music_app/upload.html', {
+        'form': form,
+        'chunk_size': settings.CHUNKED_UPLOAD_CHUNK_SIZE
+    })
+
+@login_required
+@require_POST
+def chunked_upload_create(request):
+    """Bắt đầu phiên upload chia chunk (xem uploads.py)"""
+    try:
+        size = int(request.POST.get('size', ''))
+    except ValueError:
+        return JsonResponse({'error': 'size is required'}, status=400)
+    filename = request.POST.get('filename', '').strip()
+    if not filename:
+        return JsonResponse({'error': 'filename is required'}, status=400)
+
+    try:
+        session = uploads.create_session(request.user, filename, size)
+    except uploads.ChunkError as e:
+        return JsonResponse({'error': str(e)}, status=e.status)
+
+    response = JsonResponse({
+        'id': str(session.pk),
+        'offset': session.offset,
+        'chunk_size': settings.CHUNKED_UPLOAD_CHUNK_SIZE
+    }, status=201)
+    response['Location'] = reverse('chunked_upload', args=[session.pk])
+    response['Upload-Offset'] = str(session.offset)
+    return response
+
+@login_required
+@require_http_methods(['GET', 'HEAD', 'PATCH', 'DELETE'])
+def chunked_upload(request, upload_id):
+    """HEAD/GET: offset hiện tại để resume, PATCH: gửi 1 chunk, DELETE: hủy upload"""
+    session = get_object_or_404(UploadSession, pk=upload_id, user=request.user)
+
+    if request.method == 'PATCH':
+        try:
+            uploads.append_chunk(session, request)
+        except uploads.ChunkError as e:
+            response = JsonResponse({'error': str(e)}, status=e.status)
+            response['Upload-Offset'] = str(session.offset)
+            return response
+        response = HttpResponse(status=204)
+    elif request.method == 'DELETE':
+        uploads.discard(session)
+        return HttpResponse(status=204)
+    else:
+        response = JsonResponse({'offset': session.offset, 'size': session.size})
+
+    response['Upload-Offset'] = str(session.offset)
+    response['Upload-Length'] = str(session.size)
+    response['Cache-Control'] = 'no-store'
+    return response
+
+@login_required
+@require_POST
+def chunked_upload_complete(request, upload_id):
+    """Hoàn tất upload chia chunk: tạo Song từ file đã ghép + thông tin trong form"""
+    session = get_object_or_404(UploadSession, pk=upload_id, user=request.user)
+    if not session.is_complete:
+        return JsonResponse({'error': 'Upload is not complete', 'offset': session.offset}, status=409)
+
+    form = ChunkedSongForm(request.POST, request.FILES)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+
+    song = form.save(commit=False)
+    # Chuyển file tạm vào storage (không copy); digest đã tính dần khi nhận chunk
+    song.file.save_existing(
+        session.filename, uploads.part_path(session), uploads.content_digest(session), save=False
+    )
+    song.save()
+    uploads.discard(session)
+
+    messages.success(request, f'Song "{song.title}" uploaded successfully!')
+    original = _check_duplicate(request, song)
+    return JsonResponse({
+        'id': song.id,
+        'duplicate_of': original.id if original else None,
+        'redirect': reverse('home')
+    }, status=201)
 
 @login_required
 def home(request):
     emotion = request.GET.get('emotion')
+    songs = Song.objects.for_listing()
     if emotion and emotion != 'all':
-        songs = Song.objects.filter(emotion=emotion)
-    else:
-        songs = Song.objects.all()
+        songs = songs.filter(emotion=emotion)
     
     playlists = Playlist.objects.filter(user=request.user)
+    emotion_counts = facets.emotion.counts()
     return render(request, 'music_app/home.html', {
         'songs': songs, 
         'playlists': playlists,
-        'current_emotion': emotion
+        'current_emotion': emotion,
+        'emotion_counts': emotion_counts,
+        'total_songs': sum(emotion_counts.values()),
     })
 
 @login_required
 def player(request, song_id):
     song = Song.objects.get(id=song_id)
     playlists = Playlist.objects.filter(user=request.user)
-    comments = song.comments.all().order_by('-created_at')
+    comments = song.comments.select_related('user').order_by('-created_at')
     form = CommentForm()
     return render(request, 'music_app/player.html', {
         'song': song, 
@@ -175,7 +288,7 @@ def playlist_detail(request, playlist_id):
     """Xem chi tiết playlist và phát nhạc"""
     try:
         playlist = Playlist.objects.get(id=playlist_id, user=request.user)
-        songs = playlist.songs.all()
+        songs = playlist.songs.for_listing()
         all_playlists = Playlist.objects.filter(user=request.user)
         return render(request, 'music_app/playlist_detail.html', {
             'playlist': playlist,
@@ -186,19 +299,65 @@ def playlist_detail(request, playlist_id):
         messages.error(request, 'Không tìm thấy playlist hoặc bạn không có quyền truy cập.')
         return redirect('home')
 
+def _create_comment(request, song):
+    """
+    Validate + lưu comment của request.user cho song (dùng chung cho form và AJAX)
+
+    Returns:
+        tuple: (comment, form, allowed, retry_after) - comment là None nếu form
+        không hợp lệ hoặc user đã vượt rate limit (allowed=False, retry_after là
+        số giây cần chờ hoặc None nếu không được đăng thêm nữa).
+    """
+    form = CommentForm(request.POST)
+    if not form.is_valid():
+        return None, form, True, 0
+
+    allowed, retry_after = get_limiter('comment').consume(request.user.pk)
+    if not allowed:
+        return None, form, False, retry_after
+
+    comment = form.save(commit=False)
+    comment.user = request.user
+    comment.song = song
+    comment.save()
+    return comment, form, True, 0
+
+
+def _rate_limit_message(retry_after):
+    if retry_after is None:
+        return 'Bạn đã đạt giới hạn số bình luận.'
+    return f'Bạn bình luận quá nhanh, vui lòng thử lại sau {retry_after:.0f} giây.'
+
 @login_required
 def add_comment(request, song_id):
     if request.method == 'POST':
         song = Song.objects.get(id=song_id)
-        form = CommentForm(request.POST)
-        if form.is_valid():
-            comment = form.save(commit=False)
-            comment.user = request.user
-            comment.song = song
-            comment.save()
+        comment, form, allowed, retry_after = _create_comment(request, song)
+        if comment is not None:
             messages.success(request, 'Bình luận đã được đăng!')
+        elif not allowed:
+            messages.warning(request, _rate_limit_message(retry_after))
     return redirect('player', song_id=song_id)
 
+@login_required
+@require_POST
+def add_comment_ajax(request, song_id):
+    """Đăng bình luận qua AJAX, chỉ trả về HTML của bình luận mới (không render lại player)"""
+    song = get_object_or_404(Song, id=song_id)
+    comment, form, allowed, retry_after = _create_comment(request, song)
+
+    if not allowed:
+        response = JsonResponse({'error': _rate_limit_message(retry_after)}, status=429)
+        if retry_after is not None:
+            response['Retry-After'] = str(int(retry_after) + 1)
+        return response
+
+    if comment is None:
+        return JsonResponse({'errors': form.errors}, status=400)
+
+    html = render_to_string('music_app/partials/comment.html', {'comment': comment}, request=request)
+    return JsonResponse({'id': comment.id, 'html': html}, status=201)
+
 def stream_song(request, song_id):
     """Stream song with Range request support for seeking."""
     song = Song.objects.get(id=song_id)
@@ -210,11 +369,29 @@ def stream_song(request, song_id):
     file_size = os.path.getsize(file_path)
     range_header = request.META.get('HTTP_RANGE', '').strip()
     
+    # File content-addressed: digest chính là ETag (nội dung không bao giờ đổi dưới cùng tên)
+    digest = digest_from_name(song.file.name)
+    etag = f'"{digest}"' if digest else None
+    # If-None-Match có thể là danh sách / '*' / weak tag (W/"...") - so sánh weak theo RFC 9110
+    if_none_match = [tag.removeprefix('W/') for tag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))]
+    if etag and ('*' in if_none_match or etag in if_none_match):
+        response = HttpResponse(status=304)
+        response['ETag'] = etag
+        return response
+    
+    # If-Range khác ETag hiện tại → bỏ qua Range, trả về toàn bộ file
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if range_header and if_range and if_range != etag:
+        range_header = ''
+    
     # If no Range header, return full file
     if not range_header:
         response = FileResponse(open(file_path, 'rb'), content_type='audio/mpeg')
+        response.streaming_content = perf.count_bytes('stream', response.streaming_content)
         response['Accept-Ranges'] = 'bytes'
         response['Content-Length'] = str(file_size)
+        if etag:
+            response['ETag'] = etag
         return response
     
     # Parse Range header (format: "bytes=start-end")
@@ -233,15 +410,31 @@ def stream_song(request, song_id):
     file_handle = open(file_path, 'rb')
     file_handle.seek(start)
     
-    # Create partial content response
-    response = HttpResponse(file_handle.read(content_length), content_type='audio/mpeg', status=206)
+    # Create partial content response (stream từng block, không đọc cả đoạn vào RAM)
+    response = StreamingHttpResponse(
+        perf.count_bytes('stream', _read_range(file_handle, content_length)),
+        content_type='audio/mpeg',
+        status=206
+    )
     response['Accept-Ranges'] = 'bytes'
     response['Content-Range'] = f'bytes {start}-{end}/{file_size}'
     response['Content-Length'] = str(content_length)
-    
-    file_handle.close()
+    if etag:
+        response['ETag'] = etag
     return response
 
+def _read_range(file_handle, length, block_size=FileResponse.block_size):
+    """Đọc `length` bytes từ vị trí hiện tại của file theo từng block, đóng file khi xong / bị hủy"""
+    try:
+        while length > 0:
+            block = file_handle.read(min(block_size, length))
+            if not block:
+                break
+            length -= len(block)
+            yield block
+    finally:
+        file_handle.close()
+
 @login_required
 def analyze_song_emotion(request, song_id):
     """
@@ -10,11 +10,19 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
+import sys
 from pathlib import Path
 
+import django
+from dotenv import load_dotenv
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Biến môi trường từ .env (HF_TOKEN, DATABASE_ENGINE, ...) - nạp 1 lần ở đây thay vì trong ml_models
+load_dotenv(BASE_DIR / '.env')
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/4.2/howto/deployment/checklist/
@@ -43,6 +51,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'music_app.middleware.PrecompressedStaticMiddleware',
+    'music_app.middleware.PerformanceMiddleware',
+    'music_app.middleware.ReplicaPinningMiddleware',
+    'music_app.middleware.BackgroundMaintenanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -54,9 +66,16 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'mymusic.urls'
 
+# Performance instrumentation (music_app/middleware.py): Server-Timing header + log JSON mỗi request
+PERF_INSTRUMENTATION = os.environ.get('PERF_INSTRUMENTATION') == '1'
+
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Khi bật instrumentation: DjangoTemplates + đo thời gian render cho PerformanceMiddleware
+        'BACKEND': (
+            'music_app.perf.InstrumentedDjangoTemplates' if PERF_INSTRUMENTATION
+            else 'django.template.backends.django.DjangoTemplates'
+        ),
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -76,12 +95,129 @@ WSGI_APPLICATION = 'mymusic.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+#
+# Chọn qua biến môi trường DATABASE_ENGINE:
+#   sqlite   (mặc định) - file SQLITE_PATH, bật WAL + các PRAGMA bên dưới khi mở connection
+#   postgres            - POSTGRES_DB/USER/PASSWORD/HOST/PORT, connection giữ lâu (CONN_MAX_AGE)
+#                         + pool (psycopg pool trên Django >= 5.1, hoặc PgBouncer qua POSTGRES_POOLER)
+
+DATABASE_ENGINE = os.environ.get('DATABASE_ENGINE', 'sqlite')
+
+if DATABASE_ENGINE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('POSTGRES_DB', 'mymusic'),
+            'USER': os.environ.get('POSTGRES_USER', 'mymusic'),
+            'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+            'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+            'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 600)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'connect_timeout': 5,
+            },
+        }
+    }
+    if os.environ.get('POSTGRES_POOLER') == 'pgbouncer':
+        # PgBouncer (transaction pooling) không giữ được server-side cursor giữa các transaction
+        DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+    elif django.VERSION >= (5, 1):
+        # Pool trong process (psycopg_pool); không dùng chung được với CONN_MAX_AGE
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+            'timeout': 10,
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                # Số giây chờ khi DB đang bị khóa trước khi báo "database is locked"
+                # (sqlite3 đặt busy timeout của connection theo giá trị này - không đặt
+                # lại bằng PRAGMA busy_timeout ở dưới)
+                'timeout': 20,
+            },
+        }
+    }
+    if django.VERSION >= (5, 1):
+        # Lấy write lock ngay khi mở transaction, tránh lỗi khi nâng cấp lock giữa chừng
+        DATABASES['default']['OPTIONS']['transaction_mode'] = 'IMMEDIATE'
+
+# Read replica cho các query đọc catalog (music_app/routers.py). Mỗi replica là 1 alias
+# 'replica_N' cùng cấu hình với default, chỉ khác host (Postgres) / file (SQLite).
+#   Postgres: POSTGRES_REPLICA_HOSTS=10.0.0.2,10.0.0.3
+#   SQLite (giả lập, chép từ primary bằng `manage.py sync_sqlite_replicas`):
+#       SQLITE_REPLICA_PATHS=/tmp/replica1.sqlite3,/tmp/replica2.sqlite3
+if DATABASE_ENGINE == 'postgres':
+    _replicas = [('HOST', host) for host in os.environ.get('POSTGRES_REPLICA_HOSTS', '').split(',') if host]
+else:
+    _replicas = [('NAME', path) for path in os.environ.get('SQLITE_REPLICA_PATHS', '').split(',') if path]
+
+if not _replicas and sys.argv[1:2] == ['test']:
+    # `manage.py test`: luôn có 2 replica giả lập (TEST MIRROR bên dưới → dùng chung
+    # database test của default) để các test của router (music_app/tests.py) chạy được
+    _replicas = [('NAME', DATABASES['default']['NAME'])] * 2
+
+for _index, (_key, _value) in enumerate(_replicas, start=1):
+    DATABASES[f'replica_{_index}'] = {
+        **DATABASES['default'],
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        _key: _value,
+        # Khi chạy test, replica dùng chung database test của default
+        'TEST': {'MIRROR': 'default'},
+    }
+
+REPLICA_DATABASES = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['music_app.routers.PrimaryReplicaRouter']
+
+# Sau khi user ghi dữ liệu, các request tiếp theo của user đó đọc từ primary trong
+# khoảng thời gian này (read-your-writes khi replica còn trễ)
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 5))
+
+# PRAGMA áp dụng cho mỗi connection SQLite mới (music_app/signals.py).
+# Đặt SQLITE_TUNING=0 để tắt (vd: so sánh trong benchmarks/db_writes.py).
+#
+# journal_mode=WAL được lưu vĩnh viễn trong header của file DB: lần đầu bất kỳ lệnh
+# manage.py nào mở db.sqlite3 (file mẫu có trong git) thì file đó bị sửa và hiện là
+# modified trong `git status`. Đặt SQLITE_JOURNAL_MODE=DELETE để giữ nguyên file mẫu
+# (vd: khi chỉ chạy check / test trên bản checkout).
+if os.environ.get('SQLITE_TUNING', '1') == '1':
+    SQLITE_PRAGMAS = {
+        'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),  # WAL: reader không chặn writer
+        'synchronous': 'NORMAL',        # an toàn với WAL, ít fsync hơn FULL
+        'mmap_size': 256 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+    }
+else:
+    SQLITE_PRAGMAS = {}
+
+
+# Cache
+# Dùng Redis khi có REDIS_URL để rate limit / cache dùng chung giữa các worker,
+# mặc định là LocMem (chỉ trong 1 process, đủ cho môi trường dev).
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
     }
-}
+
+# Cache có dùng chung giữa các worker không. Những gì cần invalidate chéo giữa các
+# process (facet counts, session / user cache, lock của job định kỳ) kiểm tra cờ này
+# thay vì giả định; đặt SHARED_CACHE=1 nếu cấu hình CACHES khác (vd Memcached) ở trên.
+SHARED_CACHE = os.environ.get('SHARED_CACHE', '1' if os.environ.get('REDIS_URL') else '0') == '1'
 
 
 # Password validation
@@ -119,16 +255,103 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/4.2/howto/static-files/
 
 STATIC_URL = 'static/'
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# collectstatic: tên file có hash + minify + bản .gz/.br nén sẵn (music_app/staticfiles.py)
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'music_app.staticfiles.MinifiedManifestStaticFilesStorage',
+    },
+}
+
+# PrecompressedStaticMiddleware phục vụ STATIC_ROOT với cache immutable (khi DEBUG
+# thì runserver tự phục vụ static). Tắt nếu đã có nginx/CDN phục vụ /static/.
+SERVE_STATIC = os.environ.get('SERVE_STATIC', '0' if DEBUG else '1') == '1'
 
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Resumable (chunked) uploads - xem music_app/uploads.py
+CHUNKED_UPLOAD_DIR = BASE_DIR / 'tmp_uploads'
+CHUNKED_UPLOAD_MAX_SIZE = 2 * 1024 ** 3         # 2 GB / file
+CHUNKED_UPLOAD_CHUNK_SIZE = 8 * 1024 ** 2       # tối đa 8 MB / request PATCH
+CHUNKED_UPLOAD_EXPIRY_HOURS = 24                # phiên bỏ dở quá hạn sẽ bị dọn
+
+# Phát hiện bài trùng bằng acoustic fingerprint - xem music_app/fingerprint.py
+# (cần `fpcalc` của Chromaprint; không có thì chỉ nhận ra file giống hệt nhau)
+FPCALC_PATH = os.environ.get('FPCALC_PATH', 'fpcalc')
+FINGERPRINT_LENGTH = 120                        # chỉ fingerprint 120 giây đầu
+FINGERPRINT_TIMEOUT = 30
+FINGERPRINT_MATCH_THRESHOLD = 0.85              # tỉ lệ bit giống nhau tối thiểu
+
 # Login settings
+# Chỉ khi có SHARED_CACHE: session đọc từ cache, ghi xuống cả cache lẫn DB
+# (write-through) và User được cache theo id (music_app/auth_backends.py) → request
+# đã đăng nhập không cần query django_session / auth_user. Với LocMem, logout hay
+# khóa tài khoản ở 1 worker không xóa được bản cache của các worker khác, nên giữ
+# session trong DB + ModelBackend. Session hết hạn được dọn định kỳ (tasks.run_maintenance).
+# ModelBackend luôn nằm trong AUTHENTICATION_BACKENDS: session đăng nhập trước đó
+# lưu đường dẫn backend này, bỏ đi thì mọi user bị logout khi deploy.
+if SHARED_CACHE:
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+    AUTHENTICATION_BACKENDS = [
+        'music_app.auth_backends.CachedModelBackend',
+        'django.contrib.auth.backends.ModelBackend',
+    ]
+else:
+    SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+    AUTHENTICATION_BACKENDS = ['django.contrib.auth.backends.ModelBackend']
+AUTH_USER_CACHE_TIMEOUT = 300
+
+# Chu kỳ (giây) job dọn session hết hạn + phiên upload bỏ dở; 0 để tắt
+MAINTENANCE_INTERVAL = int(os.environ.get('MAINTENANCE_INTERVAL', 3600))
+# Không có SHARED_CACHE: các worker trên cùng máy giành lượt chạy job qua file lock ở đây
+PERIODIC_LOCK_DIR = BASE_DIR / 'tmp_locks'
+
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'home'
 LOGOUT_REDIRECT_URL = 'login'
 
+# Rate limits cho các thao tác ghi (theo user, cửa sổ cố định, xem music_app/ratelimit.py)
+# capacity: số request tối đa trong 1 cửa sổ, refill_rate: tốc độ trung bình (request/giây)
+# → cửa sổ dài capacity / refill_rate giây
+RATE_LIMITS = {
+    'comment': {'capacity': 5, 'refill_rate': 5 / 60},
+}
+
+# Facet counts ở thanh lọc home (music_app/facets.py) được cập nhật tăng dần;
+# timeout giới hạn thời gian sai lệch nếu có thao tác ghi nào bỏ qua signal.
+# Không có SHARED_CACHE thì cập nhật của worker này không tới được worker khác
+# → chỉ giữ counts trong FACET_LOCAL_CACHE_TIMEOUT rồi đếm lại.
+FACET_CACHE_TIMEOUT = 60 * 60
+FACET_LOCAL_CACHE_TIMEOUT = 30
+
+# Ngưỡng log request chậm của PerformanceMiddleware (PERF_INSTRUMENTATION ở trên, cạnh TEMPLATES)
+PERF_SLOW_REQUEST_MS = int(os.environ.get('PERF_SLOW_REQUEST_MS', 500))
+PERF_SLOW_SAMPLE_RATE = float(os.environ.get('PERF_SLOW_SAMPLE_RATE', 0.1))
+
+# Ngân sách khởi động cho `manage.py profile_startup` (mỗi worker web mới spawn)
+STARTUP_BUDGET = {
+    'seconds': float(os.environ.get('STARTUP_BUDGET_SECONDS', 3.0)),
+    'rss_mb': float(os.environ.get('STARTUP_BUDGET_RSS_MB', 150)),
+    'forbidden_modules': ['torch', 'transformers'],
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'music_app.perf': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 